@@ -3,11 +3,12 @@
 提供HTTP API进行策略回测和结果查询
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import asyncio
+import json
 import sys
 import os
 
@@ -15,6 +16,9 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from services.strategy_service.backtesting.backtest_manager import BacktestManager, quick_backtest
+from services.strategy_service.backtesting.job_manager import (
+    BacktestJobManager, JOB_RUN, JOB_BATCH, JOB_OPTIMIZE, JOB_WALK_FORWARD, STATUS_RUNNING, STATUS_COMPLETED
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,6 +28,8 @@ router = APIRouter(prefix="/backtest", tags=["回测"])
 
 # 全局回测管理器
 backtest_manager = BacktestManager()
+# 后台回测任务
+job_manager = BacktestJobManager(backtest_manager)
 
 
 # 请求模型
@@ -36,12 +42,16 @@ class BacktestRequest(BaseModel):
     capital: Optional[int] = Field(1000000, description="初始资金")
     rate: Optional[float] = Field(0.0002, description="手续费率")
     slippage: Optional[float] = Field(0.2, description="滑点")
+    interval: Optional[str] = Field(None, description="K线周期 1m/5m/15m/30m/1h/1d，tick 为逐笔回放录制的tick（仅原生引擎）")
+    engine: Optional[str] = Field("native", description="回测引擎: native（原生回放）/ vnpy")
+    robustness_paths: Optional[int] = Field(None, description="稳健性分析的重采样路径数，默认10000，0 不做分析（仅原生引擎）")
 
 
 class BatchBacktestRequest(BaseModel):
     """批量回测请求模型"""
     strategies: List[Dict[str, Any]] = Field(..., description="策略配置列表")
     backtest_setting: Optional[Dict[str, Any]] = Field(default_factory=dict, description="回测设置")
+    engine: Optional[str] = Field("native", description="回测引擎: native（进程池并行）/ vnpy")
 
 
 class QuickBacktestRequest(BaseModel):
@@ -56,6 +66,100 @@ class OptimizationRequest(BaseModel):
     strategy_name: str = Field(..., description="策略名称")
     optimization_setting: Dict[str, Any] = Field(..., description="优化参数设置")
     target_name: Optional[str] = Field("sharpe_ratio", description="优化目标")
+    method: Optional[str] = Field("grid", description="搜索方式: grid / random / halving")
+    n_iter: Optional[int] = Field(50, description="random/halving 的参数组数")
+    seed: Optional[int] = Field(None, description="随机种子")
+    strategy_setting: Optional[Dict[str, Any]] = Field(default_factory=dict, description="固定的策略参数")
+    backtest_setting: Optional[Dict[str, Any]] = Field(default_factory=dict, description="回测设置")
+    engine: Optional[str] = Field("native", description="回测引擎: native（进程池并行）/ vnpy")
+
+
+class WalkForwardRequest(BaseModel):
+    """滚动窗口回测请求模型"""
+    strategy_name: str = Field(..., description="策略名称")
+    optimization_setting: Dict[str, Any] = Field(..., description="样本内寻优的参数空间")
+    in_sample_days: int = Field(120, description="样本内天数")
+    out_sample_days: int = Field(30, description="样本外天数（窗口滚动步长）")
+    warmup_days: int = Field(5, description="样本外回测前的预热天数")
+    anchored: bool = Field(False, description="样本内起点是否固定（扩张窗口）")
+    target_name: Optional[str] = Field("sharpe_ratio", description="优化目标")
+    method: Optional[str] = Field("grid", description="搜索方式: grid / random / halving")
+    n_iter: Optional[int] = Field(50, description="random/halving 的参数组数")
+    seed: Optional[int] = Field(None, description="随机种子")
+    strategy_setting: Optional[Dict[str, Any]] = Field(default_factory=dict, description="固定的策略参数")
+    backtest_setting: Optional[Dict[str, Any]] = Field(default_factory=dict, description="回测设置")
+
+
+def _parse_dates(setting: Dict[str, Any]) -> Dict[str, Any]:
+    """回测设置中的日期字符串 (YYYY-MM-DD) 转为 datetime"""
+    setting = dict(setting or {})
+    for key in ("start_date", "end_date"):
+        if isinstance(setting.get(key), str):
+            setting[key] = datetime.strptime(setting[key], "%Y-%m-%d")
+    return setting
+
+
+def _build_backtest_setting(request: BacktestRequest) -> Dict[str, Any]:
+    """单策略回测请求转为回测设置"""
+    backtest_setting = {
+        "capital": request.capital,
+        "rate": request.rate,
+        "slippage": request.slippage
+    }
+    if request.start_date:
+        backtest_setting["start_date"] = request.start_date
+    if request.end_date:
+        backtest_setting["end_date"] = request.end_date
+    if request.interval:
+        backtest_setting["interval"] = request.interval
+    if request.robustness_paths is not None:
+        backtest_setting["robustness_paths"] = request.robustness_paths
+    return _parse_dates(backtest_setting)
+
+
+def _build_strategies_config(request: BatchBacktestRequest) -> List[Dict[str, Any]]:
+    """批量回测请求转为策略配置列表"""
+    strategies_config = []
+    for strategy_config in request.strategies:
+        if "strategy_name" not in strategy_config:
+            raise HTTPException(status_code=400, detail="策略配置缺少strategy_name")
+
+        strategies_config.append({
+            "strategy_name": strategy_config["strategy_name"],
+            "strategy_setting": strategy_config.get("strategy_setting", {})
+        })
+    return strategies_config
+
+
+def _build_optimization_config(request: OptimizationRequest) -> Dict[str, Any]:
+    """参数优化请求转为优化配置"""
+    return {
+        "optimization_setting": request.optimization_setting,
+        "target_name": request.target_name,
+        "method": request.method or "grid",
+        "n_iter": request.n_iter or 50,
+        "seed": request.seed,
+        "strategy_setting": request.strategy_setting,
+        "backtest_setting": _parse_dates(request.backtest_setting),
+        "engine": request.engine or "native"
+    }
+
+
+def _build_walk_forward_config(request: WalkForwardRequest) -> Dict[str, Any]:
+    """滚动窗口回测请求转为滚动窗口配置"""
+    return {
+        "optimization_setting": request.optimization_setting,
+        "in_sample_days": request.in_sample_days,
+        "out_sample_days": request.out_sample_days,
+        "warmup_days": request.warmup_days,
+        "anchored": request.anchored,
+        "target_name": request.target_name,
+        "method": request.method or "grid",
+        "n_iter": request.n_iter or 50,
+        "seed": request.seed,
+        "strategy_setting": request.strategy_setting,
+        "backtest_setting": _parse_dates(request.backtest_setting)
+    }
 
 
 # API接口
@@ -83,24 +187,12 @@ async def run_backtest(request: BacktestRequest, background_tasks: BackgroundTas
     try:
         logger.info(f"收到回测请求: {request.strategy_name}")
         
-        # 构建回测设置
-        backtest_setting = {
-            "capital": request.capital,
-            "rate": request.rate,
-            "slippage": request.slippage
-        }
-        
-        # 处理日期
-        if request.start_date:
-            backtest_setting["start_date"] = datetime.strptime(request.start_date, "%Y-%m-%d")
-        if request.end_date:
-            backtest_setting["end_date"] = datetime.strptime(request.end_date, "%Y-%m-%d")
-        
         # 运行回测
         result = await backtest_manager.run_single_backtest(
             strategy_name=request.strategy_name,
             strategy_setting=request.strategy_setting,
-            backtest_setting=backtest_setting
+            backtest_setting=_build_backtest_setting(request),
+            engine=request.engine or "native"
         )
         
         if "error" in result:
@@ -153,28 +245,11 @@ async def run_batch_backtest(request: BatchBacktestRequest):
     try:
         logger.info(f"收到批量回测请求: {len(request.strategies)}个策略")
         
-        # 构建策略配置
-        strategies_config = []
-        for strategy_config in request.strategies:
-            if "strategy_name" not in strategy_config:
-                raise HTTPException(status_code=400, detail="策略配置缺少strategy_name")
-            
-            strategies_config.append({
-                "strategy_name": strategy_config["strategy_name"],
-                "strategy_setting": strategy_config.get("strategy_setting", {})
-            })
-        
-        # 处理回测设置中的日期
-        backtest_setting = request.backtest_setting.copy()
-        if "start_date" in backtest_setting and isinstance(backtest_setting["start_date"], str):
-            backtest_setting["start_date"] = datetime.strptime(backtest_setting["start_date"], "%Y-%m-%d")
-        if "end_date" in backtest_setting and isinstance(backtest_setting["end_date"], str):
-            backtest_setting["end_date"] = datetime.strptime(backtest_setting["end_date"], "%Y-%m-%d")
-        
         # 运行批量回测
         result = await backtest_manager.run_batch_backtest(
-            strategies_config=strategies_config,
-            backtest_setting=backtest_setting
+            strategies_config=_build_strategies_config(request),
+            backtest_setting=_parse_dates(request.backtest_setting),
+            engine=request.engine or "native"
         )
         
         if "error" in result:
@@ -201,10 +276,7 @@ async def optimize_parameters(request: OptimizationRequest):
         
         result = await backtest_manager.optimize_strategy_parameters(
             strategy_name=request.strategy_name,
-            optimization_config={
-                "optimization_setting": request.optimization_setting,
-                "target_name": request.target_name
-            }
+            optimization_config=_build_optimization_config(request)
         )
         
         if "error" in result:
@@ -223,6 +295,33 @@ async def optimize_parameters(request: OptimizationRequest):
         raise HTTPException(status_code=500, detail=f"参数优化失败: {str(e)}")
 
 
+@router.post("/walk-forward")
+async def run_walk_forward(request: WalkForwardRequest):
+    """滚动窗口回测（样本内寻优、样本外验证）"""
+    try:
+        logger.info(f"收到滚动窗口回测请求: {request.strategy_name}")
+
+        result = await backtest_manager.run_walk_forward(
+            strategy_name=request.strategy_name,
+            walk_forward_config=_build_walk_forward_config(request)
+        )
+
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        return {
+            "success": True,
+            "data": result,
+            "message": "滚动窗口回测完成"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"滚动窗口回测失败: {e}")
+        raise HTTPException(status_code=500, detail=f"滚动窗口回测失败: {str(e)}")
+
+
 @router.get("/results")
 async def get_backtest_results(strategy_name: Optional[str] = None):
     """获取回测结果"""
@@ -279,6 +378,38 @@ async def save_backtest_results(filename: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"保存回测结果失败: {str(e)}")
 
 
+@router.get("/cache")
+async def get_result_cache_stats():
+    """获取回测结果缓存统计"""
+    try:
+        return {
+            "success": True,
+            "data": backtest_manager.result_cache.get_stats(),
+            "message": "获取回测缓存统计成功"
+        }
+
+    except Exception as e:
+        logger.error(f"获取回测缓存统计失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取回测缓存统计失败: {str(e)}")
+
+
+@router.delete("/cache")
+async def clear_result_cache():
+    """清空回测结果缓存"""
+    try:
+        backtest_manager.result_cache.clear()
+        backtest_manager.optimizer.cache.clear()
+
+        return {
+            "success": True,
+            "message": "回测缓存已清空"
+        }
+
+    except Exception as e:
+        logger.error(f"清空回测缓存失败: {e}")
+        raise HTTPException(status_code=500, detail=f"清空回测缓存失败: {str(e)}")
+
+
 @router.get("/health")
 async def health_check():
     """健康检查"""
@@ -302,6 +433,186 @@ async def health_check():
         raise HTTPException(status_code=500, detail=f"健康检查失败: {str(e)}")
 
 
+# ==================== 后台回测任务 ====================
+
+@router.post("/jobs/run")
+async def submit_backtest_job(request: BacktestRequest):
+    """提交单策略回测任务（立即返回任务ID）"""
+    try:
+        if request.strategy_name not in backtest_manager.strategy_classes:
+            raise HTTPException(status_code=400, detail=f"策略 {request.strategy_name} 不存在")
+
+        job = job_manager.submit(JOB_RUN, {
+            "strategy_name": request.strategy_name,
+            "strategy_setting": request.strategy_setting,
+            "backtest_setting": _build_backtest_setting(request)
+        })
+        return {
+            "success": True,
+            "data": job.to_dict(),
+            "message": "回测任务已提交"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"提交回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"提交回测任务失败: {str(e)}")
+
+
+@router.post("/jobs/batch")
+async def submit_batch_job(request: BatchBacktestRequest):
+    """提交批量回测任务"""
+    try:
+        job = job_manager.submit(JOB_BATCH, {
+            "strategies_config": _build_strategies_config(request),
+            "backtest_setting": _parse_dates(request.backtest_setting)
+        })
+        return {
+            "success": True,
+            "data": job.to_dict(),
+            "message": "批量回测任务已提交"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"提交批量回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"提交批量回测任务失败: {str(e)}")
+
+
+@router.post("/jobs/optimize")
+async def submit_optimization_job(request: OptimizationRequest):
+    """提交参数优化任务"""
+    try:
+        job = job_manager.submit(JOB_OPTIMIZE, {
+            "strategy_name": request.strategy_name,
+            "optimization_config": _build_optimization_config(request)
+        })
+        return {
+            "success": True,
+            "data": job.to_dict(),
+            "message": "参数优化任务已提交"
+        }
+
+    except Exception as e:
+        logger.error(f"提交参数优化任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"提交参数优化任务失败: {str(e)}")
+
+
+@router.post("/jobs/walk_forward")
+async def submit_walk_forward_job(request: WalkForwardRequest):
+    """提交滚动窗口回测任务"""
+    try:
+        job = job_manager.submit(JOB_WALK_FORWARD, {
+            "strategy_name": request.strategy_name,
+            "walk_forward_config": _build_walk_forward_config(request)
+        })
+        return {
+            "success": True,
+            "data": job.to_dict(),
+            "message": "滚动窗口回测任务已提交"
+        }
+
+    except Exception as e:
+        logger.error(f"提交滚动窗口回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"提交滚动窗口回测任务失败: {str(e)}")
+
+
+@router.get("/jobs")
+async def list_backtest_jobs(status: Optional[str] = None, limit: int = 50):
+    """回测任务列表"""
+    jobs = job_manager.list_jobs(status, limit)
+    return {
+        "success": True,
+        "data": {"jobs": jobs, "count": len(jobs)},
+        "message": "获取回测任务成功"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_backtest_job(job_id: str):
+    """回测任务状态和进度"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 不存在")
+    return {
+        "success": True,
+        "data": job.to_dict(),
+        "message": "获取任务状态成功"
+    }
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_backtest_job_result(job_id: str):
+    """回测任务结果"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 不存在")
+    if job.status != STATUS_COMPLETED:
+        raise HTTPException(status_code=400, detail=f"任务 {job_id} 未完成: {job.status}")
+
+    result = job_manager.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 的结果文件不存在")
+    return {
+        "success": True,
+        "data": result,
+        "message": "获取任务结果成功"
+    }
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_backtest_job(job_id: str):
+    """取消回测任务"""
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=400, detail=f"任务 {job_id} 不存在或已结束")
+    return {
+        "success": True,
+        "data": {"job_id": job_id},
+        "message": "任务取消中"
+    }
+
+
+@router.delete("/jobs/{job_id}")
+async def delete_backtest_job(job_id: str):
+    """删除已结束的回测任务及结果"""
+    if not job_manager.delete(job_id):
+        raise HTTPException(status_code=400, detail=f"任务 {job_id} 不存在或未结束")
+    return {
+        "success": True,
+        "data": {"job_id": job_id},
+        "message": "任务已删除"
+    }
+
+
+@router.websocket("/jobs/ws")
+async def backtest_jobs_websocket(websocket: WebSocket, job_id: Optional[str] = None):
+    """回测任务进度推送（指定 job_id 时只推送该任务）"""
+    await websocket.accept()
+    queue = job_manager.subscribe(job_id)
+    try:
+        # 先推送当前状态
+        jobs = [job_manager.get_job(job_id).to_dict()] if job_id and job_manager.get_job(job_id) \
+            else job_manager.list_jobs(STATUS_RUNNING)
+        for job in jobs:
+            await websocket.send_text(json.dumps({"type": "job", "data": job}, ensure_ascii=False))
+
+        while True:
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout=30)
+                await websocket.send_text(json.dumps({"type": "job", "data": job}, ensure_ascii=False))
+            except asyncio.TimeoutError:
+                await websocket.send_text(json.dumps({"type": "heartbeat"}))
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.debug(f"回测任务WebSocket断开: {e}")
+    finally:
+        job_manager.unsubscribe(queue, job_id)
+
+
 # 示例配置
 @router.get("/examples")
 async def get_examples():
@@ -336,12 +647,19 @@ async def get_examples():
             }
         },
         "optimization": {
-            "strategy_name": "LargeOrderFollowing",
+            "strategy_name": "MaRsiCombo",
             "optimization_setting": {
-                "large_order_threshold": [2.0, 3.0, 4.0],
-                "jump_threshold": [0.0005, 0.0008, 0.001]
+                "ma_short": [3, 5, 8],
+                "ma_long": {"start": 20, "end": 60, "step": 10},
+                "stop_loss_pct": [0.004, 0.006, 0.008]
             },
-            "target_name": "sharpe_ratio"
+            "target_name": "sharpe_ratio",
+            "method": "halving",
+            "n_iter": 45,
+            "backtest_setting": {
+                "start_date": "2024-01-01",
+                "end_date": "2024-06-30"
+            }
         }
     }
     
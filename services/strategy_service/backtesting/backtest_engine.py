@@ -42,6 +42,7 @@ except ImportError as e:
     SQLITE_AVAILABLE = False
 
 from utils.logger import get_logger
+from utils.bar_store import get_bar_store, ns_to_datetime
 from services.strategy_service.core.cta_template import ARBIGCtaTemplate
 from config.config import get_main_contract_symbol
 
@@ -199,10 +200,10 @@ class ARBIGBacktestEngine:
                 self.engine.load_data()
                 
             elif data_source == "file":
-                # 从文件加载数据
-                logger.info("从文件加载历史数据...")
-                # TODO: 实现文件数据加载
-                pass
+                # 从本地K线存储加载数据
+                logger.info("从本地K线存储加载历史数据...")
+                self.engine.history_data = self._load_bars_from_store()
+                logger.info(f"本地K线存储加载完成: {len(self.engine.history_data)}根")
                 
             elif data_source == "database":
                 # 从数据库加载数据
@@ -217,6 +218,39 @@ class ARBIGBacktestEngine:
             logger.error(f"加载历史数据失败: {e}")
             return False
     
+    def _load_bars_from_store(self) -> List[BarData]:
+        """从 utils.bar_store 读取回测区间的1分钟K线并转换为BarData"""
+        settings = getattr(self, 'current_settings', self.default_settings)
+        symbol, exchange = settings["symbol"].split(".")
+        end_date = settings["end_date"]
+        # 结束日期按整天包含
+        if end_date.hour == 0 and end_date.minute == 0:
+            end_date = end_date + timedelta(days=1)
+
+        data = get_bar_store().read(symbol, "1m", settings["start_date"], end_date)
+
+        exchange = Exchange(exchange)
+        bars = []
+        for ts, o, h, l, c, v, t, oi in zip(
+            data["datetime"], data["open"], data["high"], data["low"], data["close"],
+            data["volume"], data["turnover"], data["open_interest"]
+        ):
+            bars.append(BarData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=ns_to_datetime(ts),
+                interval=Interval.MINUTE,
+                open_price=float(o),
+                high_price=float(h),
+                low_price=float(l),
+                close_price=float(c),
+                volume=float(v),
+                turnover=float(t),
+                open_interest=float(oi),
+                gateway_name="BACKTESTING"
+            ))
+        return bars
+
     def run_backtesting(self) -> Dict[str, Any]:
         """
         运行回测
@@ -286,7 +320,8 @@ class ARBIGBacktestEngine:
             logger.error(f"参数优化失败: {e}")
             return {"error": str(e)}
     
-    def generate_report(self, result: Dict[str, Any]) -> str:
+    @staticmethod
+    def generate_report(result: Dict[str, Any]) -> str:
         """
         生成回测报告
         
@@ -331,7 +366,7 @@ class ARBIGBacktestEngine:
 - 波动率: {stats.get('volatility', 0):.2%}
 - 卡尔马比率: {stats.get('calmar_ratio', 0):.2f}
 - 索提诺比率: {stats.get('sortino_ratio', 0):.2f}
-
+{ARBIGBacktestEngine._robustness_section(result.get('robustness'))}
 ---
 报告生成时间: {result.get('timestamp', 'N/A')}
             """
@@ -342,6 +377,42 @@ class ARBIGBacktestEngine:
             logger.error(f"生成报告失败: {e}")
             return f"报告生成失败: {e}"
     
+    @staticmethod
+    def _robustness_section(robustness: Optional[Dict[str, Any]]) -> str:
+        """稳健性分析（蒙特卡洛重采样）报告段落"""
+        if not robustness:
+            return ""
+
+        level = f"{robustness.get('confidence', 0.95):.0%}"
+        lines = ["", "## 稳健性分析"]
+        daily = robustness.get("daily_bootstrap")
+        if daily:
+            total_return, drawdown, sharpe = daily["total_return"], daily["max_drawdown"], daily["sharpe_ratio"]
+            lines += [
+                f"- 日收益自助法（{daily['paths']}条路径，{daily['days']}个交易日）:",
+                f"  - 总收益率中位数: {total_return['median']:.2%}，{level}置信区间 [{total_return['ci_low']:.2%}, {total_return['ci_high']:.2%}]",
+                f"  - 最大回撤中位数: {drawdown['median']:.2%}，5%分位: {drawdown['p5']:.2%}",
+                f"  - 夏普比率{level}置信区间: [{sharpe['ci_low']:.2f}, {sharpe['ci_high']:.2f}]",
+                f"  - 亏损概率: {daily['prob_loss']:.2%}",
+            ]
+        permutation = robustness.get("trade_permutation")
+        if permutation:
+            drawdown = permutation["max_drawdown"]
+            lines += [
+                f"- 成交顺序置换（{permutation['paths']}条路径，{permutation['trades']}笔平仓）:",
+                f"  - 最大回撤中位数: {drawdown['median']:.2%}，5%分位: {drawdown['p5']:.2%}",
+            ]
+        resampled = robustness.get("trade_bootstrap")
+        if resampled:
+            total_pnl = resampled["total_pnl"]
+            lines += [
+                f"- 成交自助法（{resampled['paths']}条路径）:",
+                f"  - 总盈亏{level}置信区间: [{total_pnl['ci_low']:,.0f}, {total_pnl['ci_high']:,.0f}]元",
+                f"  - 亏损概率: {resampled['prob_loss']:.2%}",
+            ]
+        lines.append("")
+        return "\n".join(lines)
+
     def save_results(self, filename: str = None):
         """保存回测结果到文件"""
         try:
@@ -6,9 +6,11 @@
 import sys
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Type
+from typing import Dict, Any, List, Optional, Type, Tuple, AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor
 import asyncio
 import json
+import multiprocessing
 
 # 添加项目根目录到路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
@@ -19,9 +21,15 @@ except ImportError:
     Interval = None
 
 from .backtest_engine import ARBIGBacktestEngine
-from .strategy_adapter import get_adapted_strategies, create_vnpy_compatible_strategy
+from .native_engine import run_backtest_job
+from .optimizer import ParameterOptimizer
+from .walk_forward import WalkForwardAnalyzer
+from .result_cache import get_result_cache
+from .shared_data import get_shared_data_server
+from .strategy_adapter import get_adapted_strategies, get_strategy_classes, create_vnpy_compatible_strategy
 from services.strategy_service.core.cta_template import ARBIGCtaTemplate
 from utils.logger import get_logger
+from config.config import get_main_contract_symbol
 
 logger = get_logger(__name__)
 
@@ -39,12 +47,30 @@ class BacktestManager:
     
     def __init__(self):
         """初始化回测管理器"""
-        self.engine = ARBIGBacktestEngine()
+        try:
+            self.engine = ARBIGBacktestEngine()
+        except ImportError as e:
+            # 未安装vnpy_ctastrategy时只提供原生回测
+            logger.warning(f"vnpy回测引擎不可用，仅支持原生回测: {e}")
+            self.engine = None
         self.adapted_strategies = {}
+        self.strategy_classes = get_strategy_classes()
         self.backtest_results = {}
+
+        # 批量回测进程池（按需创建，每个工作进程一个回测）
+        self.max_workers = os.cpu_count() or 1
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # 内容寻址结果缓存（相同策略代码、参数、设置和数据直接返回已有结果）
+        self.result_cache = get_result_cache()
+        # 共享内存K线（批量回测/参数优化的工作进程映射同一份数据）
+        self.shared_data = get_shared_data_server()
+        self.optimizer = ParameterOptimizer(self._get_process_pool, result_cache=self.result_cache,
+                                            shared_data=self.shared_data)
+        self.walk_forward = WalkForwardAnalyzer(self.optimizer, self._get_process_pool)
         
         # 加载适配策略
-        self._load_adapted_strategies()
+        if self.engine is not None:
+            self._load_adapted_strategies()
         
         logger.info("回测管理器初始化完成")
     
@@ -59,7 +85,8 @@ class BacktestManager:
     async def run_single_backtest(self, 
                                  strategy_name: str,
                                  strategy_setting: Dict[str, Any],
-                                 backtest_setting: Dict[str, Any] = None) -> Dict[str, Any]:
+                                 backtest_setting: Dict[str, Any] = None,
+                                 engine: str = "native") -> Dict[str, Any]:
         """
         运行单个策略回测
         
@@ -67,20 +94,30 @@ class BacktestManager:
             strategy_name: 策略名称
             strategy_setting: 策略参数
             backtest_setting: 回测设置
+            engine: 回测引擎 native（原生回放，默认）/ vnpy（适配到vnpy回测引擎）
             
         Returns:
             回测结果
         """
+        if engine == "native":
+            return await self.run_native_backtest(strategy_name, strategy_setting, backtest_setting)
+
         try:
             logger.info(f"开始回测策略: {strategy_name}")
             
+            if self.engine is None:
+                raise ValueError("vnpy回测引擎不可用，请使用原生回测")
+
             # 检查策略是否存在
             if strategy_name not in self.adapted_strategies:
                 raise ValueError(f"策略 {strategy_name} 不存在")
             
             # 设置回测参数
             if backtest_setting:
-                self.engine.setup_backtest(**backtest_setting)
+                # 稳健性分析只在原生引擎中计算
+                self.engine.setup_backtest(**{
+                    key: value for key, value in backtest_setting.items() if key != "robustness_paths"
+                })
             else:
                 # 使用默认设置
                 self.engine.setup_backtest()
@@ -106,15 +143,200 @@ class BacktestManager:
             logger.error(f"策略 {strategy_name} 回测失败: {e}")
             return {"error": str(e), "strategy": strategy_name}
     
+    async def run_native_backtest(self,
+                                  strategy_name: str,
+                                  strategy_setting: Dict[str, Any],
+                                  backtest_setting: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        使用原生回测引擎运行单个策略回测（在线程池中执行，不阻塞事件循环）
+
+        Args:
+            strategy_name: 策略名称
+            strategy_setting: 策略参数
+            backtest_setting: 回测设置（start_date/end_date/symbol/interval/capital/rate/slippage）
+
+        Returns:
+            回测结果
+        """
+        try:
+            logger.info(f"开始原生回测策略: {strategy_name}")
+
+            if strategy_name not in self.strategy_classes:
+                raise ValueError(f"策略 {strategy_name} 不存在")
+
+            run_setting = self._native_run_setting(backtest_setting)
+            cache_key = self._cache_key(strategy_name, strategy_setting, run_setting)
+            result = self.result_cache.get(cache_key) if cache_key else None
+            if result is not None:
+                logger.info(f"策略 {strategy_name} 命中回测缓存")
+                self._store_result(strategy_name, result)
+                return result
+
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, run_backtest_job, strategy_name, strategy_setting, run_setting
+            )
+
+            if "error" in result:
+                return result
+
+            self._store_result(strategy_name, result, cache_key)
+            logger.info(f"策略 {strategy_name} 原生回测完成")
+            return result
+
+        except Exception as e:
+            logger.error(f"策略 {strategy_name} 原生回测失败: {e}")
+            return {"error": str(e), "strategy": strategy_name}
+
+    @staticmethod
+    def _native_run_setting(backtest_setting: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """回测设置转换为 run_backtest_job 的参数（合约去掉交易所后缀，结束日期按整天包含）"""
+        setting = backtest_setting or {}
+        end_date = setting.get("end_date")
+        if end_date is not None and end_date.hour == 0 and end_date.minute == 0:
+            end_date = end_date + timedelta(days=1)
+
+        return {
+            "symbol": (setting.get("symbol") or get_main_contract_symbol()).split(".")[0],
+            "start": setting.get("start_date"),
+            "end": end_date,
+            "interval": setting.get("interval", "1m"),
+            "capital": setting.get("capital", 1000000),
+            "slippage": setting.get("slippage", 0.0),
+            "rate": setting.get("rate"),
+            "robustness_paths": setting.get("robustness_paths", 10000),
+        }
+
+    def _store_result(self, strategy_name: str, result: Dict[str, Any], cache_key: Optional[str] = None):
+        result_key = f"{strategy_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.backtest_results[result_key] = result
+        if cache_key:
+            self.result_cache.put(cache_key, result)
+
+    def _cache_key(self, strategy_name: str, strategy_setting: Dict[str, Any],
+                   run_setting: Dict[str, Any]) -> Optional[str]:
+        """原生回测结果的缓存键（计算失败时不使用缓存）"""
+        strategy_class = self.strategy_classes.get(strategy_name)
+        if strategy_class is None:
+            return None
+        try:
+            return self.result_cache.make_key(strategy_class, strategy_setting or {}, run_setting)
+        except Exception as e:
+            logger.warning(f"计算回测缓存键失败 {strategy_name}: {e}")
+            return None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """
+        批量回测进程池（首次使用时创建）
+
+        使用 spawn 启动工作进程，避免 fork 复制API服务的事件循环、日志线程和锁状态
+        """
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"批量回测进程池已创建: {self.max_workers} 个工作进程")
+        return self._process_pool
+
+    def shutdown(self):
+        """关闭批量回测进程池"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def iter_batch_backtest(self,
+                                  strategies_config: List[Dict[str, Any]],
+                                  backtest_setting: Dict[str, Any] = None,
+                                  progress_factory: Optional[Callable[[int], Callable[[int, int], bool]]] = None
+                                  ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        在进程池中并行回测多个策略，按完成顺序逐个产出 (策略名, 结果)
+
+        每个工作进程使用独立的回测引擎，多个策略同时回测时K线由主进程写入共享内存、
+        工作进程只读映射，进程间只传递策略名、参数、共享句柄和结果字典。
+
+        Args:
+            strategies_config: 策略配置列表
+            backtest_setting: 回测设置
+            progress_factory: 按策略序号生成进度回调（需可序列化，见 job_manager.JobProgress）
+        """
+        run_setting = self._native_run_setting(backtest_setting)
+        loop = asyncio.get_running_loop()
+        pool = self._get_process_pool()
+
+        cached = []
+        to_run = []
+        for index, config in enumerate(strategies_config):
+            strategy_name = config.get("strategy_name")
+            if not strategy_name:
+                logger.warning("策略配置缺少strategy_name，跳过")
+                continue
+
+            strategy_setting = config.get("strategy_setting", {})
+            cache_key = self._cache_key(strategy_name, strategy_setting, run_setting)
+            result = self.result_cache.get(cache_key) if cache_key else None
+            if result is not None:
+                cached.append((strategy_name, result))
+                continue
+            to_run.append((index, strategy_name, strategy_setting, cache_key))
+
+        # 多个策略共用同一段K线时写入共享内存
+        shared = await self.shared_data.acquire_async(run_setting) if len(to_run) > 1 else None
+        job_setting = {**run_setting, "shared_data": shared} if shared is not None else run_setting
+
+        futures = []
+        pending = []
+        for index, strategy_name, strategy_setting, cache_key in to_run:
+            future = loop.run_in_executor(
+                pool, run_backtest_job, strategy_name, strategy_setting, job_setting,
+                progress_factory(index) if progress_factory else None
+            )
+            futures.append(future)
+            pending.append(self._tag_future(strategy_name, future, cache_key))
+
+        if cached:
+            logger.info(f"批量回测命中缓存 {len(cached)} 个策略")
+
+        try:
+            # 命中缓存的结果先产出
+            for strategy_name, result in cached:
+                self._store_result(strategy_name, result)
+                yield strategy_name, result
+
+            for next_done in asyncio.as_completed(pending):
+                strategy_name, result, cache_key = await next_done
+                if "error" not in result:
+                    self._store_result(strategy_name, result, cache_key)
+                yield strategy_name, result
+        finally:
+            # 提前退出（取消/异常）时撤销尚未开始的回测
+            for future in futures:
+                future.cancel()
+            self.shared_data.release(shared)
+
+    @staticmethod
+    async def _tag_future(strategy_name: str, future,
+                          cache_key: Optional[str] = None) -> Tuple[str, Dict[str, Any], Optional[str]]:
+        try:
+            return strategy_name, await future, cache_key
+        except Exception as e:
+            logger.error(f"策略 {strategy_name} 回测进程异常: {e}")
+            return strategy_name, {"error": str(e), "strategy": strategy_name}, cache_key
+
     async def run_batch_backtest(self, 
                                 strategies_config: List[Dict[str, Any]],
-                                backtest_setting: Dict[str, Any] = None) -> Dict[str, Any]:
+                                backtest_setting: Dict[str, Any] = None,
+                                engine: str = "native",
+                                progress_factory: Optional[Callable[[int], Callable[[int, int], bool]]] = None
+                                ) -> Dict[str, Any]:
         """
         批量回测多个策略
         
         Args:
             strategies_config: 策略配置列表
             backtest_setting: 回测设置
+            engine: native（进程池并行，默认）/ vnpy（共用vnpy回测引擎，逐个执行）
+            progress_factory: 按策略序号生成进度回调（仅 native）
             
         Returns:
             批量回测结果
@@ -123,24 +345,22 @@ class BacktestManager:
             logger.info(f"开始批量回测 {len(strategies_config)} 个策略")
             
             batch_results = {}
-            
-            for config in strategies_config:
-                strategy_name = config.get("strategy_name")
-                strategy_setting = config.get("strategy_setting", {})
-                
-                if not strategy_name:
-                    logger.warning("策略配置缺少strategy_name，跳过")
-                    continue
-                
-                # 运行单个回测
-                result = await self.run_single_backtest(
-                    strategy_name, strategy_setting, backtest_setting
-                )
-                
-                batch_results[strategy_name] = result
-                
-                # 添加延迟避免资源占用过高
-                await asyncio.sleep(0.1)
+
+            if engine == "native":
+                async for strategy_name, result in self.iter_batch_backtest(strategies_config, backtest_setting,
+                                                                            progress_factory):
+                    batch_results[strategy_name] = result
+                    logger.info(f"批量回测进度: {len(batch_results)}/{len(strategies_config)} {strategy_name}")
+            else:
+                for config in strategies_config:
+                    strategy_name = config.get("strategy_name")
+                    if not strategy_name:
+                        logger.warning("策略配置缺少strategy_name，跳过")
+                        continue
+
+                    batch_results[strategy_name] = await self.run_single_backtest(
+                        strategy_name, config.get("strategy_setting", {}), backtest_setting, engine
+                    )
             
             # 生成对比分析
             comparison = self._generate_comparison_report(batch_results)
@@ -222,8 +442,11 @@ class BacktestManager:
                 sharpe_ratio = basic_result.get("sharpe_ratio", 0)
                 score += sharpe_ratio * 0.3
                 
-                # 最大回撤权重 20% (负向指标)
+                # 最大回撤权重 20% (负向指标，有稳健性分析时取重采样回撤的5%分位，即较差情形)
                 max_drawdown = basic_result.get("max_drawdown", 0)
+                daily_bootstrap = result.get("robustness", {}).get("daily_bootstrap")
+                if daily_bootstrap:
+                    max_drawdown = min(max_drawdown, daily_bootstrap["max_drawdown"]["p5"])
                 score -= abs(max_drawdown) * 0.2
                 
                 # 胜率权重 10%
@@ -247,20 +470,56 @@ class BacktestManager:
     
     async def optimize_strategy_parameters(self, 
                                          strategy_name: str,
-                                         optimization_config: Dict[str, Any]) -> Dict[str, Any]:
+                                         optimization_config: Dict[str, Any],
+                                         progress_callback: Optional[Callable[[int, int], Any]] = None,
+                                         cancel_check: Optional[Callable[[int, int], bool]] = None
+                                         ) -> Dict[str, Any]:
         """
         优化策略参数
         
         Args:
             strategy_name: 策略名称
             optimization_config: 优化配置
+                optimization_setting: 参数空间（见 optimizer.expand_space）
+                target_name: 优化目标
+                method: grid / random / halving（原生引擎）
+                n_iter / eta / seed: random/halving 设置
+                strategy_setting: 固定不变的策略参数
+                backtest_setting: 回测设置
+                engine: native（进程池并行，默认）/ vnpy
+            progress_callback: 每完成一组评估回调 (已评估组数, 计划评估组数)（仅 native）
+            cancel_check: 传给每组评估的取消检查，返回 False 时中止运行中的评估（仅 native）
             
         Returns:
             优化结果
         """
         try:
             logger.info(f"开始优化策略参数: {strategy_name}")
-            
+
+            if optimization_config.get("engine", "native") == "native":
+                if strategy_name not in self.strategy_classes:
+                    raise ValueError(f"策略 {strategy_name} 不存在")
+
+                result = await self.optimizer.optimize(
+                    strategy_name,
+                    optimization_config.get("optimization_setting", {}),
+                    self._native_run_setting(optimization_config.get("backtest_setting")),
+                    method=optimization_config.get("method", "grid"),
+                    target_name=optimization_config.get("target_name", "sharpe_ratio"),
+                    n_iter=optimization_config.get("n_iter", 50),
+                    eta=optimization_config.get("eta", 3),
+                    fixed_setting=optimization_config.get("strategy_setting"),
+                    seed=optimization_config.get("seed"),
+                    progress_callback=progress_callback,
+                    cancel_check=cancel_check
+                )
+                if "error" not in result:
+                    logger.info(f"策略 {strategy_name} 参数优化完成, 最优参数: {result['best_setting']}")
+                return result
+
+            if self.engine is None:
+                raise ValueError("vnpy回测引擎不可用")
+
             if strategy_name not in self.adapted_strategies:
                 raise ValueError(f"策略 {strategy_name} 不存在")
             
@@ -279,6 +538,58 @@ class BacktestManager:
         except Exception as e:
             logger.error(f"策略 {strategy_name} 参数优化失败: {e}")
             return {"error": str(e)}
+
+    async def run_walk_forward(self,
+                               strategy_name: str,
+                               walk_forward_config: Dict[str, Any],
+                               progress_callback: Optional[Callable[[int, int], Any]] = None,
+                               cancel_check: Optional[Callable[[int, int], bool]] = None
+                               ) -> Dict[str, Any]:
+        """
+        滚动窗口回测（原生引擎）：逐窗口样本内寻优、样本外验证，拼接样本外权益曲线
+
+        Args:
+            strategy_name: 策略名称
+            walk_forward_config: 滚动窗口配置
+                optimization_setting: 样本内寻优的参数空间
+                in_sample_days / out_sample_days / warmup_days: 样本内/样本外/预热天数
+                anchored: 样本内起点是否固定
+                target_name / method / n_iter / eta / seed: 样本内寻优设置
+                strategy_setting: 固定不变的策略参数
+                backtest_setting: 回测设置
+            progress_callback: 进度回调 (已完成评估数, 计划评估数)
+            cancel_check: 传给每组评估和样本外回测的取消检查
+
+        Returns:
+            滚动窗口回测结果
+        """
+        try:
+            logger.info(f"开始滚动窗口回测: {strategy_name}")
+
+            if strategy_name not in self.strategy_classes:
+                raise ValueError(f"策略 {strategy_name} 不存在")
+
+            return await self.walk_forward.run(
+                strategy_name,
+                walk_forward_config.get("optimization_setting", {}),
+                self._native_run_setting(walk_forward_config.get("backtest_setting")),
+                in_sample_days=walk_forward_config.get("in_sample_days", 120),
+                out_sample_days=walk_forward_config.get("out_sample_days", 30),
+                warmup_days=walk_forward_config.get("warmup_days", 5),
+                anchored=walk_forward_config.get("anchored", False),
+                method=walk_forward_config.get("method", "grid"),
+                target_name=walk_forward_config.get("target_name", "sharpe_ratio"),
+                n_iter=walk_forward_config.get("n_iter", 50),
+                eta=walk_forward_config.get("eta", 3),
+                fixed_setting=walk_forward_config.get("strategy_setting"),
+                seed=walk_forward_config.get("seed"),
+                progress_callback=progress_callback,
+                cancel_check=cancel_check
+            )
+
+        except Exception as e:
+            logger.error(f"策略 {strategy_name} 滚动窗口回测失败: {e}")
+            return {"error": str(e)}
     
     def get_backtest_results(self, strategy_name: str = None) -> Dict[str, Any]:
         """获取回测结果"""
@@ -297,7 +608,7 @@ class BacktestManager:
             return f"回测结果 {result_key} 不存在"
         
         result = self.backtest_results[result_key]
-        return self.engine.generate_report(result)
+        return ARBIGBacktestEngine.generate_report(result)
     
     def save_results(self, filename: str = None):
         """保存所有回测结果"""
@@ -315,7 +626,7 @@ class BacktestManager:
     
     def get_available_strategies(self) -> List[str]:
         """获取可用的策略列表"""
-        return list(self.adapted_strategies.keys())
+        return list(dict.fromkeys([*self.strategy_classes, *self.adapted_strategies]))
 
 
 # 便捷函数
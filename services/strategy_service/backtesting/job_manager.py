@@ -0,0 +1,453 @@
+"""
+回测任务管理
+回测/批量回测/参数优化/滚动窗口回测以后台任务运行，提交后立即返回任务ID：
+- 任务在 BacktestManager 的进程池中执行，同时运行的任务数有上限，其余排队
+- 进度（已回放K线数/已评估参数组数、预计剩余时间）可轮询查询，也可通过 WebSocket 订阅推送
+- 运行中的任务可取消：工作进程（含参数优化/滚动窗口的每组评估）在每个回放块后检查取消标记
+- 任务信息和结果保存到 data/backtest_jobs，服务重启后仍可查询
+
+工作进程通过 JobProgress 把进度写入 multiprocessing.Manager 共享字典，
+事件循环中的轮询任务定期汇总并推送，回放循环本身不做跨进程通信以外的额外工作。
+"""
+
+import asyncio
+import json
+import multiprocessing
+import sys
+import os
+import time
+import uuid
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_JOB_DIR = Path(__file__).parent.parent.parent.parent / "data" / "backtest_jobs"
+
+# 任务类型
+JOB_RUN = "run"
+JOB_BATCH = "batch"
+JOB_OPTIMIZE = "optimize"
+JOB_WALK_FORWARD = "walk_forward"
+JOB_TYPES = (JOB_RUN, JOB_BATCH, JOB_OPTIMIZE, JOB_WALK_FORWARD)
+
+# 任务状态
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
+
+# 任务结束后取消标记的保留时间（秒）：已进入进程池调用队列、无法撤销的回测开始时仍能看到取消标记
+CANCEL_MARKER_TTL = 300.0
+
+
+@dataclass
+class BacktestJob:
+    """回测任务"""
+    job_id: str
+    job_type: str
+    params: Dict[str, Any]
+    status: str = STATUS_PENDING
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    progress: float = 0.0       # 0~1
+    done: int = 0               # 已回放K线数（run/batch）或已评估参数组数（optimize/walk_forward）
+    total: int = 0
+    eta: Optional[float] = None  # 预计剩余秒数
+    message: str = ""
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobProgress:
+    """
+    可序列化的进度回调，随回测任务传入工作进程
+
+    每次回调把 (已回放, 总数) 写入共享字典，并返回任务是否仍未取消
+    """
+
+    def __init__(self, shared, job_id: str, index: int = 0):
+        self.shared = shared
+        self.job_id = job_id
+        self.index = index
+
+    def __call__(self, done: int, total: int) -> bool:
+        try:
+            self.shared[(self.job_id, self.index)] = (done, total)
+            return not self.shared.get((self.job_id, "cancel"), False)
+        except Exception:
+            # 共享字典不可用（服务关闭中）时不中断回测
+            return True
+
+
+class JobCancelCheck:
+    """
+    可序列化的取消检查，作为参数优化/滚动窗口每组评估的进度回调传入工作进程
+
+    进度按已评估组数在主进程汇总，这里只读取取消标记
+    """
+
+    def __init__(self, shared, job_id: str):
+        self.shared = shared
+        self.job_id = job_id
+
+    def __call__(self, done: int, total: int) -> bool:
+        try:
+            return not self.shared.get((self.job_id, "cancel"), False)
+        except Exception:
+            return True
+
+
+class BacktestJobManager:
+    """回测任务管理器"""
+
+    def __init__(self, backtest_manager, base_dir: Optional[Path] = None,
+                 max_running: Optional[int] = None, poll_interval: float = 0.5):
+        """
+        Args:
+            backtest_manager: BacktestManager 实例（提供进程池和回测/优化实现）
+            base_dir: 任务信息和结果目录，默认 data/backtest_jobs
+            max_running: 同时运行的任务数，默认与进程池工作进程数相同
+            poll_interval: 进度汇总间隔（秒）
+        """
+        self.backtest_manager = backtest_manager
+        self.base_dir = Path(base_dir or _JOB_DIR)
+        self.max_running = max_running or backtest_manager.max_workers
+        self.poll_interval = poll_interval
+
+        self.jobs: Dict[str, BacktestJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[Optional[str], Set[asyncio.Queue]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._shared_lock: Optional[asyncio.Lock] = None
+        self._mp_manager = None
+        self._shared = None
+
+        self._load_jobs()
+
+    # ==================== 提交与查询 ====================
+
+    def submit(self, job_type: str, params: Dict[str, Any]) -> BacktestJob:
+        """
+        提交任务（需在事件循环中调用）
+
+        Args:
+            job_type: run / batch / optimize / walk_forward
+            params: run: strategy_name/strategy_setting/backtest_setting
+                    batch: strategies_config/backtest_setting
+                    optimize: strategy_name/optimization_config
+                    walk_forward: strategy_name/walk_forward_config
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"不支持的任务类型: {job_type}")
+
+        job = BacktestJob(
+            job_id=uuid.uuid4().hex[:12],
+            job_type=job_type,
+            params=json.loads(json.dumps(params, default=str, ensure_ascii=False)),
+            message="排队中",
+        )
+        self.jobs[job.job_id] = job
+        self._save_job(job)
+
+        self._tasks[job.job_id] = asyncio.get_running_loop().create_task(self._run_job(job, params))
+        logger.info(f"📥 回测任务已提交: {job.job_id} ({job_type})")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BacktestJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """任务列表（按提交时间倒序）"""
+        jobs = [job for job in self.jobs.values() if status is None or job.status == status]
+        jobs.sort(key=lambda job: job.created_at, reverse=True)
+        return [job.to_dict() for job in jobs[:limit]]
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """读取已完成任务的结果"""
+        path = self._result_path(job_id)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def cancel(self, job_id: str) -> bool:
+        """取消排队中或运行中的任务"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+
+        if self._shared is not None:
+            self._shared[(job_id, "cancel")] = True
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        logger.info(f"⏹️ 回测任务取消: {job_id}")
+        return True
+
+    def delete(self, job_id: str) -> bool:
+        """删除已结束的任务及其结果"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in FINISHED_STATUSES:
+            return False
+
+        self.jobs.pop(job_id, None)
+        for path in (self._job_path(job_id), self._result_path(job_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return True
+
+    # ==================== 订阅 ====================
+
+    def subscribe(self, job_id: Optional[str] = None) -> asyncio.Queue:
+        """订阅任务进度（job_id 为空时订阅所有任务）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, job_id: Optional[str] = None):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _notify(self, job: BacktestJob):
+        message = job.to_dict()
+        for key in (job.job_id, None):
+            for queue in self._subscribers.get(key, ()):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    pass  # 慢消费者丢弃中间进度
+
+    # ==================== 执行 ====================
+
+    async def start(self):
+        """启动进度共享进程（服务启动时调用，未调用时在首个任务运行前启动）"""
+        await self._get_shared()
+
+    async def _get_shared(self):
+        """进度共享字典：Manager 进程在线程池中启动，不阻塞事件循环"""
+        if self._shared is not None:
+            return self._shared
+        if self._shared_lock is None:
+            self._shared_lock = asyncio.Lock()
+
+        async with self._shared_lock:
+            if self._shared is None:
+                self._mp_manager, self._shared = await asyncio.get_running_loop().run_in_executor(
+                    None, self._start_manager
+                )
+        return self._shared
+
+    @staticmethod
+    def _start_manager():
+        manager = multiprocessing.get_context("spawn").Manager()
+        return manager, manager.dict()
+
+    async def _run_job(self, job: BacktestJob, params: Dict[str, Any]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_running)
+
+        poller = None
+        started = 0.0
+        try:
+            async with self._semaphore:
+                job.status = STATUS_RUNNING
+                job.started_at = datetime.now().isoformat()
+                job.message = "运行中"
+                self._save_job(job)
+                self._notify(job)
+                started = time.monotonic()
+
+                shared = await self._get_shared()
+                if job.job_type in (JOB_OPTIMIZE, JOB_WALK_FORWARD):
+                    result = await self._run_optimize(job, params, started, JobCancelCheck(shared, job.job_id))
+                else:
+                    configs = params["strategies_config"] if job.job_type == JOB_BATCH else [{
+                        "strategy_name": params["strategy_name"],
+                        "strategy_setting": params.get("strategy_setting", {}),
+                    }]
+                    poller = asyncio.get_running_loop().create_task(
+                        self._poll_progress(job, shared, len(configs), started)
+                    )
+                    result = await self.backtest_manager.run_batch_backtest(
+                        configs, params.get("backtest_setting"),
+                        progress_factory=lambda index: JobProgress(shared, job.job_id, index)
+                    )
+                    if job.job_type == JOB_RUN and "individual_results" in result:
+                        result = next(iter(result["individual_results"].values()), {"error": "无回测结果"})
+
+            if "error" in result:
+                job.status = STATUS_CANCELLED if result.get("cancelled") else STATUS_FAILED
+                job.error = result["error"]
+                job.message = "回测已取消" if result.get("cancelled") else "回测失败"
+            else:
+                self._save_result(job.job_id, result)
+                job.status = STATUS_COMPLETED
+                job.done = max(job.done, job.total)
+                job.progress = 1.0
+                job.eta = 0.0
+                job.message = "完成"
+
+        except asyncio.CancelledError:
+            job.status = STATUS_CANCELLED
+            job.message = "回测已取消"
+        except Exception as e:
+            logger.error(f"❌ 回测任务失败 {job.job_id}: {e}")
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            job.message = "回测失败"
+        finally:
+            if poller is not None:
+                poller.cancel()
+            self._clear_shared(job.job_id)
+            self._tasks.pop(job.job_id, None)
+            job.finished_at = datetime.now().isoformat()
+            self._save_job(job)
+            self._notify(job)
+            logger.info(f"📤 回测任务结束: {job.job_id} {job.status} "
+                        f"({time.monotonic() - started if started else 0:.1f}s)")
+
+    async def _run_optimize(self, job: BacktestJob, params: Dict[str, Any], started: float,
+                            cancel_check: JobCancelCheck) -> Dict[str, Any]:
+        """参数优化/滚动窗口任务：按已评估组数报告进度，运行中的评估通过 cancel_check 响应取消"""
+        def on_progress(done: int, total: int):
+            self._update_progress(job, done, total, started)
+
+        if job.job_type == JOB_WALK_FORWARD:
+            return await self.backtest_manager.run_walk_forward(
+                params["strategy_name"], params["walk_forward_config"], progress_callback=on_progress,
+                cancel_check=cancel_check
+            )
+        return await self.backtest_manager.optimize_strategy_parameters(
+            params["strategy_name"], params["optimization_config"], progress_callback=on_progress,
+            cancel_check=cancel_check
+        )
+
+    async def _poll_progress(self, job: BacktestJob, shared, count: int, started: float):
+        """定期汇总工作进程写入的回放进度"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                parts = [shared.get((job.job_id, index)) for index in range(count)]
+            except Exception:
+                continue
+
+            done = sum(part[0] for part in parts if part)
+            total = sum(part[1] for part in parts if part)
+            # 未开始的策略按0进度计入，避免进度在各策略依次启动时回退
+            fraction = sum(part[0] / part[1] for part in parts if part and part[1]) / count
+            self._update_progress(job, done, total, started, fraction)
+
+    def _update_progress(self, job: BacktestJob, done: int, total: int, started: float,
+                         fraction: Optional[float] = None):
+        if fraction is None:
+            fraction = done / total if total else 0.0
+        if done == job.done and total == job.total:
+            return
+
+        job.done = done
+        job.total = total
+        job.progress = round(fraction, 4)
+        elapsed = time.monotonic() - started
+        job.eta = round(elapsed * (1 - fraction) / fraction, 1) if fraction > 0 else None
+        self._notify(job)
+
+    def _clear_shared(self, job_id: str):
+        """清理任务进度；取消标记保留 CANCEL_MARKER_TTL 秒后清除（已进入调用队列的回测开始时仍能看到）"""
+        if self._shared is None:
+            return
+        try:
+            cancelled = False
+            for key in [key for key in self._shared.keys() if key[0] == job_id]:
+                if key[1] == "cancel":
+                    cancelled = True
+                else:
+                    self._shared.pop(key, None)
+        except Exception:
+            return
+
+        if cancelled:
+            asyncio.get_running_loop().call_later(CANCEL_MARKER_TTL, self._clear_cancel_marker, job_id)
+
+    def _clear_cancel_marker(self, job_id: str):
+        if self._shared is None:
+            return
+        try:
+            self._shared.pop((job_id, "cancel"), None)
+        except Exception:
+            pass
+
+    def shutdown(self):
+        """取消所有任务并关闭进度共享进程"""
+        for job_id in list(self._tasks):
+            self.cancel(job_id)
+        if self._mp_manager is not None:
+            try:
+                self._mp_manager.shutdown()
+            except Exception:
+                pass
+            self._mp_manager = None
+            self._shared = None
+
+    # ==================== 持久化 ====================
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.base_dir / f"{job_id}.json"
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.base_dir / f"{job_id}_result.json"
+
+    def _save_job(self, job: BacktestJob):
+        try:
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._job_path(job.job_id), 'w', encoding='utf-8') as f:
+                json.dump(job.to_dict(), f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.error(f"保存回测任务失败 {job.job_id}: {e}")
+
+    def _save_result(self, job_id: str, result: Dict[str, Any]):
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._result_path(job_id), 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, default=str)
+
+    def _load_jobs(self):
+        """加载已保存的任务，上次退出时未结束的任务标记为失败"""
+        if not self.base_dir.exists():
+            return
+
+        for path in self.base_dir.glob('*.json'):
+            if path.stem.endswith('_result'):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = BacktestJob(**json.load(f))
+            except Exception as e:
+                logger.warning(f"跳过无法读取的回测任务 {path.name}: {e}")
+                continue
+
+            if job.status not in FINISHED_STATUSES:
+                job.status = STATUS_FAILED
+                job.error = "服务重启，任务中断"
+                job.message = "回测失败"
+                self._save_job(job)
+            self.jobs[job.job_id] = job
+
+        if self.jobs:
+            logger.info(f"加载了 {len(self.jobs)} 个历史回测任务")
@@ -0,0 +1,568 @@
+"""
+ARBIG原生回测引擎
+直接回放本地K线存储的列数据，驱动 ARBIGCtaTemplate 策略的真实 on_bar/on_trade 回调：
+- 下单走 SimulatedSignalSender，与实盘相同的 _send_order/_check_remote_positions 流程，成交同步回调 on_trade
+- 回放循环复用同一个 BarData 对象，按块取出列数据，逐K线只写一次预分配的持仓数组
+- run_ticks 逐笔回放 TickRecorder 录制的tick（memmap），与实盘一样先 on_tick 再由 BarGenerator 合成K线，
+  可复现 on_tick_impl 中止损/风控的触发时机
+- 权益曲线、回撤、夏普等统计在回放结束后用数组运算一次算出，并默认附带蒙特卡洛稳健性分析（见 robustness）
+结果格式与 ARBIGBacktestEngine.run_backtesting 一致（basic_result/statistics/settings）。
+"""
+
+import logging
+import sys
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Type, Callable
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from vnpy.trader.constant import Direction, Offset, Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+
+from utils.logger import get_logger
+from utils.bar_store import get_bar_store, resample, ns_to_datetime, interval_minutes, trading_day_keys, TIME_COLUMN
+from utils.contract_registry import get_contract_registry
+from utils.tick_recorder import load_tick_range
+from services.strategy_service.core.cta_template import ARBIGCtaTemplate, StrategyStatus
+from services.strategy_service.core.simulated_signal_sender import SimulatedSignalSender
+from services.strategy_service.core.data_tools import BarGenerator
+from services.strategy_service.backtesting.robustness import analyze_robustness
+
+logger = get_logger(__name__)
+
+# 每次从列数据中取出的K线数量（tolist 转为Python标量后逐根回放）
+_REPLAY_CHUNK = 65536
+# 有进度回调时的回放块大小（每块报告一次进度并检查取消）
+_PROGRESS_CHUNK = 8192
+
+
+class _ThreadLevelFilter(logging.Filter):
+    """只过滤指定线程中低于阈值的日志，不影响同一进程中实盘策略的日志"""
+
+    def __init__(self, thread_id: int, level: int):
+        super().__init__()
+        self.thread_id = thread_id
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.level or record.thread != self.thread_id
+
+
+@contextmanager
+def quiet_logging(modules: List[Any], level: int = logging.WARNING):
+    """回测期间屏蔽当前线程中策略相关模块（或直接传入的 Logger）的逐K线日志"""
+    log_filter = _ThreadLevelFilter(threading.get_ident(), level)
+    loggers = {id(lg): lg for lg in (m if isinstance(m, logging.Logger) else getattr(m, 'logger', None)
+                                     for m in modules) if isinstance(lg, logging.Logger)}
+    for lg in loggers.values():
+        lg.addFilter(log_filter)
+    try:
+        yield
+    finally:
+        for lg in loggers.values():
+            lg.removeFilter(log_filter)
+
+
+class BacktestCancelled(Exception):
+    """回测被进度回调取消"""
+
+
+def _bar_interval(interval: str) -> Interval:
+    if interval == '1d':
+        return Interval.DAILY
+    if interval == '1h':
+        return Interval.HOUR
+    return Interval.MINUTE
+
+
+class NativeBacktestEngine:
+    """
+    ARBIG原生回测引擎
+
+    用法:
+        engine = NativeBacktestEngine(capital=1_000_000)
+        result = engine.run(MaRsiComboStrategy, "au2510", setting, start, end)
+    """
+
+    def __init__(self, capital: float = 1000000, annual_days: int = 240, quiet: bool = True,
+                 slippage: float = 0.0, rate: Optional[float] = None, robustness_paths: int = 10000):
+        """
+        Args:
+            capital: 初始资金
+            annual_days: 年化交易日数
+            quiet: 是否屏蔽回测线程中策略模块的 INFO/DEBUG 日志
+            slippage: 滑点（价格单位）
+            rate: 手续费率（为空时按合约规格的手续费计算）
+            robustness_paths: 稳健性分析的重采样路径数（0 不做分析，参数优化等批量评估时使用）
+        """
+        self.capital = capital
+        self.slippage = slippage
+        self.rate = rate
+        self.annual_days = annual_days
+        self.quiet = quiet
+        self.robustness_paths = robustness_paths
+
+        # 最近一次回测的逐K线结果
+        self.datetimes: Optional[np.ndarray] = None
+        self.positions: Optional[np.ndarray] = None
+        self.equity: Optional[np.ndarray] = None
+        self.fills: List[tuple] = []
+        # 最近一次回测的日收益率和逐笔平仓盈亏
+        self.daily_returns: Optional[np.ndarray] = None
+        self.close_pnls: Optional[np.ndarray] = None
+
+    # ==================== 数据 ====================
+
+    @staticmethod
+    def load_data(symbol: str, interval: str = '1m', start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """从本地K线存储读取 [start, end) 的K线，非1分钟周期由1分钟K线聚合（不支持的周期抛出 ValueError）"""
+        minutes = interval_minutes(interval)
+        data = get_bar_store().read(symbol, '1m', start, end)
+        return resample(data, minutes) if minutes > 1 else data
+
+    # ==================== 回测 ====================
+
+    def run(self,
+            strategy_class: Type[ARBIGCtaTemplate],
+            symbol: str,
+            setting: Optional[Dict[str, Any]] = None,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            interval: str = '1m',
+            data: Optional[Dict[str, np.ndarray]] = None,
+            strategy_name: Optional[str] = None,
+            exchange: Exchange = Exchange.SHFE,
+            progress_callback: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+        """
+        运行回测
+
+        Args:
+            strategy_class: ARBIG策略类
+            symbol: 合约代码（不含交易所后缀）
+            setting: 策略参数
+            start: 开始时间（含）
+            end: 结束时间（不含）
+            interval: K线周期（1m/5m/15m/30m/1h/1d）
+            data: 直接传入的列数据（为空时从K线存储读取）
+            strategy_name: 策略实例名称
+            exchange: 交易所
+            progress_callback: 进度回调 (已回放K线数, 总K线数)，返回 False 时取消回测
+
+        Returns:
+            回测结果字典，失败时包含 error
+        """
+        if data is None:
+            data = self.load_data(symbol, interval, start, end)
+        if len(data[TIME_COLUMN]) == 0:
+            return {"error": f"{symbol} 在回测区间内没有K线数据"}
+
+        return self._execute(
+            strategy_class, symbol, setting, strategy_name, exchange, interval, data,
+            lambda strategy, sender: self._replay(strategy, sender, data, exchange, interval, progress_callback)
+        )
+
+    def run_ticks(self,
+                  strategy_class: Type[ARBIGCtaTemplate],
+                  symbol: str,
+                  setting: Optional[Dict[str, Any]] = None,
+                  start: Optional[datetime] = None,
+                  end: Optional[datetime] = None,
+                  ticks: Optional[List[np.ndarray]] = None,
+                  strategy_name: Optional[str] = None,
+                  exchange: Exchange = Exchange.SHFE,
+                  progress_callback: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+        """
+        Tick回放回测：逐笔回放录制的tick，按实盘顺序驱动策略
+        - SimulatedSignalSender.update_tick 按盘口撮合挂单
+        - strategy.on_tick（on_tick_impl 中的实时风控/止损）
+        - BarGenerator 合成1分钟K线，分钟切换时回调 strategy.on_bar
+
+        Args:
+            ticks: 按日期分段的tick记录（tick_recorder.load_tick_range 的返回值，为空时按 start/end 读取录制文件）
+            其余参数同 run
+
+        Returns:
+            回测结果字典（bar_count 为tick数，权益按逐tick最新价计算），失败时包含 error
+        """
+        if ticks is None:
+            ticks = load_tick_range(symbol, start, end)
+        ticks = [segment for segment in ticks if segment.size]
+        if not ticks:
+            return {"error": f"{symbol} 在回测区间内没有tick数据"}
+
+        # 统计用的价格序列：每笔tick的时间和最新价
+        data = {
+            TIME_COLUMN: np.concatenate([segment['ts'] for segment in ticks]),
+            'close': np.concatenate([segment['last_price'] for segment in ticks]),
+        }
+        return self._execute(
+            strategy_class, symbol, setting, strategy_name, exchange, "tick", data,
+            lambda strategy, sender: self._replay_ticks(strategy, sender, ticks, exchange, progress_callback)
+        )
+
+    def _execute(self, strategy_class: Type[ARBIGCtaTemplate], symbol: str, setting: Optional[Dict[str, Any]],
+                 strategy_name: Optional[str], exchange: Exchange, interval: str, data: Dict[str, np.ndarray],
+                 replay: Callable[[ARBIGCtaTemplate, SimulatedSignalSender], np.ndarray]) -> Dict[str, Any]:
+        """创建策略和模拟发送器，执行回放并统计结果"""
+        setting = dict(setting or {})
+        strategy_name = strategy_name or f"{strategy_class.__name__}_backtest"
+        bar_count = len(data[TIME_COLUMN])
+
+        spec = get_contract_registry().get(symbol)
+        sender = SimulatedSignalSender(symbol, exchange, spec, slippage=self.slippage, rate=self.rate)
+
+        modules = [sys.modules.get(name) for name in (
+            strategy_class.__module__, ARBIGCtaTemplate.__module__, 'services.strategy_service.core.data_tools'
+        )] + [logging.getLogger('bar_data')]
+        started = time.perf_counter()
+        try:
+            with quiet_logging(modules if self.quiet else []):
+                strategy = strategy_class(strategy_name, symbol, setting, sender)
+                strategy.backtesting = True
+                sender.bind(strategy)
+
+                strategy.start()
+                if strategy.status != StrategyStatus.RUNNING:
+                    return {"error": f"策略 {strategy_name} 启动失败"}
+
+                positions = replay(strategy, sender)
+                strategy.stop()
+        except BacktestCancelled:
+            strategy.stop()
+            logger.info(f"⏹️ [原生回测] {strategy_name} 回测已取消")
+            return {"error": "回测已取消", "cancelled": True}
+        except Exception as e:
+            logger.error(f"❌ [原生回测] {strategy_name} 回测异常: {e}")
+            return {"error": str(e)}
+        elapsed = time.perf_counter() - started
+
+        self.datetimes = np.asarray(data[TIME_COLUMN])
+        self.positions = positions
+        self.fills = sender.fills
+        basic_result, statistics = self._calculate_result(data, positions, sender.fills, spec.size)
+
+        unit = ("笔tick", "笔") if interval == "tick" else ("根K线", "根")
+        logger.info(
+            f"✅ [原生回测] {strategy_name} {symbol} {bar_count}{unit[0]}, 用时{elapsed:.2f}s "
+            f"({bar_count / max(elapsed, 1e-9):,.0f}{unit[1]}/秒), 成交{len(sender.fills)}笔"
+        )
+
+        result = {
+            "basic_result": basic_result,
+            "statistics": statistics,
+            "settings": {
+                "start_date": ns_to_datetime(data[TIME_COLUMN][0]),
+                "end_date": ns_to_datetime(data[TIME_COLUMN][-1]),
+                "symbol": f"{symbol}.{exchange.value}",
+                "interval": interval,
+                "rate": sender.spec.commission_rate,
+                "slippage": self.slippage,
+                "size": spec.size,
+                "pricetick": spec.pricetick,
+                "capital": self.capital,
+            },
+            "strategies": {strategy_name: {"class": strategy_class.__name__, "setting": setting}},
+            "engine": "native",
+            "bar_count": bar_count,
+            "elapsed": round(elapsed, 3),
+            "timestamp": datetime.now().isoformat(),
+        }
+        if self.robustness_paths > 0:
+            result["robustness"] = analyze_robustness(
+                self.daily_returns, self.close_pnls, self.capital,
+                n_paths=self.robustness_paths, annual_days=self.annual_days
+            )
+        return result
+
+    def _replay(self, strategy: ARBIGCtaTemplate, sender: SimulatedSignalSender,
+                data: Dict[str, np.ndarray], exchange: Exchange, interval: str,
+                progress_callback: Optional[Callable[[int, int], bool]] = None) -> np.ndarray:
+        """逐根回放K线，返回每根K线处理后的净持仓（有进度回调时每块回放后报告一次）"""
+        times = np.asarray(data[TIME_COLUMN])
+        bar_count = times.size
+        positions = np.zeros(bar_count, dtype=np.int64)
+
+        bar = BarData(
+            symbol=strategy.symbol,
+            exchange=exchange,
+            datetime=ns_to_datetime(times[0]),
+            interval=_bar_interval(interval),
+            gateway_name="BACKTESTING",
+        )
+        on_bar = strategy.on_bar
+        update_bar = sender.update_bar
+        fromtimestamp = datetime.fromtimestamp
+
+        if progress_callback and progress_callback(0, bar_count) is False:
+            raise BacktestCancelled()
+
+        chunk = _PROGRESS_CHUNK if progress_callback else _REPLAY_CHUNK
+        for lo in range(0, bar_count, chunk):
+            hi = min(lo + chunk, bar_count)
+            rows = zip(
+                (times[lo:hi] / 1e9).tolist(),
+                np.asarray(data['open'][lo:hi]).tolist(),
+                np.asarray(data['high'][lo:hi]).tolist(),
+                np.asarray(data['low'][lo:hi]).tolist(),
+                np.asarray(data['close'][lo:hi]).tolist(),
+                np.asarray(data['volume'][lo:hi]).tolist(),
+                np.asarray(data['turnover'][lo:hi]).tolist(),
+                np.asarray(data['open_interest'][lo:hi]).tolist(),
+            )
+            for index, (ts, o, h, l, c, v, t, oi) in enumerate(rows, lo):
+                bar_time = fromtimestamp(ts)
+                bar.datetime = bar_time
+                bar.open_price = o
+                bar.high_price = h
+                bar.low_price = l
+                bar.close_price = c
+                bar.volume = v
+                bar.turnover = t
+                bar.open_interest = oi
+
+                strategy.sim_datetime = bar_time
+                update_bar(bar)
+                on_bar(bar)
+                positions[index] = sender.net_pos
+
+            if progress_callback and progress_callback(hi, bar_count) is False:
+                raise BacktestCancelled()
+
+        return positions
+
+    def _replay_ticks(self, strategy: ARBIGCtaTemplate, sender: SimulatedSignalSender,
+                      segments: List[np.ndarray], exchange: Exchange,
+                      progress_callback: Optional[Callable[[int, int], bool]] = None) -> np.ndarray:
+        """
+        逐笔回放tick，返回每笔tick处理后的净持仓
+
+        与实盘 StrategyEngine 的分发顺序一致：先交给策略 on_tick，再更新K线生成器；
+        整个回放复用同一个 TickData 对象，按块从 memmap 取出记录。
+        """
+        tick_count = sum(segment.size for segment in segments)
+        positions = np.zeros(tick_count, dtype=np.int64)
+
+        tick = TickData(
+            symbol=strategy.symbol,
+            exchange=exchange,
+            datetime=ns_to_datetime(segments[0]['ts'][0]),
+            gateway_name="BACKTESTING",
+        )
+        bar_generator = BarGenerator(strategy.on_bar)
+        on_tick = strategy.on_tick
+        update_tick = sender.update_tick
+        generate = bar_generator.update_tick
+        fromtimestamp = datetime.fromtimestamp
+
+        if progress_callback and progress_callback(0, tick_count) is False:
+            raise BacktestCancelled()
+
+        chunk = _PROGRESS_CHUNK if progress_callback else _REPLAY_CHUNK
+        index = 0
+        for segment in segments:
+            for lo in range(0, segment.size, chunk):
+                block = segment[lo:lo + chunk]
+                rows = zip(
+                    (block['ts'] / 1e9).tolist(),
+                    block['last_price'].tolist(),
+                    block['volume'].tolist(),
+                    block['turnover'].tolist(),
+                    block['open_interest'].tolist(),
+                    block['bid_price_1'].tolist(),
+                    block['ask_price_1'].tolist(),
+                    block['bid_volume_1'].tolist(),
+                    block['ask_volume_1'].tolist(),
+                    block['high_price'].tolist(),
+                    block['low_price'].tolist(),
+                    block['open_price'].tolist(),
+                )
+                for ts, last, volume, turnover, oi, bid, ask, bid_volume, ask_volume, high, low, open_ in rows:
+                    tick_time = fromtimestamp(ts)
+                    tick.datetime = tick_time
+                    tick.last_price = last
+                    tick.volume = volume
+                    tick.turnover = turnover
+                    tick.open_interest = oi
+                    tick.bid_price_1 = bid
+                    tick.ask_price_1 = ask
+                    tick.bid_volume_1 = bid_volume
+                    tick.ask_volume_1 = ask_volume
+                    tick.high_price = high
+                    tick.low_price = low
+                    tick.open_price = open_
+
+                    strategy.sim_datetime = tick_time
+                    update_tick(tick)
+                    on_tick(tick)
+                    generate(tick)
+                    positions[index] = sender.net_pos
+                    index += 1
+
+                if progress_callback and progress_callback(index, tick_count) is False:
+                    raise BacktestCancelled()
+
+        # 最后一根未完成的K线同样交给策略（其中的委托按最后一笔tick成交）
+        bar_generator.flush()
+        positions[-1] = sender.net_pos
+        return positions
+
+    # ==================== 统计 ====================
+
+    def _calculate_result(self, data: Dict[str, np.ndarray], positions: np.ndarray,
+                          fills: List[tuple], size: float):
+        """由逐K线持仓和成交记录计算权益曲线及统计指标"""
+        times = np.asarray(data[TIME_COLUMN])
+        close = np.asarray(data['close'], dtype=np.float64)
+
+        # 持仓盈亏：上一根K线结束时的持仓 × 本根收盘价变动
+        pnl = np.zeros(close.size)
+        pnl[1:] = positions[:-1] * np.diff(close) * size
+
+        trade_count = len(fills)
+        commission = 0.0
+        close_pnls = np.empty(0)
+        if trade_count:
+            fill_times = np.array([round(fill[0].timestamp() * 1_000_000) * 1000 for fill in fills], dtype=np.int64)
+            signs = np.array([1 if fill[1] == Direction.LONG else -1 for fill in fills], dtype=np.float64)
+            prices = np.array([fill[3] for fill in fills], dtype=np.float64)
+            volumes = np.array([fill[4] for fill in fills], dtype=np.float64)
+            commissions = np.array([fill[5] for fill in fills], dtype=np.float64)
+            is_close = np.array([fill[2] != Offset.OPEN for fill in fills], dtype=bool)
+
+            # 成交盈亏：成交价到成交所在K线收盘价的差，再扣除手续费
+            # （成交时间为微秒精度，加1微秒容差定位到tick回放中成交所在的那一笔）
+            index = np.clip(np.searchsorted(times, fill_times + 1000, side='right') - 1, 0, close.size - 1)
+            np.add.at(pnl, index, signs * volumes * (close[index] - prices) * size - commissions)
+            commission = float(commissions.sum())
+            close_pnls = np.array([fill[6] for fill in fills], dtype=np.float64)[is_close]
+
+        equity = self.capital + np.cumsum(pnl)
+        self.equity = equity
+
+        peak = np.maximum.accumulate(np.r_[self.capital, equity])[1:]
+        drawdown = equity - peak
+        max_drawdown = float((drawdown / peak).min())
+
+        # 按交易日取收盘权益计算日收益
+        day_keys = trading_day_keys(times)
+        day_ends = np.r_[np.flatnonzero(day_keys[1:] != day_keys[:-1]), day_keys.size - 1]
+        daily_equity = np.r_[self.capital, equity[day_ends]]
+        daily_returns = np.diff(daily_equity) / daily_equity[:-1]
+        total_days = daily_returns.size
+        self.daily_returns = daily_returns
+        self.close_pnls = close_pnls
+
+        total_return = float(equity[-1] / self.capital - 1)
+        annual_return = total_return / total_days * self.annual_days if total_days else 0.0
+        mean_return = float(daily_returns.mean()) if total_days else 0.0
+        std_return = float(daily_returns.std()) if total_days > 1 else 0.0
+        downside = daily_returns[daily_returns < 0]
+        downside_std = float(np.sqrt((downside ** 2).mean())) if downside.size else 0.0
+        sqrt_days = float(np.sqrt(self.annual_days))
+
+        winning = close_pnls[close_pnls > 0]
+        losing = close_pnls[close_pnls < 0]
+        closed_count = close_pnls.size
+
+        basic_result = {
+            "total_days": total_days,
+            "capital": self.capital,
+            "end_balance": float(equity[-1]),
+            "total_net_pnl": float(equity[-1] - self.capital),
+            "total_commission": commission,
+            "total_return": total_return,
+            "annual_return": annual_return,
+            "max_drawdown": max_drawdown,
+            "max_drawdown_amount": float(drawdown.min()),
+            "sharpe_ratio": mean_return / std_return * sqrt_days if std_return else 0.0,
+            "total_trade_count": trade_count,
+            "winning_trade_count": int(winning.size),
+            "losing_trade_count": int(losing.size),
+            "win_rate": winning.size / closed_count if closed_count else 0.0,
+            "profit_loss_ratio": float(winning.mean() / -losing.mean()) if winning.size and losing.size else 0.0,
+        }
+        statistics = {
+            "volatility": std_return * sqrt_days,
+            "calmar_ratio": annual_return / abs(max_drawdown) if max_drawdown else 0.0,
+            "sortino_ratio": mean_return / downside_std * sqrt_days if downside_std else 0.0,
+            "daily_return_mean": mean_return,
+            "daily_return_std": std_return,
+        }
+        return basic_result, statistics
+
+
+def run_backtest_job(strategy_name: str,
+                     strategy_setting: Dict[str, Any],
+                     run_setting: Dict[str, Any],
+                     progress_callback: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+    """
+    回测任务入口（可在进程池工作进程中执行）
+
+    只按策略显示名传递策略、按合约和区间传递数据范围，工作进程自行解析策略类，
+    并通过K线存储 memmap（或 run_setting 中 shared_data 句柄指向的共享内存）读取数据，
+    避免在进程间序列化策略类和K线。
+
+    Args:
+        strategy_name: 策略显示名（见 strategy_adapter.STRATEGY_MAPPINGS）
+        strategy_setting: 策略参数
+        run_setting: symbol/start/end/interval/capital/slippage/rate/robustness_paths/shared_data
+            （interval 为 tick 时逐笔回放录制的tick）
+        progress_callback: 进度回调（需可序列化，见 job_manager.JobProgress）
+
+    Returns:
+        回测结果字典，失败时包含 error 和 strategy
+    """
+    from .strategy_adapter import get_strategy_classes
+
+    try:
+        strategy_class = get_strategy_classes().get(strategy_name)
+        if strategy_class is None:
+            return {"error": f"策略 {strategy_name} 不存在", "strategy": strategy_name}
+
+        engine = NativeBacktestEngine(
+            capital=run_setting.get("capital", 1000000),
+            slippage=run_setting.get("slippage", 0.0),
+            rate=run_setting.get("rate"),
+            robustness_paths=run_setting.get("robustness_paths", 10000)
+        )
+        if run_setting.get("interval") == "tick":
+            result = engine.run_ticks(
+                strategy_class,
+                run_setting["symbol"],
+                strategy_setting,
+                start=run_setting.get("start"),
+                end=run_setting.get("end"),
+                strategy_name=strategy_name,
+                progress_callback=progress_callback
+            )
+        else:
+            data = None
+            if run_setting.get("shared_data") is not None:
+                from .optimizer import load_worker_data
+                data = load_worker_data(run_setting)
+            result = engine.run(
+                strategy_class,
+                run_setting["symbol"],
+                strategy_setting,
+                start=run_setting.get("start"),
+                end=run_setting.get("end"),
+                interval=run_setting.get("interval", "1m"),
+                data=data,
+                strategy_name=strategy_name,
+                progress_callback=progress_callback
+            )
+    except Exception as e:
+        logger.error(f"❌ [原生回测] {strategy_name} 回测任务异常: {e}")
+        result = {"error": str(e)}
+
+    if "error" in result:
+        result["strategy"] = strategy_name
+    return result
@@ -0,0 +1,483 @@
+"""
+ARBIG参数优化器
+在进程池中用原生回测引擎评估参数组合，支持三种搜索方式:
+- grid: 网格搜索，遍历参数空间的全部组合
+- random: 随机搜索，从参数空间中不重复地抽取 n_iter 组
+- halving: 逐次减半（successive halving），先用少量数据评估大量组合，
+  每轮保留最好的 1/eta 组并按 eta 倍扩大数据区间，最后一轮使用完整区间
+
+参数空间格式（每个参数一项）:
+    {"ma_short": [3, 5, 8],                              # 候选值列表
+     "stop_loss_pct": {"start": 0.004, "end": 0.01, "step": 0.002}}   # 等步长区间（含端点）
+
+评估结果按 (策略, 参数哈希, 数据区间及回测设置) 缓存，重复的参数点不再回测。
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from utils.logger import get_logger
+from utils.bar_store import get_bar_store, ns_to_datetime, to_ns, TIME_COLUMN
+
+from .result_cache import BacktestResultCache
+from .shared_data import SharedDataServer, attach_shared_data
+
+logger = get_logger(__name__)
+
+SEARCH_METHODS = ("grid", "random", "halving")
+
+# 评估结果中保留的指标（不回传逐笔成交等大字段）
+_RESULT_FIELDS = (
+    "total_return", "annual_return", "max_drawdown", "sharpe_ratio", "sortino_ratio", "calmar_ratio",
+    "total_net_pnl", "total_commission", "total_trade_count", "win_rate", "profit_loss_ratio",
+)
+
+# 工作进程内的K线缓存：同一优化任务的各参数组合共用一份数据
+_worker_data: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+
+def expand_space(space: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """参数空间展开为 {参数名: 候选值列表}"""
+    expanded = {}
+    for name, spec in space.items():
+        if isinstance(spec, dict):
+            start, end, step = spec["start"], spec["end"], spec["step"]
+            if step <= 0 or end < start:
+                raise ValueError(f"参数 {name} 的区间设置无效: {spec}")
+            count = int(math.floor((end - start) / step + 1e-9)) + 1
+            is_int = all(isinstance(value, int) for value in (start, end, step))
+            expanded[name] = [start + i * step if is_int else round(start + i * step, 10) for i in range(count)]
+        elif isinstance(spec, (list, tuple)):
+            expanded[name] = list(spec)
+        else:
+            expanded[name] = [spec]
+        if not expanded[name]:
+            raise ValueError(f"参数 {name} 没有候选值")
+    return expanded
+
+
+def params_hash(params: Dict[str, Any]) -> str:
+    """参数组合的稳定哈希（与键顺序无关）"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def load_worker_data(run_setting: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    工作进程内读取回测区间的K线
+
+    run_setting 带 shared_data（主进程写入共享内存的K线句柄，见 shared_data）时直接只读映射；
+    否则自行读取，带 data_start/data_end（滚动窗口回测的整段区间）时整段K线只读取/聚合一次。
+    各窗口按 [start, end) 切片复用；同一工作进程只保留最近一段数据。
+    """
+    from .native_engine import NativeBacktestEngine
+
+    symbol = run_setting["symbol"]
+    interval = run_setting.get("interval", "1m")
+    start, end = run_setting.get("start"), run_setting.get("end")
+    data_start = run_setting.get("data_start", start)
+    data_end = run_setting.get("data_end", end)
+
+    shared = run_setting.get("shared_data")
+    if shared is not None:
+        _worker_data.clear()
+        data = attach_shared_data(shared)
+    else:
+        data_key = (symbol, interval, data_start, data_end)
+        data = _worker_data.get(data_key)
+        if data is None:
+            _worker_data.clear()
+            data = NativeBacktestEngine.load_data(symbol, interval, data_start, data_end)
+            _worker_data[data_key] = data
+
+    # 共享段覆盖整段区间，逐次减半等缩短的区间同样切片
+    if shared is None and (start, end) == (data_start, data_end):
+        return data
+
+    times = data[TIME_COLUMN]
+    lo = 0 if start is None else int(np.searchsorted(times, to_ns(start), side='left'))
+    hi = times.size if end is None else int(np.searchsorted(times, to_ns(end), side='left'))
+    return {name: array[lo:hi] for name, array in data.items()}
+
+
+def evaluate_params(strategy_name: str,
+                    params: Dict[str, Any],
+                    run_setting: Dict[str, Any],
+                    cancel_check: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+    """
+    评估一组参数（在进程池工作进程中执行）
+
+    K线从K线存储 memmap 读取，同一工作进程内相同区间的数据只读取/聚合一次。
+
+    Args:
+        cancel_check: 回放进度回调，返回 False 时中止本组评估（需可序列化，见 job_manager.JobCancelCheck）
+
+    Returns:
+        {"basic_result": {...}} 或 {"error": ...}（取消时带 cancelled）
+    """
+    from .native_engine import NativeBacktestEngine
+    from .strategy_adapter import get_strategy_classes
+
+    try:
+        strategy_class = get_strategy_classes().get(strategy_name)
+        if strategy_class is None:
+            return {"error": f"策略 {strategy_name} 不存在"}
+
+        symbol = run_setting["symbol"]
+        interval = run_setting.get("interval", "1m")
+        data = load_worker_data(run_setting)
+
+        engine = NativeBacktestEngine(
+            capital=run_setting.get("capital", 1000000),
+            slippage=run_setting.get("slippage", 0.0),
+            rate=run_setting.get("rate"),
+            robustness_paths=0
+        )
+        result = engine.run(strategy_class, symbol, params, interval=interval, data=data,
+                            strategy_name=f"{strategy_name}_opt", progress_callback=cancel_check)
+        if "error" in result:
+            return {"error": result["error"], "cancelled": result.get("cancelled", False)}
+
+        basic = result["basic_result"]
+        return {"basic_result": {field: basic.get(field) for field in _RESULT_FIELDS}}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+class _Progress:
+    """单次优化任务的评估进度（并携带传给每组评估的取消检查）"""
+
+    def __init__(self, total: int, callback: Optional[Callable[[int, int], Any]],
+                 cancel_check: Optional[Callable[[int, int], bool]] = None):
+        self.done = 0
+        self.total = total
+        self.callback = callback
+        self.cancel_check = cancel_check
+
+    def advance(self):
+        self.done += 1
+        if self.callback is not None:
+            self.callback(self.done, max(self.total, self.done))
+
+
+class ParameterOptimizer:
+    """
+    参数优化器
+
+    用法:
+        optimizer = ParameterOptimizer()
+        result = await optimizer.optimize("MaRsiCombo", {"ma_short": [3, 5, 8], "ma_long": [20, 30]},
+                                          run_setting, method="grid")
+    """
+
+    def __init__(self, executor_factory: Optional[Callable[[], Executor]] = None,
+                 max_workers: Optional[int] = None,
+                 result_cache: Optional[BacktestResultCache] = None,
+                 shared_data: Optional[SharedDataServer] = None):
+        """
+        Args:
+            executor_factory: 返回共用进程池的函数（为空时自建 spawn 进程池）
+            max_workers: 自建进程池的工作进程数，默认CPU核数
+            result_cache: 磁盘结果缓存（跨进程重启复用评估结果，为空时只用内存缓存）
+            shared_data: 共享K线服务（各工作进程映射同一份K线，为空时工作进程自行读取）
+        """
+        self.executor_factory = executor_factory
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.result_cache = result_cache
+        self.shared_data = shared_data
+
+        # 缓存键 -> 评估结果（有磁盘缓存时键为内容哈希，否则为 (策略, 参数哈希, 数据区间哈希)）
+        self.cache: Dict[Any, Dict[str, Any]] = {}
+        self.cache_hits = 0
+        self.evaluations = 0
+
+    def _get_executor(self) -> Executor:
+        if self.executor_factory is not None:
+            return self.executor_factory()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self):
+        """关闭自建进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ==================== 优化 ====================
+
+    async def optimize(self,
+                       strategy_name: str,
+                       space: Dict[str, Any],
+                       run_setting: Dict[str, Any],
+                       method: str = "grid",
+                       target_name: str = "sharpe_ratio",
+                       n_iter: int = 50,
+                       eta: int = 3,
+                       fixed_setting: Optional[Dict[str, Any]] = None,
+                       seed: Optional[int] = None,
+                       top_n: int = 20,
+                       progress_callback: Optional[Callable[[int, int], Any]] = None,
+                       cancel_check: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+        """
+        运行参数优化
+
+        Args:
+            strategy_name: 策略显示名
+            space: 参数空间
+            run_setting: symbol/start/end/interval/capital/slippage/rate（见 BacktestManager._native_run_setting）
+            method: grid / random / halving
+            target_name: 优化目标（basic_result 中的指标，越大越好）
+            n_iter: random/halving 的初始参数组数
+            eta: halving 每轮淘汰比例
+            fixed_setting: 固定不变的策略参数
+            seed: 随机种子
+            top_n: 返回的最优结果数
+            progress_callback: 每完成一组评估回调 (已评估组数, 计划评估组数)
+            cancel_check: 传给每组评估的取消检查（见 evaluate_params）
+
+        Returns:
+            优化结果，失败时包含 error
+        """
+        if method not in SEARCH_METHODS:
+            return {"error": f"不支持的搜索方式: {method}，可选 {', '.join(SEARCH_METHODS)}"}
+        if target_name not in _RESULT_FIELDS:
+            return {"error": f"不支持的优化目标: {target_name}"}
+
+        try:
+            values = expand_space(space)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"error": f"参数空间无效: {e}"}
+
+        started = time.perf_counter()
+        hits_before = self.cache_hits
+        evaluations_before = self.evaluations
+        candidates = self._candidates(values, method, n_iter, seed)
+        fixed_setting = dict(fixed_setting or {})
+        progress = _Progress(self._planned_evaluations(len(candidates), method, eta), progress_callback,
+                             cancel_check)
+        logger.info(f"开始参数优化: {strategy_name} {method} {len(candidates)}组参数, 目标 {target_name}")
+
+        # 整段K线写入共享内存，各工作进程只读映射（调用方已共享时直接使用）
+        shared = None
+        if self.shared_data is not None and "shared_data" not in run_setting:
+            shared = await self.shared_data.acquire_async(run_setting)
+            if shared is not None:
+                run_setting = {**run_setting, "shared_data": shared}
+
+        try:
+            if method == "halving":
+                scored = await self._successive_halving(strategy_name, candidates, run_setting, target_name,
+                                                        eta, fixed_setting, progress)
+            else:
+                scored = await self._evaluate_all(strategy_name, candidates, run_setting, target_name,
+                                                  fixed_setting, progress)
+        finally:
+            if self.shared_data is not None:
+                self.shared_data.release(shared)
+
+        scored.sort(key=lambda item: item["target"], reverse=True)
+        valid = [item for item in scored if item["target"] > -math.inf]
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            f"参数优化完成: {strategy_name} 评估{self.evaluations - evaluations_before}组, 缓存命中{self.cache_hits - hits_before}次, "
+            f"用时{elapsed:.1f}s"
+        )
+
+        if not valid:
+            errors = [item.get("error") for item in scored if item.get("error")]
+            return {"error": f"所有参数组合回测失败: {errors[0] if errors else '无有效结果'}"}
+
+        return {
+            "strategy": strategy_name,
+            "method": method,
+            "target_name": target_name,
+            "best_setting": valid[0]["setting"],
+            "best_target": valid[0]["target"],
+            "results": valid[:top_n],
+            "evaluations": self.evaluations - evaluations_before,
+            "failed": len(scored) - len(valid),
+            "cache_hits": self.cache_hits - hits_before,
+            "elapsed": round(elapsed, 3),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @staticmethod
+    def _candidates(values: Dict[str, List[Any]], method: str, n_iter: int,
+                    seed: Optional[int]) -> List[Dict[str, Any]]:
+        """生成候选参数组合（random/halving 在网格较小时直接使用全部组合）"""
+        names = list(values)
+        total = math.prod(len(values[name]) for name in names)
+        if method == "grid" or total <= n_iter:
+            return [dict(zip(names, combo)) for combo in product(*(values[name] for name in names))]
+
+        # 按组合序号不重复抽样，不展开整个网格
+        rng = random.Random(seed)
+        candidates = []
+        for index in rng.sample(range(total), n_iter):
+            params = {}
+            for name in reversed(names):
+                index, position = divmod(index, len(values[name]))
+                params[name] = values[name][position]
+            candidates.append({name: params[name] for name in names})
+        return candidates
+
+    @staticmethod
+    def _halving_rounds(count: int, eta: int) -> int:
+        """逐次减半的淘汰轮数：floor(log_eta(count))，至少1轮（整数运算，避免浮点对数在整数幂处少算一轮）"""
+        rounds = 0
+        while count >= eta:
+            count //= eta
+            rounds += 1
+        return max(1, rounds)
+
+    @staticmethod
+    def _planned_evaluations(count: int, method: str, eta: int) -> int:
+        """计划评估的组数（halving 为各轮组数之和）"""
+        if method != "halving":
+            return count
+        eta = max(2, int(eta))
+        rounds = ParameterOptimizer._halving_rounds(count, eta)
+        planned = 0
+        for _ in range(rounds + 1):
+            planned += count
+            count = max(1, count // eta)
+        return planned
+
+    async def _successive_halving(self, strategy_name: str, candidates: List[Dict[str, Any]],
+                                  run_setting: Dict[str, Any], target_name: str, eta: int,
+                                  fixed_setting: Dict[str, Any], progress: "_Progress") -> List[Dict[str, Any]]:
+        """逐次减半：每轮数据区间扩大 eta 倍，保留最好的 1/eta 组，最后一轮使用完整区间"""
+        eta = max(2, int(eta))
+        start_ns, end_ns = self._data_range(run_setting)
+        rounds = self._halving_rounds(len(candidates), eta)
+        span = end_ns - start_ns
+
+        scored: List[Dict[str, Any]] = []
+        for rung in range(rounds + 1):
+            fraction = eta ** (rung - rounds)
+            rung_setting = dict(run_setting)
+            if fraction < 1:
+                # 取区间末尾的一段（离当前最近的行情）
+                rung_setting["start"] = ns_to_datetime(end_ns - int(span * fraction))
+            scored = await self._evaluate_all(strategy_name, candidates, rung_setting, target_name,
+                                              fixed_setting, progress)
+            logger.info(f"逐次减半 第{rung + 1}/{rounds + 1}轮: {len(candidates)}组, 数据比例 {fraction:.2%}")
+
+            if rung == rounds:
+                break
+            scored.sort(key=lambda item: item["target"], reverse=True)
+            keep = max(1, len(candidates) // eta)
+            candidates = [item["setting"] for item in scored[:keep] if item["target"] > -math.inf] or \
+                [item["setting"] for item in scored[:keep]]
+
+        return scored
+
+    @staticmethod
+    def _data_range(run_setting: Dict[str, Any]) -> Tuple[int, int]:
+        """回测区间内实际K线的首尾时间戳（纳秒）"""
+        times = get_bar_store().read(run_setting["symbol"], '1m', run_setting.get("start"),
+                                     run_setting.get("end"))[TIME_COLUMN]
+        if len(times) == 0:
+            raise ValueError(f"{run_setting['symbol']} 在回测区间内没有K线数据")
+        return int(times[0]), int(times[-1]) + 60 * 1_000_000_000
+
+    # ==================== 评估 ====================
+
+    async def _evaluate_all(self, strategy_name: str, candidates: List[Dict[str, Any]],
+                            run_setting: Dict[str, Any], target_name: str,
+                            fixed_setting: Dict[str, Any], progress: "_Progress") -> List[Dict[str, Any]]:
+        """在进程池中评估全部候选参数，已缓存的组合直接取结果"""
+        range_key = params_hash({key: value for key, value in run_setting.items() if key != "shared_data"})
+        strategy_class = self._strategy_class(strategy_name)
+        loop = asyncio.get_running_loop()
+
+        scored = []
+        futures = []
+        pending = []
+        self.evaluations += len(candidates)
+        for params in candidates:
+            setting = {**fixed_setting, **params}
+            if strategy_class is not None:
+                key = self.result_cache.make_key(strategy_class, setting, run_setting, kind="metrics")
+            else:
+                key = (strategy_name, params_hash(setting), range_key)
+
+            cached = self.cache.get(key)
+            if cached is None and strategy_class is not None:
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    self.cache[key] = cached
+            if cached is not None:
+                self.cache_hits += 1
+                scored.append(self._score(params, cached, target_name))
+                progress.advance()
+                continue
+
+            future = loop.run_in_executor(self._get_executor(), evaluate_params, strategy_name,
+                                          setting, run_setting, progress.cancel_check)
+            futures.append(future)
+            pending.append(self._tag(key, params, future))
+
+        try:
+            for next_done in asyncio.as_completed(pending):
+                key, params, evaluation = await next_done
+                if "error" not in evaluation:
+                    self.cache[key] = evaluation
+                    if isinstance(key, str):
+                        self.result_cache.put(key, evaluation)
+                scored.append(self._score(params, evaluation, target_name))
+                progress.advance()
+        finally:
+            # 优化被取消时撤销尚未开始的评估
+            for future in futures:
+                future.cancel()
+
+        return scored
+
+    def _strategy_class(self, strategy_name: str):
+        """磁盘缓存键需要策略类（读取源文件哈希），不可用时退回内存缓存"""
+        if self.result_cache is None:
+            return None
+        from .strategy_adapter import get_strategy_classes
+        return get_strategy_classes().get(strategy_name)
+
+    @staticmethod
+    async def _tag(key: tuple, params: Dict[str, Any], future) -> Tuple[tuple, Dict[str, Any], Dict[str, Any]]:
+        try:
+            return key, params, await future
+        except Exception as e:
+            logger.error(f"参数评估进程异常 {params}: {e}")
+            return key, params, {"error": str(e)}
+
+    @staticmethod
+    def _score(params: Dict[str, Any], evaluation: Dict[str, Any], target_name: str) -> Dict[str, Any]:
+        if "error" in evaluation:
+            return {"setting": params, "target": -math.inf, "error": evaluation["error"]}
+
+        target = evaluation["basic_result"].get(target_name)
+        if target is None or (isinstance(target, float) and math.isnan(target)):
+            target = -math.inf
+        return {"setting": params, "target": target, "basic_result": evaluation["basic_result"]}
+
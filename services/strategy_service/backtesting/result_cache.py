@@ -0,0 +1,311 @@
+"""
+回测结果缓存（内容寻址）
+缓存键为以下内容的 sha256，任何一项变化都会得到新的键，旧结果按LRU淘汰：
+- 策略源文件哈希、策略参数
+- 回测引擎设置（合约、周期、资金、滑点、手续费率）、合约规格（乘数、最小变动价位、手续费等）及引擎相关源码哈希
+- 数据指纹（区间内K线的全部存储列或tick记录的全部字段）
+
+    data/backtest_cache/{key[:2]}/{key}.json
+
+命中时更新文件修改时间作为最近访问时间；条目数或总大小超过上限时删除最久未访问的条目。
+结果中的 datetime/date 写入时带类型标记，读取时还原，命中缓存与新算结果的类型一致。
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Type
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from utils.logger import get_logger
+from utils.bar_store import get_bar_store, TIME_COLUMN, COLUMN_DTYPES
+from utils.contract_registry import get_contract_registry
+from utils.tick_recorder import load_tick_range
+
+logger = get_logger(__name__)
+
+_PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+_CACHE_DIR = _PROJECT_ROOT / "data" / "backtest_cache"
+
+# 影响回测结果的引擎源码（变化后缓存全部失效）
+_ENGINE_SOURCES = (
+    "services/strategy_service/backtesting/native_engine.py",
+    "services/strategy_service/backtesting/robustness.py",
+    "services/strategy_service/core/simulated_signal_sender.py",
+    "services/strategy_service/core/cta_template.py",
+    "services/strategy_service/core/data_tools.py",
+    "utils/contract_registry.py",
+)
+
+# 参与缓存键的回测设置
+_SETTING_KEYS = ("symbol", "interval", "capital", "slippage", "rate", "robustness_paths")
+
+# 缓存文件中 datetime/date 的类型标记
+_DATETIME_TAG = "__datetime__"
+_DATE_TAG = "__date__"
+
+
+def _encode_value(value: Any) -> Any:
+    """json.dumps 的 default：datetime/date 带类型标记，numpy 标量/数组转为 Python 类型"""
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE_TAG: value.isoformat()}
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    """json.load 的 object_hook：还原带类型标记的 datetime/date"""
+    if len(obj) == 1:
+        if _DATETIME_TAG in obj:
+            return datetime.fromisoformat(obj[_DATETIME_TAG])
+        if _DATE_TAG in obj:
+            return date.fromisoformat(obj[_DATE_TAG])
+    return obj
+
+
+def _file_hash(path: str, memo: Dict[str, Tuple[int, str]]) -> str:
+    """文件内容哈希（按修改时间记忆）"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return ""
+    cached = memo.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest())
+        memo[path] = cached
+    return cached[1]
+
+
+class BacktestResultCache:
+    """磁盘回测结果缓存（LRU）"""
+
+    def __init__(self, base_dir: Optional[Path] = None, max_entries: int = 5000,
+                 max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            base_dir: 缓存目录，默认 data/backtest_cache
+            max_entries: 最大条目数
+            max_bytes: 最大总大小（字节）
+        """
+        self.base_dir = Path(base_dir or _CACHE_DIR)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._source_memo: Dict[str, Tuple[int, str]] = {}
+        self._fingerprints: Dict[tuple, str] = {}
+
+        # key -> 文件大小，按最近访问排序（最久未访问在前）
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+        # 统计
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== 缓存键 ====================
+
+    def make_key(self, strategy_class: Type, setting: Dict[str, Any], run_setting: Dict[str, Any],
+                 kind: str = "result") -> str:
+        """
+        计算缓存键
+
+        Args:
+            strategy_class: 策略类
+            setting: 策略参数
+            run_setting: 回测设置（symbol/start/end/interval/capital/slippage/rate）
+            kind: 结果类型（result 完整结果 / metrics 优化指标）
+        """
+        content = {
+            "kind": kind,
+            "strategy": f"{strategy_class.__module__}.{strategy_class.__name__}",
+            "strategy_code": self._strategy_hash(strategy_class),
+            "engine_code": self._engine_hash(),
+            "setting": setting,
+            "run_setting": {key: run_setting.get(key) for key in _SETTING_KEYS},
+            "contract": asdict(get_contract_registry().get(run_setting.get("symbol"))),
+            "data": self.data_fingerprint(run_setting),
+        }
+        encoded = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _strategy_hash(self, strategy_class: Type) -> str:
+        try:
+            return _file_hash(inspect.getsourcefile(strategy_class), self._source_memo)
+        except (TypeError, OSError):
+            return ""
+
+    def _engine_hash(self) -> str:
+        digest = hashlib.sha256()
+        for relative in _ENGINE_SOURCES:
+            digest.update(_file_hash(str(_PROJECT_ROOT / relative), self._source_memo).encode())
+        return digest.hexdigest()
+
+    def data_fingerprint(self, run_setting: Dict[str, Any]) -> str:
+        """
+        数据指纹：区间内1分钟K线（tick回放为录制的tick）的条数、首尾时间和全部列的哈希
+
+        按 (合约, 区间, 条数, 首尾时间) 记忆，K线存储追加数据后自动重新计算
+        """
+        symbol = run_setting.get("symbol")
+        start, end = run_setting.get("start"), run_setting.get("end")
+        if run_setting.get("interval") == "tick":
+            # tick记录为结构化数组，整段字节即包含全部字段
+            columns = [segment for segment in load_tick_range(symbol, start, end) if segment.size]
+            times = np.concatenate([segment['ts'] for segment in columns]) if columns else np.empty(0)
+        else:
+            data = get_bar_store().read(symbol, '1m', start, end)
+            columns = [data[name] for name in COLUMN_DTYPES]
+            times = np.asarray(data[TIME_COLUMN])
+        if times.size == 0:
+            return "empty"
+
+        memo_key = (symbol, run_setting.get("interval") == "tick", str(start), str(end),
+                    times.size, int(times[0]), int(times[-1]))
+        fingerprint = self._fingerprints.get(memo_key)
+        if fingerprint is None:
+            digest = hashlib.sha256()
+            for column in columns:
+                digest.update(np.ascontiguousarray(column).tobytes())
+            fingerprint = f"{times.size}:{int(times[0])}:{int(times[-1])}:{digest.hexdigest()}"
+            self._fingerprints[memo_key] = fingerprint
+        return fingerprint
+
+    # ==================== 读写 ====================
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，命中时刷新最近访问时间"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f, object_hook=_decode_object)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """写入缓存（先写临时文件再替换），超出上限时按LRU淘汰"""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            encoded = json.dumps(value, ensure_ascii=False, default=_encode_value).encode('utf-8')
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp_path, 'wb') as f:
+                f.write(encoded)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"写入回测缓存失败 {key[:12]}: {e}")
+            return
+
+        with self._lock:
+            self._total_bytes += len(encoded) - self._index.pop(key, 0)
+            self._index[key] = len(encoded)
+            evicted = self._evict()
+
+        for old_key in evicted:
+            try:
+                self._path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> list:
+        """超出上限时移出最久未访问的条目（调用方持有锁），返回需删除的键"""
+        evicted = []
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _path(self, key: str) -> Path:
+        return self.base_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self):
+        """扫描缓存目录，按文件修改时间恢复LRU顺序"""
+        if not self.base_dir.exists():
+            return
+
+        entries = []
+        for path in self.base_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+        evicted = self._evict()
+        for key in evicted:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        return {
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局实例
+_result_cache: Optional[BacktestResultCache] = None
+
+
+def get_result_cache() -> BacktestResultCache:
+    """获取回测结果缓存实例"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = BacktestResultCache()
+    return _result_cache
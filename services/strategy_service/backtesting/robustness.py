@@ -0,0 +1,211 @@
+"""
+回测稳健性分析（蒙特卡洛）
+单条回测路径的收益和回撤受行情顺序影响很大，这里对同一次回测的结果重采样，给出分布和置信区间：
+- 日收益自助法（bootstrap）：有放回地重抽交易日收益（可按块抽取保留短期相关性），
+  得到总收益、最大回撤、夏普比率的分布
+- 成交顺序置换（permutation）：打乱平仓盈亏的先后顺序，总盈亏不变，得到最大回撤的分布
+- 成交自助法：有放回地重抽平仓盈亏，得到总盈亏的分布和亏损概率
+
+路径生成为二维数组（路径 × 步数），用 cumsum/cumprod/maximum.accumulate 按行原地计算，
+按缓存大小分块处理。每种方法的元素总量（路径数 × 步数）有上限，交易日或成交笔数很多时相应减少路径数；
+常规回测（几百个交易日、几百笔成交）1万条路径在1秒内完成。
+"""
+
+import time
+from typing import Dict, Any, Optional, Callable
+
+import numpy as np
+
+# 每块处理的元素数（路径数 × 步数），中间数组保持在CPU缓存内
+_CHUNK_ELEMENTS = 262_144
+# 每种方法的元素总量上限，步数很多时相应减少路径数
+_MAX_ELEMENTS = 10_000_000
+_MIN_PATHS = 200
+
+
+def _summary(values: np.ndarray, confidence: float) -> Dict[str, float]:
+    """分布摘要：均值、标准差、分位数和置信区间"""
+    alpha = (1 - confidence) / 2
+    low, p5, median, p95, high = np.quantile(values, [alpha, 0.05, 0.5, 0.95, 1 - alpha])
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "p5": float(p5),
+        "median": float(median),
+        "p95": float(p95),
+        "ci_low": float(low),
+        "ci_high": float(high),
+    }
+
+
+def _path_count(n_paths: int, steps: int) -> int:
+    """受元素总量上限约束的路径数"""
+    return max(_MIN_PATHS, min(n_paths, _MAX_ELEMENTS // max(steps, 1)))
+
+
+def _chunked(n_paths: int, steps: int, sample: Callable[[int], np.ndarray],
+             stats: Callable[[np.ndarray], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """按块生成路径并计算逐路径指标，拼接各块结果"""
+    per_chunk = max(1, _CHUNK_ELEMENTS // max(steps, 1))
+    parts: Dict[str, list] = {}
+    for done in range(0, n_paths, per_chunk):
+        for name, values in stats(sample(min(per_chunk, n_paths - done))).items():
+            parts.setdefault(name, []).append(values)
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def _return_path_stats(returns: np.ndarray, annual_days: int) -> Dict[str, np.ndarray]:
+    """日收益路径（路径 × 天数）的总收益、最大回撤、夏普（原地计算，不额外分配中间数组）"""
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(annual_days), 0.0)
+
+    equity = np.add(returns, 1, out=returns)
+    np.cumprod(equity, axis=1, out=equity)
+    total_return = equity[:, -1] - 1
+    return {
+        "total_return": total_return,
+        "max_drawdown": _max_drawdown(equity, 1.0),
+        "sharpe_ratio": sharpe,
+    }
+
+
+def _pnl_path_stats(pnls: np.ndarray, capital: float) -> Dict[str, np.ndarray]:
+    """盈亏金额路径（路径 × 成交数）的总盈亏和最大回撤（相对峰值权益，原地计算）"""
+    equity = np.cumsum(pnls, axis=1, out=pnls)
+    equity += capital
+    total_pnl = equity[:, -1] - capital
+    return {
+        "total_pnl": total_pnl,
+        "max_drawdown": _max_drawdown(equity, capital),
+    }
+
+
+def _max_drawdown(equity: np.ndarray, start: float) -> np.ndarray:
+    """逐路径最大回撤比例，峰值包含起始权益 start"""
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, start, out=peak)
+    np.divide(equity, peak, out=peak)
+    return peak.min(axis=1) - 1
+
+
+def bootstrap_returns(daily_returns: np.ndarray, n_paths: int = 10000, block_size: int = 1,
+                      annual_days: int = 240, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """
+    日收益自助法
+
+    Args:
+        daily_returns: 日收益率序列
+        n_paths: 路径数
+        block_size: 块长度（>1 时按连续块重抽，保留波动聚集等短期相关性）
+        annual_days: 年化交易日数
+        rng: 随机数生成器
+
+    Returns:
+        {"total_return", "max_drawdown", "sharpe_ratio"} -> 逐路径数组
+    """
+    rng = rng or np.random.default_rng()
+    returns = np.asarray(daily_returns, dtype=np.float64)
+    days = returns.size
+    block_size = int(min(max(block_size, 1), days))
+    blocks = -(-days // block_size)
+    offsets = np.arange(block_size)
+
+    def sample(count: int) -> np.ndarray:
+        starts = rng.integers(0, days - block_size + 1, size=(count, blocks))
+        index = (starts[:, :, None] + offsets).reshape(count, -1)[:, :days]
+        return returns[index]
+
+    return _chunked(n_paths, days, sample, lambda paths: _return_path_stats(paths, annual_days))
+
+
+def permute_trades(trade_pnls: np.ndarray, capital: float, n_paths: int = 10000,
+                   rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """
+    成交顺序置换：每条路径是平仓盈亏的一个随机排列（总盈亏不变）
+
+    Returns:
+        {"total_pnl", "max_drawdown"} -> 逐路径数组
+    """
+    rng = rng or np.random.default_rng()
+    pnls = np.asarray(trade_pnls, dtype=np.float64)
+    return _chunked(n_paths, pnls.size, lambda count: rng.permuted(np.tile(pnls, (count, 1)), axis=1),
+                    lambda paths: _pnl_path_stats(paths, capital))
+
+
+def bootstrap_trades(trade_pnls: np.ndarray, capital: float, n_paths: int = 10000,
+                     rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """
+    成交自助法：有放回地重抽同样笔数的平仓盈亏
+
+    Returns:
+        {"total_pnl", "max_drawdown"} -> 逐路径数组
+    """
+    rng = rng or np.random.default_rng()
+    pnls = np.asarray(trade_pnls, dtype=np.float64)
+    return _chunked(n_paths, pnls.size, lambda count: pnls[rng.integers(0, pnls.size, size=(count, pnls.size))],
+                    lambda paths: _pnl_path_stats(paths, capital))
+
+
+def analyze_robustness(daily_returns: np.ndarray,
+                       trade_pnls: np.ndarray,
+                       capital: float,
+                       n_paths: int = 10000,
+                       confidence: float = 0.95,
+                       block_size: int = 1,
+                       annual_days: int = 240,
+                       seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    对一次回测做稳健性分析
+
+    Args:
+        daily_returns: 日收益率序列
+        trade_pnls: 逐笔平仓盈亏（金额）
+        capital: 初始资金
+        n_paths: 每种方法的路径数（交易日或成交笔数很多时自动减少，实际路径数见各方法的 paths）
+        confidence: 置信水平
+        block_size: 日收益自助法的块长度
+        annual_days: 年化交易日数
+        seed: 随机种子
+
+    Returns:
+        各方法的指标分布摘要（mean/std/p5/median/p95/ci_low/ci_high）及亏损概率
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    daily_returns = np.asarray(daily_returns, dtype=np.float64)
+    trade_pnls = np.asarray(trade_pnls, dtype=np.float64)
+
+    result: Dict[str, Any] = {"paths": n_paths, "confidence": confidence}
+
+    if daily_returns.size >= 2:
+        daily_paths = _path_count(n_paths, daily_returns.size)
+        paths = bootstrap_returns(daily_returns, daily_paths, block_size, annual_days, rng)
+        result["daily_bootstrap"] = {
+            "days": int(daily_returns.size),
+            "paths": daily_paths,
+            "block_size": block_size,
+            **{name: _summary(values, confidence) for name, values in paths.items()},
+            "prob_loss": float((paths["total_return"] < 0).mean()),
+        }
+
+    if trade_pnls.size >= 2:
+        trade_paths = _path_count(n_paths, trade_pnls.size)
+        permuted = permute_trades(trade_pnls, capital, trade_paths, rng)
+        resampled = bootstrap_trades(trade_pnls, capital, trade_paths, rng)
+        result["trade_permutation"] = {
+            "trades": int(trade_pnls.size),
+            "paths": trade_paths,
+            "max_drawdown": _summary(permuted["max_drawdown"], confidence),
+        }
+        result["trade_bootstrap"] = {
+            "trades": int(trade_pnls.size),
+            "paths": trade_paths,
+            "total_pnl": _summary(resampled["total_pnl"], confidence),
+            "max_drawdown": _summary(resampled["max_drawdown"], confidence),
+            "prob_loss": float((resampled["total_pnl"] < 0).mean()),
+        }
+
+    result["elapsed"] = round(time.perf_counter() - started, 3)
+    return result
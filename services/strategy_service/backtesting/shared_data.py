@@ -0,0 +1,312 @@
+"""
+回测K线共享内存
+并发回测（批量回测、参数优化、滚动窗口）时，由主进程把回测区间的K线（非1分钟周期已聚合）
+一次性写入 multiprocessing.shared_memory，工作进程按句柄只读映射为 numpy 数组：
+- 各工作进程不再各自读取/聚合K线，N个进程只占一份内存
+- 句柄只含共享内存名和列布局，可随 run_setting 传给工作进程（见 optimizer.load_worker_data）
+
+    主进程: handle = server.acquire(run_setting) ... server.release(handle)
+           （协程中用 await server.acquire_async(run_setting)）
+    工作进程: data = attach_shared_data(handle)
+
+共享段按 (合约, 周期, 区间, K线存储行数) 复用，引用计数归零后保留，总大小超过上限时释放最久未用的段。
+tick回放直接 memmap 录制文件（已是零拷贝），不经过共享内存。
+"""
+
+import asyncio
+import atexit
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from utils.logger import get_logger
+from utils.bar_store import get_bar_store, TIME_COLUMN
+
+logger = get_logger(__name__)
+
+# 列在共享段内按此字节数对齐
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedDataHandle:
+    """共享K线句柄（可序列化传给工作进程）"""
+    name: str
+    rows: int
+    columns: Tuple[Tuple[str, str, int], ...]   # (列名, dtype, 字节偏移)
+
+
+class _Segment:
+    """主进程持有的一个共享段"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: SharedDataHandle, version: int):
+        self.shm = shm
+        self.handle = handle
+        self.version = version
+        self.refs = 0
+
+    @property
+    def size(self) -> int:
+        return self.shm.size
+
+
+class SharedDataServer:
+    """共享K线服务（在主进程中使用）"""
+
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: 共享段总大小上限（字节），超出时释放空闲段，正在使用的段不释放
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 区间键 -> 共享段，按最近使用排序（最久未用在前）
+        self._segments: "OrderedDict[tuple, _Segment]" = OrderedDict()
+        # 共享内存名 -> 区间键（release 时查找）
+        self._names: Dict[str, tuple] = {}
+        # 数据已更新、等待引用归零后释放的旧段
+        self._retired: Dict[str, _Segment] = {}
+        self._total_bytes = 0
+
+        # 统计
+        self.published = 0
+        self.reused = 0
+
+    def acquire(self, run_setting: Dict[str, Any]) -> Optional[SharedDataHandle]:
+        """
+        获取回测区间K线的共享句柄（不存在时读取K线并写入共享内存），用完后调用 release
+
+        区间取 run_setting 的 data_start/data_end（整段区间），没有时取 start/end。
+
+        Returns:
+            句柄；tick回放、区间内没有K线或创建失败时返回 None（工作进程自行读取数据）
+        """
+        interval = run_setting.get("interval", "1m")
+        if interval == "tick":
+            return None
+
+        symbol = run_setting["symbol"]
+        start = run_setting.get("data_start", run_setting.get("start"))
+        end = run_setting.get("data_end", run_setting.get("end"))
+        key = (symbol, interval, str(start), str(end))
+        version = get_bar_store().count(symbol, '1m')
+
+        with self._lock:
+            handle = self._reuse(key, version)
+            if handle is not None:
+                return handle
+
+        # 读取/聚合K线并写入共享内存较慢，在锁外进行，不阻塞其他区间的 acquire/release
+        try:
+            segment = self._publish(symbol, interval, start, end, version)
+        except Exception as e:
+            logger.error(f"❌ [共享K线] {symbol} {interval} 写入共享内存失败: {e}")
+            return None
+        if segment is None:
+            return None
+
+        with self._lock:
+            # 写入期间其他线程已发布同一区间：复用已有段，丢弃本次写入的段
+            handle = self._reuse(key, version)
+            if handle is not None:
+                self._unlink(segment)
+                return handle
+
+            segment.refs = 1
+            self._segments[key] = segment
+            self._names[segment.handle.name] = key
+            self._total_bytes += segment.size
+            self.published += 1
+            self._evict()
+            return segment.handle
+
+    async def acquire_async(self, run_setting: Dict[str, Any]) -> Optional[SharedDataHandle]:
+        """
+        在线程池中执行 acquire，不阻塞事件循环
+
+        等待期间被取消时，句柄在 acquire 完成后自动释放
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, self.acquire, run_setting)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._release_when_done)
+            raise
+
+    def _release_when_done(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None:
+            self.release(future.result())
+
+    def release(self, handle: Optional[SharedDataHandle]):
+        """释放句柄（引用归零后段仍保留供下次复用，超出上限时按LRU释放）"""
+        if handle is None:
+            return
+
+        with self._lock:
+            retired = self._retired.get(handle.name)
+            if retired is not None:
+                retired.refs -= 1
+                if retired.refs <= 0:
+                    self._unlink(self._retired.pop(handle.name))
+                return
+
+            key = self._names.get(handle.name)
+            if key is not None:
+                self._segments[key].refs -= 1
+                self._evict()
+
+    def close(self):
+        """释放全部共享段（进程退出时调用）"""
+        with self._lock:
+            for segment in list(self._segments.values()) + list(self._retired.values()):
+                self._unlink(segment)
+            self._segments.clear()
+            self._names.clear()
+            self._retired.clear()
+            self._total_bytes = 0
+
+    def _publish(self, symbol: str, interval: str, start, end, version: int) -> Optional[_Segment]:
+        """读取K线并按列写入一个共享段"""
+        from .native_engine import NativeBacktestEngine
+
+        data = NativeBacktestEngine.load_data(symbol, interval, start, end)
+        rows = len(data[TIME_COLUMN])
+        if rows == 0:
+            return None
+
+        layout = []
+        offset = 0
+        for name, array in data.items():
+            array = np.asarray(array)
+            layout.append((name, array.dtype.str, offset))
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, dtype, start_byte in layout:
+            target = np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=start_byte)
+            target[:] = data[name]
+            del target
+
+        handle = SharedDataHandle(name=shm.name, rows=rows, columns=tuple(layout))
+        logger.info(f"📦 [共享K线] {symbol} {interval} {rows}根K线写入共享内存 {shm.size / 1024 / 1024:.1f}MB")
+        return _Segment(shm, handle, version)
+
+    def _reuse(self, key: tuple, version: int) -> Optional[SharedDataHandle]:
+        """复用区间键对应的段并增加引用，段不存在或数据已更新时返回 None（调用方持有锁）"""
+        segment = self._segments.get(key)
+        if segment is not None and segment.version != version:
+            # K线存储追加了数据，旧段不再复用
+            self._retire(key)
+            segment = None
+        if segment is None:
+            return None
+
+        segment.refs += 1
+        self._segments.move_to_end(key)
+        self.reused += 1
+        return segment.handle
+
+    def _retire(self, key: tuple):
+        """移出区间键对应的段：无人使用时立即释放，否则等引用归零（调用方持有锁）"""
+        segment = self._segments.pop(key)
+        self._names.pop(segment.handle.name, None)
+        self._total_bytes -= segment.size
+        if segment.refs > 0:
+            self._retired[segment.handle.name] = segment
+        else:
+            self._unlink(segment)
+
+    def _evict(self):
+        """总大小超过上限时按最久未用顺序释放空闲段（调用方持有锁）"""
+        for key in list(self._segments):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if self._segments[key].refs <= 0:
+                self._retire(key)
+
+    @staticmethod
+    def _unlink(segment: _Segment):
+        try:
+            segment.shm.close()
+            segment.shm.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ [共享K线] 释放共享内存 {segment.handle.name} 失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """共享段统计"""
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "in_use": sum(1 for segment in self._segments.values() if segment.refs > 0) + len(self._retired),
+                "bytes": self._total_bytes,
+                "published": self.published,
+                "reused": self.reused,
+            }
+
+
+# ==================== 工作进程 ====================
+
+# 共享内存名 -> (映射对象, 只读列数组)，工作进程只保留最近使用的段
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]] = {}
+
+
+def attach_shared_data(handle: SharedDataHandle) -> Dict[str, np.ndarray]:
+    """
+    按句柄映射共享K线（只读，零拷贝），同一进程内重复调用直接返回已映射的数组
+
+    Returns:
+        与 BarStore.read 相同格式的列数组字典
+    """
+    entry = _attached.get(handle.name)
+    if entry is not None:
+        return entry[1]
+
+    _detach_all()
+    try:
+        # 只读取主进程创建的段，不登记到资源跟踪器（Python 3.13+）
+        shm = shared_memory.SharedMemory(name=handle.name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=handle.name)
+
+    arrays = {}
+    for name, dtype, offset in handle.columns:
+        array = np.ndarray((handle.rows,), dtype=dtype, buffer=shm.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    _attached[handle.name] = (shm, arrays)
+    return arrays
+
+
+def _detach_all():
+    """解除之前映射的段（数组仍被引用时由垃圾回收解除）"""
+    for name in list(_attached):
+        shm, arrays = _attached.pop(name)
+        arrays.clear()
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+# 全局实例
+_shared_data_server: Optional[SharedDataServer] = None
+
+
+def get_shared_data_server() -> SharedDataServer:
+    """获取共享K线服务实例（进程退出时自动释放共享内存）"""
+    global _shared_data_server
+    if _shared_data_server is None:
+        _shared_data_server = SharedDataServer()
+        atexit.register(_shared_data_server.close)
+    return _shared_data_server
@@ -212,79 +212,80 @@ def create_vnpy_compatible_strategy(strategy_class: Type[ARBIGCtaTemplate],
 
 
 # 预定义的策略适配
-def get_adapted_strategies():
-    """获取所有适配后的策略"""
-    adapted_strategies = {}
+# 策略文件映射 - 定义文件名到策略类名和显示名的映射
+STRATEGY_MAPPINGS = {
+    "MaRsiComboStrategy.py": {
+        "class_name": "MaRsiComboStrategy",
+        "display_name": "MaRsiCombo",
+        "description": "MA-RSI组合策略"
+    },
+    "MeanReversionStrategy.py": {
+        "class_name": "MeanReversionStrategy",
+        "display_name": "MeanReversion",
+        "description": "均值回归策略"
+    },
+    "BreakoutStrategy.py": {
+        "class_name": "BreakoutStrategy",
+        "display_name": "Breakout",
+        "description": "布林带突破策略"
+    },
+    "MultiModeAdaptiveStrategy.py": {
+        "class_name": "MultiModeAdaptiveStrategy",
+        "display_name": "MultiModeAdaptive",
+        "description": "多模式自适应策略"
+    },
+    "SystemIntegrationTestStrategy.py": {
+        "class_name": "SystemIntegrationTestStrategy",
+        "display_name": "SystemIntegrationTest",
+        "description": "系统集成测试策略"
+    }
+}
 
-    try:
-        # 修复导入路径 - 使用相对导入
-        import sys
-        import os
-        import glob
-        import importlib.util
 
-        # 确保能找到策略文件
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        strategies_dir = os.path.join(current_dir, '..', 'strategies')
-        if strategies_dir not in sys.path:
-            sys.path.insert(0, strategies_dir)
+def get_strategy_classes() -> Dict[str, Type[ARBIGCtaTemplate]]:
+    """获取所有ARBIG策略类（未适配，供原生回测引擎使用），键为显示名"""
+    strategy_classes = {}
 
-        # 策略文件映射 - 定义文件名到策略类名和显示名的映射
-        strategy_mappings = {
-            "MaRsiComboStrategy.py": {
-                "class_name": "MaRsiComboStrategy",
-                "display_name": "MaRsiCombo",
-                "description": "MA-RSI组合策略"
-            },
-            "MeanReversionStrategy.py": {
-                "class_name": "MeanReversionStrategy",
-                "display_name": "MeanReversion",
-                "description": "均值回归策略"
-            },
-            "BreakoutStrategy.py": {
-                "class_name": "BreakoutStrategy",
-                "display_name": "Breakout",
-                "description": "布林带突破策略"
-            },
-            "MultiModeAdaptiveStrategy.py": {
-                "class_name": "MultiModeAdaptiveStrategy",
-                "display_name": "MultiModeAdaptive",
-                "description": "多模式自适应策略"
-            },
-            "SystemIntegrationTestStrategy.py": {
-                "class_name": "SystemIntegrationTestStrategy",
-                "display_name": "SystemIntegrationTest",
-                "description": "系统集成测试策略"
-            }
-        }
+    # 确保能找到策略文件
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    strategies_dir = os.path.join(current_dir, '..', 'strategies')
+    if strategies_dir not in sys.path:
+        sys.path.insert(0, strategies_dir)
 
-        # 自动加载所有策略
-        for filename, mapping in strategy_mappings.items():
-            try:
-                module_name = filename[:-3]  # 去掉.py后缀
-                class_name = mapping["class_name"]
-                display_name = mapping["display_name"]
-                description = mapping["description"]
+    for filename, mapping in STRATEGY_MAPPINGS.items():
+        try:
+            module_name = filename[:-3]  # 去掉.py后缀
+            module = __import__(module_name)
+
+            if hasattr(module, mapping["class_name"]):
+                strategy_classes[mapping["display_name"]] = getattr(module, mapping["class_name"])
+            else:
+                logger.warning(f"模块 {module_name} 中未找到类 {mapping['class_name']}")
+
+        except ImportError as e:
+            logger.warning(f"{mapping['description']}导入失败: {e}")
+        except Exception as e:
+            logger.error(f"{mapping['description']}加载失败: {e}")
 
-                # 动态导入模块
-                module = __import__(module_name)
+    return strategy_classes
 
-                # 获取策略类
-                if hasattr(module, class_name):
-                    strategy_class = getattr(module, class_name)
 
-                    # 适配策略
-                    adapted_strategies[display_name] = create_vnpy_compatible_strategy(
-                        strategy_class, f"Adapted{display_name}"
-                    )
-                    logger.info(f"✅ {description}适配成功")
-                else:
-                    logger.warning(f"模块 {module_name} 中未找到类 {class_name}")
+def get_adapted_strategies():
+    """获取所有适配后的策略"""
+    adapted_strategies = {}
 
-            except ImportError as e:
-                logger.warning(f"{mapping['description']}导入失败: {e}")
+    try:
+        descriptions = {mapping["display_name"]: mapping["description"] for mapping in STRATEGY_MAPPINGS.values()}
+
+        # 自动加载并适配所有策略
+        for display_name, strategy_class in get_strategy_classes().items():
+            try:
+                adapted_strategies[display_name] = create_vnpy_compatible_strategy(
+                    strategy_class, f"Adapted{display_name}"
+                )
+                logger.info(f"✅ {descriptions[display_name]}适配成功")
             except Exception as e:
-                logger.error(f"{mapping['description']}适配失败: {e}")
+                logger.error(f"{descriptions[display_name]}适配失败: {e}")
 
         logger.info(f"成功适配 {len(adapted_strategies)} 个策略")
 
@@ -0,0 +1,382 @@
+"""
+滚动窗口（walk-forward）回测
+把回测区间切分为相邻的 样本内/样本外 窗口，验证参数在未参与寻优的行情上的表现：
+- 每个窗口在样本内区间用 ParameterOptimizer 寻优
+- 用样本内最优参数回测紧随其后的样本外区间（样本外起点前预留预热数据）
+- 各窗口样本外的逐日盈亏按时间拼接为一条样本外权益曲线
+
+    |---- 样本内 1 ----|-- 样本外 1 --|
+              |---- 样本内 2 ----|-- 样本外 2 --|
+                        |---- 样本内 3 ----|-- 样本外 3 --|
+
+anchored=True 时样本内起点固定为回测起点（扩张窗口），否则按 in_sample_days 滚动。
+
+各窗口的寻优和样本外回测并发提交到同一个进程池。run_setting 带 data_start/data_end（整段区间），
+整段K线由主进程写入共享内存（优化器未配置共享服务时由工作进程各读取/聚合一次），
+各窗口按时间切片复用（见 optimizer.load_worker_data）。
+"""
+
+import asyncio
+import math
+import sys
+import os
+import time
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from utils.logger import get_logger
+from utils.bar_store import get_bar_store, ns_to_datetime, trading_day_keys, TIME_COLUMN
+from .optimizer import ParameterOptimizer, expand_space, load_worker_data, SEARCH_METHODS
+
+logger = get_logger(__name__)
+
+_NS_PER_DAY = 86400 * 1_000_000_000
+
+
+def split_windows(start_ns: int, end_ns: int, in_sample_days: int, out_sample_days: int,
+                  anchored: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    切分滚动窗口
+
+    Args:
+        start_ns / end_ns: 数据区间 [start, end)（纳秒）
+        in_sample_days: 样本内天数（自然日）
+        out_sample_days: 样本外天数（自然日），也是窗口滚动步长
+        anchored: 样本内起点是否固定为 start_ns
+
+    Returns:
+        [(样本内起点, 样本外起点, 样本外终点), ...]，最后一个样本外区间截断到 end_ns
+    """
+    if in_sample_days <= 0 or out_sample_days <= 0:
+        raise ValueError("样本内/样本外天数必须大于0")
+
+    in_span = in_sample_days * _NS_PER_DAY
+    out_span = out_sample_days * _NS_PER_DAY
+
+    windows = []
+    oos_start = start_ns + in_span
+    while oos_start < end_ns:
+        is_start = start_ns if anchored else oos_start - in_span
+        windows.append((is_start, oos_start, min(oos_start + out_span, end_ns)))
+        oos_start += out_span
+    return windows
+
+
+def evaluate_out_of_sample(strategy_name: str,
+                           params: Dict[str, Any],
+                           run_setting: Dict[str, Any],
+                           oos_start_ns: int,
+                           cancel_check: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+    """
+    样本外回测（在进程池工作进程中执行）
+
+    run_setting 的 start 为预热起点，预热段同样回放（策略指标和持仓延续），
+    只统计 oos_start_ns 之后的盈亏。cancel_check 返回 False 时中止回放（见 optimizer.evaluate_params）。
+
+    Returns:
+        {"days": [交易日], "pnl": [当日盈亏], "trade_count", "bar_count"} 或 {"error": ...}
+    """
+    from .native_engine import NativeBacktestEngine
+    from .strategy_adapter import get_strategy_classes
+
+    try:
+        strategy_class = get_strategy_classes().get(strategy_name)
+        if strategy_class is None:
+            return {"error": f"策略 {strategy_name} 不存在"}
+
+        data = load_worker_data(run_setting)
+        times = np.asarray(data[TIME_COLUMN])
+        first = int(np.searchsorted(times, oos_start_ns, side='left'))
+        if first >= times.size:
+            return {"error": "样本外区间没有K线数据"}
+
+        capital = run_setting.get("capital", 1000000)
+        engine = NativeBacktestEngine(
+            capital=capital,
+            slippage=run_setting.get("slippage", 0.0),
+            rate=run_setting.get("rate"),
+            robustness_paths=0
+        )
+        result = engine.run(strategy_class, run_setting["symbol"], params,
+                            interval=run_setting.get("interval", "1m"), data=data,
+                            strategy_name=f"{strategy_name}_wf", progress_callback=cancel_check)
+        if "error" in result:
+            return {"error": result["error"], "cancelled": result.get("cancelled", False)}
+
+        # 样本外逐K线盈亏（以样本外起点前一根K线的权益为基准）
+        equity = engine.equity
+        base = equity[first - 1] if first > 0 else capital
+        pnl = np.diff(np.r_[base, equity[first:]])
+
+        # 按交易日汇总
+        oos_times = times[first:]
+        day_keys = trading_day_keys(oos_times)
+        days, inverse = np.unique(day_keys, return_inverse=True)
+        daily_pnl = np.bincount(inverse, weights=pnl)
+
+        trade_count = sum(1 for fill in engine.fills
+                          if int(fill[0].timestamp()) * 1_000_000_000 >= oos_start_ns)
+
+        return {
+            "days": np.datetime_as_string(days.astype('datetime64[D]')).tolist(),
+            "pnl": daily_pnl.tolist(),
+            "trade_count": trade_count,
+            "bar_count": int(oos_times.size),
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def curve_statistics(daily_pnl: np.ndarray, capital: float, annual_days: int = 240) -> Dict[str, Any]:
+    """由逐日盈亏计算权益曲线统计（与原生回测引擎的日收益口径一致）"""
+    daily_equity = capital + np.cumsum(daily_pnl)
+    previous = np.r_[capital, daily_equity[:-1]]
+    daily_returns = daily_pnl / previous
+    total_days = daily_returns.size
+
+    peak = np.maximum.accumulate(np.r_[capital, daily_equity])[1:]
+    drawdown = (daily_equity - peak) / peak if total_days else np.zeros(0)
+
+    total_return = float(daily_equity[-1] / capital - 1) if total_days else 0.0
+    mean_return = float(daily_returns.mean()) if total_days else 0.0
+    std_return = float(daily_returns.std()) if total_days > 1 else 0.0
+    annual_return = total_return / total_days * annual_days if total_days else 0.0
+    max_drawdown = float(drawdown.min()) if total_days else 0.0
+
+    return {
+        "total_days": total_days,
+        "capital": capital,
+        "end_balance": float(daily_equity[-1]) if total_days else capital,
+        "total_net_pnl": float(daily_pnl.sum()),
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": mean_return / std_return * math.sqrt(annual_days) if std_return else 0.0,
+        "calmar_ratio": annual_return / abs(max_drawdown) if max_drawdown else 0.0,
+        "profitable_days": int((daily_pnl > 0).sum()),
+    }
+
+
+class WalkForwardAnalyzer:
+    """
+    滚动窗口回测
+
+    用法:
+        analyzer = WalkForwardAnalyzer(ParameterOptimizer())
+        result = await analyzer.run("MaRsiCombo", {"ma_short": [3, 5, 8]}, run_setting,
+                                    in_sample_days=120, out_sample_days=30)
+    """
+
+    def __init__(self, optimizer: ParameterOptimizer,
+                 executor_factory: Optional[Callable[[], Executor]] = None):
+        """
+        Args:
+            optimizer: 样本内寻优使用的参数优化器（共用其评估缓存）
+            executor_factory: 样本外回测使用的进程池（为空时使用优化器的进程池）
+        """
+        self.optimizer = optimizer
+        self.executor_factory = executor_factory or optimizer._get_executor
+
+    async def run(self,
+                  strategy_name: str,
+                  space: Dict[str, Any],
+                  run_setting: Dict[str, Any],
+                  in_sample_days: int = 120,
+                  out_sample_days: int = 30,
+                  warmup_days: int = 5,
+                  anchored: bool = False,
+                  method: str = "grid",
+                  target_name: str = "sharpe_ratio",
+                  n_iter: int = 50,
+                  eta: int = 3,
+                  fixed_setting: Optional[Dict[str, Any]] = None,
+                  seed: Optional[int] = None,
+                  progress_callback: Optional[Callable[[int, int], Any]] = None,
+                  cancel_check: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+        """
+        运行滚动窗口回测
+
+        Args:
+            strategy_name: 策略显示名
+            space: 样本内寻优的参数空间（见 optimizer.expand_space）
+            run_setting: symbol/start/end/interval/capital/slippage/rate
+            in_sample_days / out_sample_days: 样本内/样本外天数（自然日）
+            warmup_days: 样本外回测前预热的天数（取自样本内区间末尾）
+            anchored: 样本内起点是否固定（扩张窗口）
+            method / target_name / n_iter / eta / seed: 样本内寻优设置（见 ParameterOptimizer.optimize）
+            fixed_setting: 固定不变的策略参数
+            progress_callback: 进度回调 (已完成评估数, 计划评估数)，每个窗口含寻优评估和1次样本外回测
+            cancel_check: 传给样本内评估和样本外回测的取消检查（见 optimizer.evaluate_params）
+
+        Returns:
+            各窗口结果和拼接后的样本外权益曲线，失败时包含 error
+        """
+        if method not in SEARCH_METHODS:
+            return {"error": f"不支持的搜索方式: {method}，可选 {', '.join(SEARCH_METHODS)}"}
+
+        try:
+            values = expand_space(space)
+            start_ns, end_ns = self._data_range(run_setting)
+            windows = split_windows(start_ns, end_ns, in_sample_days, out_sample_days, anchored)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"error": str(e)}
+        if not windows:
+            return {"error": f"数据区间不足 {in_sample_days} 天样本内 + 样本外窗口"}
+
+        started = time.perf_counter()
+        fixed_setting = dict(fixed_setting or {})
+
+        # 整段数据区间：只加载一次（写入共享内存），各窗口切片复用
+        base_setting = {**run_setting, "data_start": run_setting.get("start"), "data_end": run_setting.get("end")}
+        shared_data = self.optimizer.shared_data
+        shared = await shared_data.acquire_async(base_setting) if shared_data is not None else None
+        if shared is not None:
+            base_setting["shared_data"] = shared
+
+        grid_total = math.prod(len(candidates) for candidates in values.values())
+        count = grid_total if method == "grid" or grid_total <= n_iter else n_iter
+        planned = ParameterOptimizer._planned_evaluations(count, method, eta) + 1
+        done = [0] * len(windows)
+
+        def report():
+            if progress_callback is not None:
+                progress_callback(sum(done), planned * len(windows))
+
+        def window_progress(index: int):
+            def on_progress(evaluated: int, total: int):
+                done[index] = min(evaluated, planned - 1)
+                report()
+            return on_progress
+
+        async def run_window(index: int, window: Tuple[int, int, int]) -> Dict[str, Any]:
+            is_start, oos_start, oos_end = window
+            window_result = {
+                "index": index,
+                "in_sample": [ns_to_datetime(is_start).isoformat(), ns_to_datetime(oos_start).isoformat()],
+                "out_of_sample": [ns_to_datetime(oos_start).isoformat(), ns_to_datetime(oos_end).isoformat()],
+            }
+
+            optimization = await self.optimizer.optimize(
+                strategy_name, space,
+                {**base_setting, "start": ns_to_datetime(is_start), "end": ns_to_datetime(oos_start)},
+                method=method, target_name=target_name, n_iter=n_iter, eta=eta,
+                fixed_setting=fixed_setting, seed=seed, top_n=1,
+                progress_callback=window_progress(index), cancel_check=cancel_check
+            )
+            if "error" in optimization:
+                done[index] = planned
+                report()
+                return {**window_result, "error": optimization["error"]}
+
+            best_setting = {**fixed_setting, **optimization["best_setting"]}
+            warmup_start = max(start_ns, oos_start - warmup_days * _NS_PER_DAY)
+            oos_setting = {**base_setting, "start": ns_to_datetime(warmup_start), "end": ns_to_datetime(oos_end)}
+
+            try:
+                evaluation = await asyncio.get_running_loop().run_in_executor(
+                    self.executor_factory(), evaluate_out_of_sample,
+                    strategy_name, best_setting, oos_setting, oos_start, cancel_check
+                )
+            except Exception as e:
+                evaluation = {"error": str(e)}
+            done[index] = planned
+            report()
+
+            in_sample = optimization["results"][0]["basic_result"]
+            window_result.update({
+                "best_setting": optimization["best_setting"],
+                "in_sample_target": optimization["best_target"],
+                "in_sample_result": in_sample,
+            })
+            if "error" in evaluation:
+                return {**window_result, "error": evaluation["error"]}
+
+            window_result.update({
+                "out_of_sample_net_pnl": float(sum(evaluation["pnl"])),
+                "out_of_sample_days": len(evaluation["days"]),
+                "out_of_sample_trade_count": evaluation["trade_count"],
+                "days": evaluation["days"],
+                "pnl": evaluation["pnl"],
+            })
+            return window_result
+
+        logger.info(
+            f"开始滚动窗口回测: {strategy_name} {len(windows)}个窗口 "
+            f"(样本内{in_sample_days}天/样本外{out_sample_days}天{', 锚定' if anchored else ''}), {method}寻优"
+        )
+        report()
+        try:
+            window_results = await asyncio.gather(*(run_window(index, window) for index, window in enumerate(windows)))
+        finally:
+            if shared_data is not None:
+                shared_data.release(shared)
+        elapsed = time.perf_counter() - started
+
+        return self._stitch(strategy_name, window_results, run_setting, {
+            "in_sample_days": in_sample_days,
+            "out_sample_days": out_sample_days,
+            "warmup_days": warmup_days,
+            "anchored": anchored,
+            "method": method,
+            "target_name": target_name,
+        }, elapsed)
+
+    def _stitch(self, strategy_name: str, window_results: List[Dict[str, Any]],
+                run_setting: Dict[str, Any], settings: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+        """拼接各窗口样本外逐日盈亏，计算整体样本外统计"""
+        valid = [window for window in window_results if "error" not in window]
+        failed = len(window_results) - len(valid)
+        if not valid:
+            errors = [window["error"] for window in window_results]
+            return {"error": f"所有窗口回测失败: {errors[0] if errors else '无有效结果'}"}
+
+        capital = run_setting.get("capital", 1000000)
+        # 窗口边界落在交易日中间时（如夜盘属于下一交易日），同一交易日的盈亏合并
+        window_days = [day for window in valid for day in window.pop("days")]
+        window_pnl = np.array([value for window in valid for value in window.pop("pnl")], dtype=np.float64)
+        days, inverse = np.unique(np.array(window_days), return_inverse=True)
+        daily_pnl = np.bincount(inverse, weights=window_pnl, minlength=days.size)
+        equity = capital + np.cumsum(daily_pnl)
+        statistics = curve_statistics(daily_pnl, capital)
+
+        # 样本外/样本内年化收益之比（walk-forward efficiency，均按交易日年化）
+        oos_annual = [window["out_of_sample_net_pnl"] / capital / max(1, window["out_of_sample_days"]) * 240
+                      for window in valid]
+        is_annual = [window["in_sample_result"].get("annual_return") or 0.0 for window in valid]
+        mean_is = float(np.mean(is_annual))
+        efficiency = float(np.mean(oos_annual)) / mean_is if mean_is > 0 else None
+
+        logger.info(
+            f"滚动窗口回测完成: {strategy_name} {len(valid)}个窗口, 样本外收益 {statistics['total_return']:.2%}, "
+            f"最大回撤 {statistics['max_drawdown']:.2%}, 用时{elapsed:.1f}s"
+        )
+
+        return {
+            "strategy": strategy_name,
+            "settings": {**settings, "symbol": run_setting.get("symbol"), "interval": run_setting.get("interval"),
+                         "capital": capital},
+            "windows": window_results,
+            "failed_windows": failed,
+            "profitable_windows": sum(1 for window in valid if window["out_of_sample_net_pnl"] > 0),
+            "walk_forward_efficiency": efficiency,
+            "out_of_sample_result": statistics,
+            "equity_curve": {"days": days.tolist(), "equity": equity.tolist()},
+            "elapsed": round(elapsed, 3),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @staticmethod
+    def _data_range(run_setting: Dict[str, Any]) -> Tuple[int, int]:
+        """回测区间内实际K线的范围 [首根K线, 末根K线 + 1分钟)（纳秒）"""
+        times = get_bar_store().read(run_setting["symbol"], '1m', run_setting.get("start"),
+                                     run_setting.get("end"))[TIME_COLUMN]
+        if len(times) == 0:
+            raise ValueError(f"{run_setting['symbol']} 在回测区间内没有K线数据")
+        return int(times[0]), int(times[-1]) + 60 * 1_000_000_000
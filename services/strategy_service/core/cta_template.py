@@ -5,11 +5,13 @@ ARBIG CTA策略模板
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
+from collections import deque
 from datetime import datetime
 from enum import Enum
 import json
 import sys
 import os
+import time
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
 if project_root not in sys.path:
@@ -19,6 +21,7 @@ from vnpy.trader.object import TickData, BarData, OrderData, TradeData
 from vnpy.trader.constant import Direction
 from .signal_sender import SignalData
 from utils.logger import get_logger
+from utils.event_journal import get_event_journal, EVENT_ERROR
 
 logger = get_logger(__name__)
 
@@ -89,7 +92,7 @@ class ARBIGCtaTemplate(ABC):
         # 数据存储
         self.tick: Optional[TickData] = None
         self.bar: Optional[BarData] = None
-        self.bars: List[BarData] = []
+        self.bars: deque = deque(maxlen=1000)  # 最近1000根K线
         
         # 统计信息
         self.total_trades = 0
@@ -100,6 +103,11 @@ class ARBIGCtaTemplate(ABC):
         # 持仓持久化文件
         self._real_positions_file = f"data/real_positions_{strategy_name}_{symbol}.json"
 
+        # 回测模式：由回测引擎设置，使用回放数据的时间作为虚拟时钟，
+        # 不休眠、不读写实盘持仓文件、不写实盘事件日志
+        self.backtesting = False
+        self.sim_datetime: Optional[datetime] = None
+
         # 初始化策略参数
         self.update_setting(setting)
         
@@ -257,20 +265,21 @@ class ARBIGCtaTemplate(ABC):
         """
         self.target_pos = target_pos
         
-        # 计算需要调整的持仓
+        # 计算需要调整的持仓，先平后开，整体作为一个批次提交
         pos_diff = target_pos - self.pos
+        legs = []
         
         if pos_diff > 0:
             # 需要增加多头持仓
             if self.pos < 0:
                 # 当前为空头，先平仓再开多
                 cover_volume = min(abs(self.pos), pos_diff)
-                self.cover(0, cover_volume)  # 市价平空
+                legs.append((Direction.LONG, "COVER", cover_volume))  # 市价平空
                 pos_diff -= cover_volume
             
             if pos_diff > 0:
                 # 开多头仓位
-                self.buy(0, pos_diff)  # 市价买入
+                legs.append((Direction.LONG, "BUY", pos_diff))  # 市价买入
         
         elif pos_diff < 0:
             # 需要减少持仓或增加空头
@@ -279,12 +288,15 @@ class ARBIGCtaTemplate(ABC):
             if self.pos > 0:
                 # 当前为多头，先平仓再开空
                 sell_volume = min(self.pos, pos_diff)
-                self.sell(0, sell_volume)  # 市价平多
+                legs.append((Direction.SHORT, "SELL", sell_volume))  # 市价平多
                 pos_diff -= sell_volume
             
             if pos_diff > 0:
                 # 开空头仓位
-                self.short(0, pos_diff)  # 市价卖空
+                legs.append((Direction.SHORT, "SHORT", pos_diff))  # 市价卖空
+        
+        if legs:
+            self._send_orders(legs)
         
         logger.info(f"设置目标持仓: {self.strategy_name} {self.pos} -> {target_pos}")
     
@@ -320,18 +332,8 @@ class ARBIGCtaTemplate(ABC):
 
         # 架构决策 6：开仓前强制查询远程持仓；平仓（SELL/COVER）不阻塞，优先减少风险敞口
         is_open = action in ("BUY", "SHORT")
-        if is_open:
-            try:
-                remote_positions = self.signal_sender.get_positions()
-                if remote_positions.get("success") is False:
-                    logger.error(
-                        f"[{self.strategy_name}] 开仓前持仓查询失败，拒绝发送信号: "
-                        f"{remote_positions.get('message', '未知错误')}"
-                    )
-                    return ""
-            except Exception as e:
-                logger.error(f"[{self.strategy_name}] 开仓前持仓查询异常，拒绝发送信号: {e}")
-                return ""
+        if is_open and not self._check_remote_positions():
+            return ""
 
         signal = SignalData(
             strategy_name=self.strategy_name,
@@ -341,13 +343,91 @@ class ARBIGCtaTemplate(ABC):
             volume=volume,
             price=price if price > 0 else None,
             signal_type="TRADE",
-            timestamp=datetime.now()
+            timestamp=self._now()
         )
 
         order_id = self.signal_sender.send_signal(signal, time_condition)
 
         logger.info(f"发送交易信号: {self.strategy_name} {action} {volume}@{price} (time_condition={time_condition})")
         return order_id
+
+    def _send_orders(self, legs: List[tuple], time_condition: str = "GFD") -> List[str]:
+        """
+        批量发送订单信号（先平后开，一次请求）
+
+        反手时平仓腿与开仓腿共用一次持仓校验和一次HTTP往返，
+        交易服务基于同一份持仓快照拆分平今/平昨。
+
+        Args:
+            legs: [(direction, action, volume), ...] 按提交顺序，均为市价
+            time_condition: 订单有效期类型 (GFD/GFS，默认GFD激进价格)
+
+        Returns:
+            每条腿对应的订单ID列表
+        """
+        if not self.active or not self.trading:
+            logger.warning(f"策略 {self.strategy_name} 未激活或禁止交易")
+            return ["" for _ in legs]
+
+        # 旧版发送器不支持批量，逐条发送
+        if not hasattr(self.signal_sender, "send_batch"):
+            return [self._send_order(direction, action, volume, 0, False, time_condition)
+                    for direction, action, volume in legs]
+
+        # 架构决策 6：包含开仓腿时查询一次远程持仓；失败时只保留平仓腿
+        if any(action in ("BUY", "SHORT") for _, action, _ in legs):
+            if not self._check_remote_positions():
+                legs = [leg for leg in legs if leg[1] in ("SELL", "COVER")]
+                if not legs:
+                    return []
+
+        signals = [
+            SignalData(
+                strategy_name=self.strategy_name,
+                symbol=self.symbol,
+                direction=direction,
+                action=action,
+                volume=volume,
+                price=None,
+                signal_type="TRADE",
+                timestamp=self._now()
+            )
+            for direction, action, volume in legs
+        ]
+
+        order_ids = self.signal_sender.send_batch(signals, time_condition)
+
+        logger.info(
+            f"发送批量交易信号: {self.strategy_name} "
+            f"{' + '.join(f'{action} {volume}' for _, action, volume in legs)} (time_condition={time_condition})"
+        )
+        return order_ids
+
+    def _check_remote_positions(self) -> bool:
+        """开仓前查询远程持仓，查询失败或异常时拒绝开仓"""
+        try:
+            remote_positions = self.signal_sender.get_positions()
+            if remote_positions.get("success") is False:
+                logger.error(
+                    f"[{self.strategy_name}] 开仓前持仓查询失败，拒绝发送信号: "
+                    f"{remote_positions.get('message', '未知错误')}"
+                )
+                self._record_error(f"开仓前持仓查询失败: {remote_positions.get('message', '未知错误')}")
+                return False
+        except Exception as e:
+            logger.error(f"[{self.strategy_name}] 开仓前持仓查询异常，拒绝发送信号: {e}")
+            self._record_error(f"开仓前持仓查询异常: {e}")
+            return False
+        return True
+
+    def _record_error(self, message: str, **fields) -> None:
+        """记录策略错误事件（结构化事件日志）"""
+        if self.backtesting:
+            return
+        get_event_journal('strategy').emit(
+            EVENT_ERROR, strategy_name=self.strategy_name, symbol=self.symbol,
+            is_success=False, message=message, **fields
+        )
     
     # ==================== 数据处理方法 ====================
     
@@ -368,6 +448,7 @@ class ARBIGCtaTemplate(ABC):
             self.on_tick_impl(tick)
         except Exception as e:
             logger.error(f"策略 {self.strategy_name} Tick处理异常: {e}")
+            self._record_error(f"Tick处理异常: {e}", callback="on_tick")
     
     def on_bar(self, bar: BarData) -> None:
         """
@@ -383,15 +464,12 @@ class ARBIGCtaTemplate(ABC):
         self.bar = bar
         self.bars.append(bar)
 
-        # 限制历史数据长度
-        if len(self.bars) > 1000:
-            self.bars = self.bars[-1000:]
-
         # 调用策略实现
         try:
             self.on_bar_impl(bar)
         except Exception as e:
             logger.error(f"策略 {self.strategy_name} Bar处理异常: {e}")
+            self._record_error(f"Bar处理异常: {e}", callback="on_bar")
     
     def on_order(self, order: OrderData) -> None:
         """
@@ -408,6 +486,7 @@ class ARBIGCtaTemplate(ABC):
             self.on_order_impl(order)
         except Exception as e:
             logger.error(f"策略 {self.strategy_name} 订单处理异常: {e}")
+            self._record_error(f"订单处理异常: {e}", callback="on_order")
 
     def on_trade(self, trade: TradeData) -> None:
         """
@@ -487,6 +566,24 @@ class ARBIGCtaTemplate(ABC):
             self.on_trade_impl(trade)
         except Exception as e:
             logger.error(f"策略 {self.strategy_name} 成交处理异常: {e}")
+            self._record_error(f"成交处理异常: {e}", callback="on_trade")
+    
+    def load_history(self, arrays: Dict[str, Any]) -> int:
+        """
+        预热：批量加载历史K线到策略的 ArrayManager（启动前由策略引擎调用）
+
+        Args:
+            arrays: 列数据 {datetime/open/high/low/close/volume/open_interest: 数组}
+
+        Returns:
+            加载的K线数量
+        """
+        am = getattr(self, 'am', None)
+        if am is None or not hasattr(am, 'load_history') or am.count > 0:
+            return 0
+        loaded = am.load_history(arrays)
+        logger.info(f"[{self.strategy_name}] 历史K线预热完成: {loaded}根, inited={am.inited}")
+        return loaded
     
     # ==================== 抽象方法 (子类必须实现) ====================
     
@@ -553,12 +650,30 @@ class ARBIGCtaTemplate(ABC):
             "variables": self.get_variables()
         }
 
+    # ==================== 时钟（实盘为系统时间，回测为回放时间） ====================
+
+    def _now(self) -> datetime:
+        """当前时间：回测时为回放数据的时间"""
+        if self.backtesting and self.sim_datetime is not None:
+            return self.sim_datetime
+        return datetime.now()
+
+    def _time(self) -> float:
+        """当前时间戳（秒），替代 time.time()，用于信号间隔等计时"""
+        if self.backtesting and self.sim_datetime is not None:
+            return self.sim_datetime.timestamp()
+        return time.time()
+
+    def _sleep(self, seconds: float) -> None:
+        """下单间隔等待，回测时跳过"""
+        if not self.backtesting:
+            time.sleep(seconds)
+
     # ==================== 交易时间判断（通用） ====================
 
-    @staticmethod
-    def _is_trading_time() -> bool:
+    def _is_trading_time(self) -> bool:
         """SHFE 交易时间判断（日盘 + 夜盘）"""
-        now = datetime.now()
+        now = self._now()
         t = now.hour * 100 + now.minute
         if 900 <= t <= 1015:
             return True
@@ -576,6 +691,8 @@ class ARBIGCtaTemplate(ABC):
 
     def _load_real_positions(self):
         """从文件恢复持仓均价（重启后保持状态连续）"""
+        if self.backtesting:
+            return
         try:
             os.makedirs("data", exist_ok=True)
             if os.path.exists(self._real_positions_file):
@@ -599,6 +716,8 @@ class ARBIGCtaTemplate(ABC):
 
     def _save_real_positions(self):
         """持久化持仓均价到文件"""
+        if self.backtesting:
+            return
         try:
             os.makedirs("data", exist_ok=True)
             data = {}
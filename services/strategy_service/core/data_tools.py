@@ -16,9 +16,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 from vnpy.trader.object import TickData, BarData
 from vnpy.trader.constant import Direction
 from utils.logger import get_logger
+from utils.log_throttle import get_throttled_logger
 import logging
 
 logger = get_logger(__name__)
+tlog = get_throttled_logger(__name__)  # 逐tick日志限流
 
 # K线日志记录器全局变量
 bar_logger = None
@@ -71,7 +73,7 @@ class BarGenerator:
     基于Tick数据生成不同周期的K线数据
     """
     
-    def __init__(self, on_bar_callback, window: int = 0, on_window_bar_callback=None):
+    def __init__(self, on_bar_callback, window: int = 0, on_window_bar_callback=None, bar_store=None):
         """
         初始化K线生成器
         
@@ -79,10 +81,12 @@ class BarGenerator:
             on_bar_callback: 1分钟K线回调函数
             window: 时间窗口（分钟），0表示只生成1分钟K线
             on_window_bar_callback: 时间窗口K线回调函数
+            bar_store: K线列式存储（utils.bar_store.BarStore），为None时不落盘
         """
         self.on_bar = on_bar_callback
         self.window = window
         self.on_window_bar = on_window_bar_callback
+        self.bar_store = bar_store
         
         self.bar: Optional[BarData] = None
         self.window_bar: Optional[BarData] = None
@@ -99,7 +103,7 @@ class BarGenerator:
         Args:
             tick: Tick数据
         """
-        logger.debug(f"[K线生成器] 🔧 收到tick: {tick.symbol} 价格={tick.last_price} 时间={tick.datetime}")
+        tlog.debug("[K线生成器] 🔧 收到tick: %s 价格=%s 时间=%s", tick.symbol, tick.last_price, tick.datetime, rate=0.1)
 
         new_minute = False
 
@@ -114,21 +118,11 @@ class BarGenerator:
             new_minute = True
             logger.info(f"[K线生成器] 🔧 小时变化: {self.bar.datetime.hour} → {tick.datetime.hour}")
         else:
-            logger.debug(f"[K线生成器] 🔧 同一分钟内tick: {tick.datetime.strftime('%H:%M:%S')}")
+            tlog.debug("[K线生成器] 🔧 同一分钟内tick: %s", tick.datetime, rate=0.1)
         
         if new_minute:
             if self.bar:
-                logger.info(f"[K线生成器] 📊 生成1分钟K线: {self.bar.symbol} 时间={self.bar.datetime} 收盘价={self.bar.close_price}")
-
-                # 📊 记录K线数据到专用日志文件 - 支持日期自动切换
-                current_bar_logger = get_bar_logger()
-                current_bar_logger.info(f"K线生成 | {self.bar.symbol} | {self.bar.datetime.strftime('%Y-%m-%d %H:%M:%S')} | "
-                              f"开:{self.bar.open_price:.2f} | 高:{self.bar.high_price:.2f} | "
-                              f"低:{self.bar.low_price:.2f} | 收:{self.bar.close_price:.2f} | "
-                              f"量:{self.bar.volume}")
-
-                self.on_bar(self.bar)
-                self.update_window_bar(self.bar)
+                self._finish_bar()
             
             # 创建新的分钟K线
             self.bar = BarData(
@@ -158,6 +152,35 @@ class BarGenerator:
         
         self.last_tick = tick
     
+    def flush(self) -> None:
+        """
+        推送当前未完成的1分钟K线（行情结束时调用，如回测tick回放结束）
+        """
+        if self.bar:
+            self._finish_bar()
+            self.bar = None
+
+    def _finish_bar(self) -> None:
+        """当前1分钟K线完成：记录、落盘并回调"""
+        logger.info(f"[K线生成器] 📊 生成1分钟K线: {self.bar.symbol} 时间={self.bar.datetime} 收盘价={self.bar.close_price}")
+
+        # 📊 记录K线数据到专用日志文件 - 支持日期自动切换
+        current_bar_logger = get_bar_logger()
+        current_bar_logger.info(f"K线生成 | {self.bar.symbol} | {self.bar.datetime.strftime('%Y-%m-%d %H:%M:%S')} | "
+                      f"开:{self.bar.open_price:.2f} | 高:{self.bar.high_price:.2f} | "
+                      f"低:{self.bar.low_price:.2f} | 收:{self.bar.close_price:.2f} | "
+                      f"量:{self.bar.volume}")
+
+        # 📦 追加到本地K线存储（回测/预热/历史查询使用）
+        if self.bar_store is not None:
+            try:
+                self.bar_store.append_bar(self.bar)
+            except Exception as e:
+                logger.error(f"[K线生成器] K线落盘失败: {e}")
+
+        self.on_bar(self.bar)
+        self.update_window_bar(self.bar)
+
     def update_window_bar(self, bar: BarData) -> None:
         """
         更新时间窗口K线
@@ -296,6 +319,43 @@ class ArrayManager:
         self.close_array[-1] = bar.close_price
         self.volume_array[-1] = bar.volume
         self.open_interest_array[-1] = bar.open_interest
+
+    def load_history(self, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        批量加载历史K线（预热用，等价于按顺序调用N次 update_bar）
+
+        Args:
+            arrays: 列数据 {open/high/low/close/volume/open_interest: 数组}，按时间升序，
+                    与 utils.bar_store 的读取结果格式一致
+
+        Returns:
+            实际加载的K线数量
+        """
+        total = len(arrays.get('close', ()))
+        if total == 0:
+            return 0
+
+        n = min(total, self.size)
+        for name, target in (
+            ('open', self.open_array),
+            ('high', self.high_array),
+            ('low', self.low_array),
+            ('close', self.close_array),
+            ('volume', self.volume_array),
+            ('open_interest', self.open_interest_array),
+        ):
+            # 旧数据左移n位，新数据写入尾部
+            if n < self.size:
+                target[:-n] = target[n:]
+            values = arrays.get(name)
+            target[-n:] = np.asarray(values[-n:], dtype=float) if values is not None else 0.0
+
+        self.count += total
+        min_required = min(self.size, 20)
+        if not self.inited and self.count >= min_required:
+            self.inited = True
+
+        return n
     
     @property
     def open(self) -> float:
@@ -354,26 +414,21 @@ class ArrayManager:
 
         # 标准EMA算法：
         # 1. 初始EMA = 前n个数据的SMA
-        initial_sma = np.mean(all_data[:n])
+        initial_sma = float(np.mean(all_data[:n]))
         ema = initial_sma
 
-        # 2. 从第n+1个数据开始，逐个计算EMA
-        for i in range(n, len(all_data)):
-            ema = alpha * all_data[i] + (1 - alpha) * ema
-
+        # 2. 从第n+1个数据开始，逐个计算EMA（递推在Python浮点上进行，避免逐个取numpy标量）
         if array:
             # 返回EMA序列
-            ema_values = []
-            current_ema = initial_sma
-            ema_values.append(current_ema)
-
-            for i in range(n, len(all_data)):
-                current_ema = alpha * all_data[i] + (1 - alpha) * current_ema
-                ema_values.append(current_ema)
-
+            ema_values = [initial_sma]
+            for value in all_data[n:].tolist():
+                ema = alpha * value + (1 - alpha) * ema
+                ema_values.append(ema)
             return np.array(ema_values)
-        else:
-            return ema
+
+        for value in all_data[n:].tolist():
+            ema = alpha * value + (1 - alpha) * ema
+        return ema
     
     def std(self, n: int, array: bool = False):
         """
@@ -425,13 +480,13 @@ class ArrayManager:
 
         # 初始化：使用前n个值的SMA作为起始值
         if len(gains) >= n:
-            avg_gain = np.mean(gains[:n])
-            avg_loss = np.mean(losses[:n])
+            avg_gain = float(np.mean(gains[:n]))
+            avg_loss = float(np.mean(losses[:n]))
 
             # 从第n+1个值开始使用EMA
-            for i in range(n, len(gains)):
-                avg_gain = alpha * gains[i] + (1 - alpha) * avg_gain
-                avg_loss = alpha * losses[i] + (1 - alpha) * avg_loss
+            for gain, loss in zip(gains[n:].tolist(), losses[n:].tolist()):
+                avg_gain = alpha * gain + (1 - alpha) * avg_gain
+                avg_loss = alpha * loss + (1 - alpha) * avg_loss
         else:
             avg_gain = np.mean(gains) if len(gains) > 0 else 0
             avg_loss = np.mean(losses) if len(losses) > 0 else 1e-10
@@ -449,8 +504,8 @@ class ArrayManager:
             rsi_array = []
             if len(gains) >= n:
                 # 初始RSI
-                init_avg_gain = np.mean(gains[:n])
-                init_avg_loss = np.mean(losses[:n])
+                init_avg_gain = float(np.mean(gains[:n]))
+                init_avg_loss = float(np.mean(losses[:n]))
                 if init_avg_loss == 0:
                     init_avg_loss = 1e-10
                 init_rs = init_avg_gain / init_avg_loss
@@ -459,9 +514,9 @@ class ArrayManager:
                 # 后续RSI
                 avg_gain = init_avg_gain
                 avg_loss = init_avg_loss
-                for i in range(n, len(gains)):
-                    avg_gain = alpha * gains[i] + (1 - alpha) * avg_gain
-                    avg_loss = alpha * losses[i] + (1 - alpha) * avg_loss
+                for gain, loss in zip(gains[n:].tolist(), losses[n:].tolist()):
+                    avg_gain = alpha * gain + (1 - alpha) * avg_gain
+                    avg_loss = alpha * loss + (1 - alpha) * avg_loss
                     rs = avg_gain / avg_loss
                     rsi_array.append(100 - (100 / (1 + rs)))
 
@@ -550,19 +605,16 @@ class ArrayManager:
         if not self.inited:
             return 0
         
-        # 计算真实波幅
-        tr_list = []
-        for i in range(1, len(self.close_array)):
-            hl = self.high_array[i] - self.low_array[i]
-            hc = abs(self.high_array[i] - self.close_array[i-1])
-            lc = abs(self.low_array[i] - self.close_array[i-1])
-            tr = max(hl, hc, lc)
-            tr_list.append(tr)
-        
-        if len(tr_list) < n:
+        if len(self.close_array) - 1 < n:
             return 0
-        
-        return np.mean(tr_list[-n:])
+
+        # 只计算最近n根的真实波幅
+        high = self.high_array[-n:]
+        low = self.low_array[-n:]
+        pre_close = self.close_array[-n - 1:-1]
+        tr = np.maximum(high - low, np.maximum(np.abs(high - pre_close), np.abs(low - pre_close)))
+
+        return np.mean(tr)
     
     def cci(self, n: int = 20) -> float:
         """
@@ -5,7 +5,7 @@
 
 import requests
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 import sys
 import os
@@ -15,6 +15,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from vnpy.trader.constant import Direction
 from utils.logger import get_logger
+from utils.event_journal import get_event_journal, EVENT_SIGNAL
 
 
 @dataclass
@@ -55,10 +56,26 @@ class SignalSender:
         self.trading_service_url = trading_service_url
         self.session = requests.Session()
         self.order_counter = 0
+        self.event_journal = get_event_journal('strategy')
         
         logger.info(f"信号发送器初始化完成，交易服务URL: {trading_service_url}")
     
     def send_signal(self, signal: SignalData, time_condition: str = "GFD") -> str:
+        """
+        发送交易信号到交易服务，并记录信号事件
+
+        Args:
+            signal: 信号数据
+            time_condition: 订单有效期类型 (GFD/GFS)
+
+        Returns:
+            订单ID（失败时为空字符串）
+        """
+        order_id = self._post_signal(signal, time_condition)
+        self._record_signal(signal, order_id, time_condition)
+        return order_id
+
+    def _post_signal(self, signal: SignalData, time_condition: str = "GFD") -> str:
         """
         发送交易信号到交易服务
 
@@ -122,6 +139,112 @@ class SignalSender:
             logger.error(f"信号发送异常: {e}")
             return ""
     
+    def send_batch(self, signals: List[SignalData], time_condition: str = "GFD") -> List[str]:
+        """
+        批量发送交易信号，并逐腿记录信号事件
+
+        Args:
+            signals: 信号列表（按提交顺序）
+            time_condition: 订单有效期类型 (GFD/GFS)
+
+        Returns:
+            每个信号对应的订单ID列表（发送失败的位置为空字符串）
+        """
+        order_ids = self._post_batch(signals, time_condition)
+        for leg, (signal, order_id) in enumerate(zip(signals, order_ids)):
+            self._record_signal(signal, order_id, time_condition, leg=leg)
+        return order_ids
+
+    def _record_signal(self, signal: SignalData, order_id: str, time_condition: str, **fields):
+        """记录信号事件（结构化事件日志）"""
+        self.event_journal.emit(
+            EVENT_SIGNAL,
+            strategy_name=signal.strategy_name,
+            symbol=signal.symbol,
+            is_success=bool(order_id),
+            message="" if order_id else "信号发送失败",
+            action=signal.action,
+            direction=signal.direction,
+            volume=signal.volume,
+            price=signal.price,
+            signal_type=signal.signal_type,
+            time_condition=time_condition,
+            order_id=order_id,
+            **fields
+        )
+
+    def _post_batch(self, signals: List[SignalData], time_condition: str = "GFD") -> List[str]:
+        """
+        批量发送交易信号到交易服务（一次请求，多腿）
+
+        交易服务基于同一份持仓快照判断平今/平昨并按顺序提交，
+        适用于反手、目标仓位调整等需要先平后开的场景。
+
+        Args:
+            signals: 信号列表（按提交顺序）
+            time_condition: 订单有效期类型 (GFD/GFS)
+
+        Returns:
+            每个信号对应的订单ID列表（发送失败的位置为空字符串）
+        """
+        order_ids = ["" for _ in signals]
+        if not signals:
+            return order_ids
+
+        strategy_name = signals[0].strategy_name
+        try:
+            legs = []
+            for signal in signals:
+                legs.append({
+                    "symbol": signal.symbol,
+                    "direction": signal.direction.value,
+                    "action": signal.action,
+                    "volume": signal.volume,
+                    "price": signal.price,
+                    "signal_type": signal.signal_type,
+                    "timestamp": signal.timestamp.isoformat() if signal.timestamp else datetime.now().isoformat()
+                })
+
+            request_data = {
+                "strategy_name": strategy_name,
+                "time_condition": time_condition,
+                "legs": legs
+            }
+
+            url = f"{self.trading_service_url}/real_trading/strategy_signals"
+            response = self.session.post(
+                url,
+                json=request_data,
+                timeout=5.0
+            )
+
+            if response.status_code == 200:
+                result = response.json()
+                # 一条信号可能被拆分为平昨+平今两笔订单，按腿合并订单ID
+                for order in result.get("data", {}).get("orders", []):
+                    leg = order.get("leg", -1)
+                    if 0 <= leg < len(order_ids) and order.get("success"):
+                        order_ids[leg] = ",".join(filter(None, [order_ids[leg], order.get("order_id", "")]))
+
+                if result.get("success"):
+                    logger.info(f"批量信号发送成功: {strategy_name} {len(signals)}腿")
+                else:
+                    logger.error(f"批量信号部分失败: {result.get('message', '未知错误')}")
+                return order_ids
+            else:
+                logger.error(f"批量信号发送HTTP错误: {response.status_code} {response.text}")
+                return order_ids
+
+        except requests.exceptions.Timeout:
+            logger.error(f"批量信号发送超时: {strategy_name}")
+            return order_ids
+        except requests.exceptions.ConnectionError:
+            logger.error(f"无法连接到交易服务: {self.trading_service_url}")
+            return order_ids
+        except Exception as e:
+            logger.error(f"批量信号发送异常: {e}")
+            return order_ids
+
     def send_risk_signal(self, signal: SignalData) -> bool:
         """
         发送风险信号到交易服务
@@ -0,0 +1,459 @@
+"""
+模拟信号发送器
+与 SignalSender 接口一致（send_signal / send_batch / get_positions / get_trading_status），
+订单在进程内撮合，成交同步回调策略的 on_trade，供回测、模拟盘和测试使用。
+
+撮合规则（与 CtpIntegration 保持一致）:
+- GFD（默认）按激进价格委托：买入卖一价+1跳（无盘口时最新价+2跳），卖出对称，立即成交
+- 市价委托按卖一/买一价（无盘口时最新价±0.2%）立即成交
+- 其他有效期的限价委托可成交时立即成交，否则挂单，在后续K线/Tick到达时撮合
+- 上期所/能源中心平仓区分平今/平昨：单条平仓优先平昨，昨仓为零时平今，数量超过该部分持仓时拒单；
+  批量委托基于同一份持仓快照先平昨、再平今拆分，超出可平持仓的部分不发送（与 CtpIntegration 共用 split_close_volume）
+- 主动成交按对手价加不利滑点（不超过委托价），挂单成交不计滑点
+- 手续费按合约规格（ContractRegistry）区分开仓/平仓/平今计算
+
+用法（模拟盘/测试）:
+    sender = SimulatedSignalSender("au2510", slippage=0.02)
+    strategy = MaRsiComboStrategy("paper_au", "au2510", setting, sender)
+    sender.bind(strategy)
+    # 每个行情到达时先撮合，再交给策略
+    sender.update_tick(tick); strategy.on_tick(tick)
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from vnpy.trader.constant import Direction, Offset, Exchange
+from vnpy.trader.object import TradeData
+from .signal_sender import SignalData
+from utils.contract_registry import ContractSpec, get_contract_registry, split_close_volume
+from utils.trading_calendar import trading_day
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 策略动作 -> (买卖方向, 开平)
+ACTION_MAP = {
+    "BUY": (Direction.LONG, Offset.OPEN),
+    "SELL": (Direction.SHORT, Offset.CLOSE),
+    "SHORT": (Direction.SHORT, Offset.OPEN),
+    "COVER": (Direction.LONG, Offset.CLOSE),
+}
+
+# 平仓区分平今/平昨的交易所
+CLOSE_TODAY_EXCHANGES = {Exchange.SHFE, Exchange.INE}
+
+# split_close_volume 的开平类型 -> vnpy Offset
+_OFFSETS = {
+    "CLOSE": Offset.CLOSE,
+    "CLOSEYESTERDAY": Offset.CLOSEYESTERDAY,
+    "CLOSETODAY": Offset.CLOSETODAY,
+}
+
+
+@dataclass
+class SimOrder:
+    """模拟委托"""
+    order_id: str
+    direction: Direction
+    offset: Offset
+    price: float
+    volume: int
+    strategy_name: str
+
+
+class SimulatedSignalSender:
+    """
+    模拟信号发送器
+    成交记录按 (时间, 方向, 开平, 价格, 数量, 手续费, 平仓盈亏) 追加到 fills，供回测统计使用
+    """
+
+    def __init__(self,
+                 symbol: str,
+                 exchange: Exchange = Exchange.SHFE,
+                 spec: Optional[ContractSpec] = None,
+                 slippage: float = 0.0,
+                 rate: Optional[float] = None):
+        """
+        Args:
+            symbol: 合约代码
+            exchange: 交易所
+            spec: 合约规格（为空时从合约注册表获取）
+            slippage: 滑点（价格单位，主动成交时按不利方向计入）
+            rate: 按成交金额计算的手续费率（指定时替代合约规格中的手续费）
+        """
+        self.symbol = symbol
+        self.exchange = exchange
+        self.spec = spec or get_contract_registry().get(symbol)
+        if rate is not None:
+            self.spec = replace(self.spec, open_commission=0.0, close_commission=0.0,
+                                close_today_commission=0.0, commission_rate=rate)
+        self.size = self.spec.size
+        self.pricetick = self.spec.pricetick
+        self.slippage = slippage
+        self.split_close_today = exchange in CLOSE_TODAY_EXCHANGES
+        self.strategy = None
+
+        # 当前行情
+        self.datetime: Optional[datetime] = None
+        self.trading_day: Optional[date] = None
+        self.last_price = 0.0
+        self.bid_price = 0.0
+        self.ask_price = 0.0
+
+        # 持仓（今仓/昨仓分开记录）
+        self.long_today = 0
+        self.long_yesterday = 0
+        self.short_today = 0
+        self.short_yesterday = 0
+        self.long_pos = 0
+        self.long_price = 0.0
+        self.short_pos = 0
+        self.short_price = 0.0
+        self.net_pos = 0
+
+        # 订单与成交
+        self.order_counter = 0
+        self.trade_counter = 0
+        self.active_orders: Dict[str, SimOrder] = {}
+        self.fills: List[tuple] = []
+        self.commission = 0.0
+
+    def bind(self, strategy):
+        """绑定接收成交回调的策略"""
+        self.strategy = strategy
+
+    # ==================== 行情驱动 ====================
+
+    def update_bar(self, bar):
+        """新K线到达：更新行情并撮合挂单（在策略 on_bar 之前调用）"""
+        self._update_datetime(bar.datetime)
+        if self.active_orders:
+            self._match_orders(bar.low_price, bar.high_price, bar.open_price, bar.open_price)
+        self.last_price = bar.close_price
+
+    def update_tick(self, tick):
+        """新Tick到达：更新行情和盘口并撮合挂单（在策略 on_tick 之前调用）"""
+        self._update_datetime(tick.datetime)
+        self.last_price = tick.last_price
+        self.bid_price = getattr(tick, 'bid_price_1', 0.0) or 0.0
+        self.ask_price = getattr(tick, 'ask_price_1', 0.0) or 0.0
+        if self.active_orders:
+            ask = self.ask_price or self.last_price
+            bid = self.bid_price or self.last_price
+            self._match_orders(ask, bid, ask, bid)
+
+    def _update_datetime(self, dt: datetime):
+        """更新时间，进入新交易日时今仓转为昨仓"""
+        self.datetime = dt
+        day = trading_day(dt)
+        if day != self.trading_day:
+            self.trading_day = day
+            self.long_yesterday += self.long_today
+            self.long_today = 0
+            self.short_yesterday += self.short_today
+            self.short_today = 0
+
+    def _match_orders(self, long_cross: float, short_cross: float, long_open: float, short_open: float):
+        """
+        限价挂单撮合：价格穿越时按委托价成交，跳空时按开盘价成交
+
+        Args:
+            long_cross: 买单可成交的最低价（K线最低价/卖一价）
+            short_cross: 卖单可成交的最高价（K线最高价/买一价）
+            long_open: 买单跳空成交价
+            short_open: 卖单跳空成交价
+        """
+        for order in list(self.active_orders.values()):
+            if order.direction == Direction.LONG:
+                if long_cross > order.price:
+                    continue
+                fill_price = min(order.price, long_open)
+            else:
+                if short_cross < order.price:
+                    continue
+                fill_price = max(order.price, short_open)
+
+            self.active_orders.pop(order.order_id, None)
+            self._fill(order, fill_price)
+
+    # ==================== 价格 ====================
+
+    def _aggressive_price(self, direction: Direction) -> float:
+        """GFD激进价格，与 CtpIntegration._calculate_aggressive_price 一致"""
+        if direction == Direction.LONG:
+            if self.ask_price > 0:
+                price = self.ask_price + self.pricetick
+            else:
+                price = self.last_price + self.pricetick * 2
+        else:
+            if self.bid_price > 0:
+                price = self.bid_price - self.pricetick
+            else:
+                price = self.last_price - self.pricetick * 2
+        return self.spec.round_price(price)
+
+    def _market_price(self, direction: Direction) -> float:
+        """市价委托价格：对手价，无盘口时最新价±0.2%"""
+        if direction == Direction.LONG:
+            return self.ask_price if self.ask_price > 0 else self.last_price * 1.002
+        return self.bid_price if self.bid_price > 0 else self.last_price * 0.998
+
+    def _taker_price(self, direction: Direction, limit_price: float) -> float:
+        """主动成交价：对手价加不利滑点，不超过委托价"""
+        if direction == Direction.LONG:
+            return round(min((self.ask_price or self.last_price) + self.slippage, limit_price), 6)
+        return round(max((self.bid_price or self.last_price) - self.slippage, limit_price), 6)
+
+    # ==================== 开平 ====================
+
+    def _closable(self, direction: Direction) -> Tuple[int, int]:
+        """平仓方向对应的 (今仓, 昨仓)"""
+        if direction == Direction.LONG:
+            return self.short_today, self.short_yesterday
+        return self.long_today, self.long_yesterday
+
+    def _close_offset(self, direction: Direction, volume: int) -> Tuple[Optional[Offset], int]:
+        """
+        单条平仓的开平类型，与 CtpIntegration._smart_close_offset 一致：优先平昨，昨仓为零时平今
+
+        Returns:
+            (开平类型, 可平数量)，上期所平仓数量超过所选部分持仓时开平类型为 None
+        """
+        today, yesterday = self._closable(direction)
+        if not self.split_close_today:
+            return Offset.CLOSE, min(volume, today + yesterday)
+
+        if yesterday > 0:
+            offset, available = Offset.CLOSEYESTERDAY, yesterday
+        else:
+            offset, available = Offset.CLOSETODAY, today
+        if volume > available:
+            return None, available
+        return offset, volume
+
+    def _split_close(self, direction: Direction, volume: int) -> Tuple[List[Tuple[Offset, int]], int]:
+        """批量委托中的平仓按持仓快照先平昨、再平今拆分，返回 (子单, 超出可平持仓的手数)"""
+        today, yesterday = self._closable(direction)
+        parts, excess = split_close_volume(volume, yesterday, today, self.split_close_today)
+        return [(_OFFSETS[offset], part_volume) for offset, part_volume in parts], excess
+
+    # ==================== SignalSender 接口 ====================
+
+    def send_signal(self, signal: SignalData, time_condition: str = "GFD") -> str:
+        """
+        提交交易信号
+
+        Returns:
+            订单ID（被拒绝时为空字符串）
+        """
+        if self.last_price <= 0:
+            logger.warning(f"[模拟撮合] 拒绝委托: {signal.action} {signal.volume}手，尚无行情")
+            return ""
+
+        direction, offset = ACTION_MAP.get(signal.action.upper(), (signal.direction, Offset.OPEN))
+        volume = int(signal.volume)
+
+        if offset == Offset.CLOSE:
+            offset, available = self._close_offset(direction, volume)
+            if offset is None:
+                logger.warning(
+                    f"[模拟撮合] 拒绝委托: {signal.action} {volume}手，"
+                    f"{'平昨' if self._closable(direction)[1] else '平今'}可平仓位仅{available}手"
+                )
+                return ""
+            volume = min(volume, available)
+        if volume <= 0:
+            logger.warning(f"[模拟撮合] 拒绝委托: {signal.action} {signal.volume}手，可平持仓不足")
+            return ""
+
+        return self._submit(direction, offset, volume, signal, time_condition)
+
+    def send_batch(self, signals: List[SignalData], time_condition: str = "GFD") -> List[str]:
+        """
+        批量提交（先平后开），平仓腿按同一份持仓快照拆分平昨/平今
+
+        Returns:
+            每个信号对应的订单ID列表（拒绝的位置为空字符串，拆分的平仓腿返回第一笔委托ID）
+        """
+        if self.last_price <= 0:
+            logger.warning(f"[模拟撮合] 拒绝批量委托: {len(signals)}条，尚无行情")
+            return ["" for _ in signals]
+
+        order_ids = []
+        for signal in signals:
+            direction, offset = ACTION_MAP.get(signal.action.upper(), (signal.direction, Offset.OPEN))
+            volume = int(signal.volume)
+
+            if offset != Offset.CLOSE:
+                order_ids.append(self._submit(direction, offset, volume, signal, time_condition) if volume > 0 else "")
+                continue
+
+            parts, excess = self._split_close(direction, volume)
+            if not parts:
+                logger.warning(f"[模拟撮合] 拒绝委托: {signal.action} {volume}手，可平持仓不足")
+                order_ids.append("")
+                continue
+            if excess:
+                logger.warning(f"[模拟撮合] {signal.action} {volume}手超出可平持仓，只平{volume - excess}手")
+
+            leg_ids = [self._submit(direction, part_offset, part_volume, signal, time_condition)
+                       for part_offset, part_volume in parts]
+            order_ids.append(leg_ids[0])
+
+        return order_ids
+
+    def send_risk_signal(self, signal: SignalData) -> bool:
+        """风控信号：模拟环境中只记录"""
+        logger.info(f"[模拟撮合] 风控信号: {signal.strategy_name} {signal.action}")
+        return True
+
+    def cancel_all(self):
+        """撤销所有挂单"""
+        self.active_orders.clear()
+
+    def get_trading_status(self) -> Dict[str, Any]:
+        """交易服务状态（模拟环境始终可交易）"""
+        return {
+            "success": True,
+            "data": {"connected": True, "simulated": True},
+            "message": "模拟交易",
+        }
+
+    def get_positions(self) -> Dict[str, Any]:
+        """持仓信息，字段与交易服务 /real_trading/positions 一致"""
+        return {
+            "success": True,
+            "data": {
+                "symbol": self.symbol,
+                "long_position": self.long_pos,
+                "short_position": self.short_pos,
+                "net_position": self.net_pos,
+                "long_price": self.long_price,
+                "short_price": self.short_price,
+                "current_price": self.last_price,
+                "long_today": self.long_today,
+                "long_yesterday": self.long_yesterday,
+                "short_today": self.short_today,
+                "short_yesterday": self.short_yesterday,
+            },
+        }
+
+    def health_check(self) -> bool:
+        return True
+
+    # ==================== 委托与成交 ====================
+
+    def _submit(self, direction: Direction, offset: Offset, volume: int,
+                signal: SignalData, time_condition: str) -> str:
+        """生成委托：GFD/市价立即成交，可成交的限价立即成交，否则挂单"""
+        self.order_counter += 1
+        order = SimOrder(
+            order_id=f"SIM_{self.order_counter}",
+            direction=direction,
+            offset=offset,
+            price=0.0,
+            volume=volume,
+            strategy_name=signal.strategy_name,
+        )
+
+        if time_condition == "GFD":
+            order.price = self._aggressive_price(direction)
+        elif not signal.price:
+            order.price = self._market_price(direction)
+        else:
+            order.price = self.spec.round_price(signal.price)
+            if direction == Direction.LONG:
+                marketable = order.price >= (self.ask_price or self.last_price)
+            else:
+                marketable = order.price <= (self.bid_price or self.last_price)
+            if not marketable:
+                self.active_orders[order.order_id] = order
+                return order.order_id
+
+        self._fill(order, self._taker_price(direction, order.price))
+        return order.order_id
+
+    def _fill(self, order: SimOrder, price: float):
+        """成交：更新今昨仓和均价、计算手续费和平仓盈亏，记录成交并同步回调策略"""
+        volume = order.volume
+        pnl = 0.0
+
+        if order.offset == Offset.OPEN:
+            if order.direction == Direction.LONG:
+                self.long_price = (self.long_price * self.long_pos + price * volume) / (self.long_pos + volume)
+                self.long_today += volume
+            else:
+                self.short_price = (self.short_price * self.short_pos + price * volume) / (self.short_pos + volume)
+                self.short_today += volume
+        else:
+            # 挂单期间持仓可能已变化，按成交时的可平数量处理
+            volume = self._reduce_position(order.direction, order.offset, volume)
+            if volume <= 0:
+                logger.warning(f"[模拟撮合] 委托 {order.order_id} 成交时已无可平持仓，撤单")
+                return
+            if order.direction == Direction.LONG:
+                pnl = (self.short_price - price) * volume * self.size
+            else:
+                pnl = (price - self.long_price) * volume * self.size
+
+        self.long_pos = self.long_today + self.long_yesterday
+        self.short_pos = self.short_today + self.short_yesterday
+        if self.long_pos == 0:
+            self.long_price = 0.0
+        if self.short_pos == 0:
+            self.short_price = 0.0
+        self.net_pos = self.long_pos - self.short_pos
+
+        commission = self.spec.commission(order.offset.value, volume, price)
+        self.commission += commission
+        self.fills.append((self.datetime, order.direction, order.offset, price, volume, commission, pnl))
+
+        if self.strategy is None:
+            return
+
+        self.trade_counter += 1
+        trade = TradeData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            orderid=order.order_id,
+            tradeid=f"SIM_T{self.trade_counter}",
+            direction=order.direction,
+            offset=order.offset,
+            price=price,
+            volume=volume,
+            datetime=self.datetime,
+            gateway_name="SIMULATED",
+        )
+        self.strategy.on_trade(trade)
+
+    def _reduce_position(self, direction: Direction, offset: Offset, volume: int) -> int:
+        """扣减被平仓位（平今/平昨只扣对应部分，普通平仓先昨后今），返回实际平仓数量"""
+        if direction == Direction.LONG:
+            today, yesterday = self.short_today, self.short_yesterday
+        else:
+            today, yesterday = self.long_today, self.long_yesterday
+
+        if offset == Offset.CLOSETODAY:
+            volume = min(volume, today)
+            today -= volume
+        elif offset == Offset.CLOSEYESTERDAY:
+            volume = min(volume, yesterday)
+            yesterday -= volume
+        else:
+            volume = min(volume, today + yesterday)
+            from_yesterday = min(volume, yesterday)
+            yesterday -= from_yesterday
+            today -= volume - from_yesterday
+
+        if direction == Direction.LONG:
+            self.short_today, self.short_yesterday = today, yesterday
+        else:
+            self.long_today, self.long_yesterday = today, yesterday
+        return volume
@@ -16,6 +16,7 @@ import sys
 import os
 import importlib
 import importlib.util
+import numpy as np
 from pathlib import Path
 
 # 添加项目根目录到路径
@@ -23,6 +24,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 
 from vnpy.trader.object import TickData, BarData, OrderData, TradeData
 from utils.logger import get_logger
+from utils.log_throttle import get_throttled_logger
+from utils.bar_store import get_bar_store, aggregate_ticks, TIME_COLUMN
+from utils.tick_recorder import list_tick_days, load_ticks
 from .cta_template import ARBIGCtaTemplate, StrategyStatus
 from .signal_sender import SignalSender
 from .data_tools import BarGenerator, ArrayManager
@@ -30,6 +34,7 @@ from .performance import StrategyPerformance, TradeRecord
 from config.config import get_main_contract_symbol
 
 logger = get_logger(__name__)
+tlog = get_throttled_logger(__name__)  # 热点路径限流日志
 
 class StrategyEngine:
     """
@@ -295,7 +300,8 @@ class StrategyEngine:
                 logger.info(f"[策略服务-引擎] 🔧 创建K线生成器: {symbol}")
                 self.bar_generators[symbol] = BarGenerator(
                     on_bar_callback=self._on_bar,
-                    window=0  # 只生成1分钟K线
+                    window=0,  # 只生成1分钟K线
+                    bar_store=get_bar_store()
                 )
                 logger.info(f"[策略服务-引擎] ✅ K线生成器创建完成: {symbol}")
             else:
@@ -314,6 +320,61 @@ class StrategyEngine:
             logger.error(f"策略注册失败 {strategy_name}: {e}")
             return False
     
+    # 本地K线不足时，最多回看多少个tick录制日
+    WARMUP_TICK_DAYS = 3
+
+    def _load_warmup_bars(self, symbol: str, count: int) -> Dict[str, Any]:
+        """读取最近count根1分钟K线：优先K线存储，不足时用tick录制聚合"""
+        data = get_bar_store().read_last(symbol, '1m', count)
+        if len(data[TIME_COLUMN]) >= count:
+            return data
+
+        days = list_tick_days(symbol)[-self.WARMUP_TICK_DAYS:]
+        if not days:
+            return data
+
+        parts = [aggregate_ticks(load_ticks(symbol, day)) for day in days]
+        tick_bars = {name: np.concatenate([part[name] for part in parts]) for name in data}
+        if len(tick_bars[TIME_COLUMN]) <= len(data[TIME_COLUMN]):
+            return data
+
+        # K线存储中已有的部分优先，tick聚合只补更早或更晚缺失的时间段
+        if len(data[TIME_COLUMN]):
+            stored_times = np.asarray(data[TIME_COLUMN])
+            keep = ~np.isin(tick_bars[TIME_COLUMN], stored_times)
+            merged = {name: np.concatenate([tick_bars[name][keep], np.asarray(data[name])]) for name in data}
+            order = np.argsort(merged[TIME_COLUMN], kind='stable')
+            tick_bars = {name: array[order] for name, array in merged.items()}
+
+        return {name: array[-count:] for name, array in tick_bars.items()}
+
+    def _warm_up_strategy(self, strategy: ARBIGCtaTemplate) -> int:
+        """
+        启动前预热：一次性批量加载历史K线到策略和引擎的 ArrayManager
+
+        Returns:
+            加载的K线数量
+        """
+        try:
+            am = getattr(strategy, 'am', None)
+            engine_am = self.array_managers.get(strategy.symbol)
+            size = max(getattr(am, 'size', 0) or 0, getattr(engine_am, 'size', 0) or 0)
+            if size <= 0:
+                return 0
+
+            data = self._load_warmup_bars(strategy.symbol, size)
+            if len(data[TIME_COLUMN]) == 0:
+                logger.info(f"[策略服务-引擎] {strategy.strategy_name} 无本地历史数据，跳过预热")
+                return 0
+
+            if engine_am is not None and engine_am.count == 0:
+                engine_am.load_history(data)
+            return strategy.load_history(data)
+
+        except Exception as e:
+            logger.error(f"[策略服务-引擎] 策略预热失败 {strategy.strategy_name}: {e}")
+            return 0
+
     def start_strategy(self, strategy_name: str) -> bool:
         """
         启动策略
@@ -335,6 +396,9 @@ class StrategyEngine:
                 logger.warning(f"策略 {strategy_name} 已在运行")
                 return True
             
+            # 用本地历史数据预热指标
+            self._warm_up_strategy(strategy)
+
             # 启动策略
             logger.info(f"🔧 正在启动策略: {strategy_name}")
             strategy.start()
@@ -534,15 +598,14 @@ class StrategyEngine:
         while self.running:
             try:
                 loop_count += 1
-                if loop_count % 10 == 1:  # 每10秒输出一次状态
-                    logger.info(f"🔧 数据处理循环运行中... (第{loop_count}次)")
-                    logger.info(f"🔧 当前启动策略数量: {len(self.active_strategies)}")
-                    logger.info(f"🔧 启动策略列表: {self.active_strategies}")
+                # 每分钟输出一次状态
+                tlog.info("🔧 数据处理循环运行中... (第%d次) 启动策略%d个: %s",
+                          loop_count, len(self.active_strategies), self.active_strategies, rate=1 / 60)
 
                 # 🎯 在调度层控制交易时间 - 最优架构
                 if self._is_trading_time():
                     # 只在交易时间获取市场数据
-                    logger.info(f"🔧 交易时间内，调用_fetch_market_data, 启动策略: {len(self.active_strategies)}")
+                    tlog.debug("🔧 交易时间内，调用_fetch_market_data, 启动策略: %d", len(self.active_strategies), rate=1 / 60)
                     self._fetch_market_data()
                 else:
                     # 非交易时间，跳过数据获取，节省资源
@@ -671,7 +734,7 @@ class StrategyEngine:
             # 🔌 调试：记录收到的 tick
             symbol = tick_info.get("symbol", "unknown")
             price = tick_info.get("last_price", 0)
-            logger.info(f"🔌 [WS] 收到tick推送: {symbol} @ {price:.2f}")
+            tlog.info("🔌 [WS] 收到tick推送: %s @ %.2f", symbol, price, rate=0.2)
 
             if not tick_info or not self.active_strategies:
                 logger.debug(f"🔌 [WS] 跳过tick: tick_info={bool(tick_info)}, active={len(self.active_strategies)}")
@@ -820,13 +883,14 @@ class StrategyEngine:
         try:
             # 🔧 检查是否有启动的策略
             if not self.active_strategies:
-                logger.info("[策略服务-引擎] 🔧 没有启动的策略，跳过行情分发")
+                tlog.info("[策略服务-引擎] 🔧 没有启动的策略，跳过行情分发", rate=1 / 60)
                 return
 
             # 🔧 从配置获取主力合约行情
             main_contract = get_main_contract_symbol()
             symbols_to_fetch = [main_contract]
-            logger.info(f"[策略服务-引擎] 🔧 开始获取行情数据，品种: {symbols_to_fetch}, 启动策略: {len(self.active_strategies)}个")
+            tlog.debug("[策略服务-引擎] 🔧 开始获取行情数据，品种: %s, 启动策略: %d个",
+                       symbols_to_fetch, len(self.active_strategies), rate=0.1)
 
             # 🔧 从交易服务获取实时tick数据
             for symbol in symbols_to_fetch:
@@ -844,7 +908,7 @@ class StrategyEngine:
                     if tick_data.get("success") and tick_data.get("data"):
                         # 🔧 创建TickData对象并分发给策略
                         tick_info = tick_data["data"]
-                        logger.info(f"[策略服务-引擎] 📈 收到tick数据: {symbol} 价格={tick_info.get('last_price')}")
+                        tlog.info("[策略服务-引擎] 📈 收到tick数据: %s 价格=%s", symbol, tick_info.get('last_price'), rate=0.1)
 
                         tick = self._create_tick_data(tick_info)
 
@@ -860,19 +924,19 @@ class StrategyEngine:
 
                         # 🔧 启用1分钟K线生成 - 调度层已控制交易时间
                         if symbol in self.bar_generators:
-                            logger.info(f"[策略服务-引擎] 🔧 更新K线生成器: {symbol}")
+                            tlog.debug("[策略服务-引擎] 🔧 更新K线生成器: %s", symbol, rate=0.1)
                             self.bar_generators[symbol].update_tick(tick)
                         else:
-                            logger.warning(f"[策略服务-引擎] ⚠️ 没有找到K线生成器: {symbol}")
-                            logger.info(f"[策略服务-引擎] 🔧 当前K线生成器: {list(self.bar_generators.keys())}")
+                            tlog.warning("[策略服务-引擎] ⚠️ 没有找到K线生成器: %s, 当前K线生成器: %s",
+                                         symbol, list(self.bar_generators.keys()), rate=1 / 60)
                     else:
-                        logger.warning(f"🔧 {symbol} tick数据无效: {tick_data}")
+                        tlog.warning("🔧 %s tick数据无效: %s", symbol, tick_data, rate=0.1)
 
                 else:
-                    logger.warning(f"🔧 获取 {symbol} tick数据失败: {response.status_code}")
+                    tlog.warning("🔧 获取 %s tick数据失败: %s", symbol, response.status_code, rate=0.1)
 
         except Exception as e:
-            logger.error(f"🔧 行情数据获取异常: {e}")
+            tlog.error("🔧 行情数据获取异常: %s", e, rate=0.2)
 
     def _create_tick_data(self, tick_info: dict) -> TickData:
         """创建TickData对象"""
@@ -28,13 +28,15 @@ logger = logging.getLogger(__name__)
 
 # 导入回测API
 try:
-    from services.strategy_service.api.backtest_api import router as backtest_router
+    from services.strategy_service.api.backtest_api import router as backtest_router, backtest_manager, job_manager
     BACKTEST_AVAILABLE = True
     logger.info("专业回测模块加载成功")
 except ImportError as e:
     BACKTEST_AVAILABLE = False
     logger.warning(f"专业回测模块加载失败: {e}")
     backtest_router = None
+    backtest_manager = None
+    job_manager = None
 
 
 # 全局策略引擎实例
@@ -47,6 +49,10 @@ async def lifespan(app: FastAPI):
     
     # 启动时初始化
     logger.info("ARBIG策略执行服务启动中...")
+
+    # 回测任务进度共享进程
+    if job_manager:
+        await job_manager.start()
     
     # 创建策略引擎
     strategy_engine = StrategyEngine(trading_service_url="http://localhost:8001")
@@ -69,6 +75,10 @@ async def lifespan(app: FastAPI):
     logger.info("ARBIG策略执行服务关闭中...")
     if strategy_engine:
         strategy_engine.stop_engine()
+    if job_manager:
+        job_manager.shutdown()
+    if backtest_manager:
+        backtest_manager.shutdown()
     logger.info("策略执行服务关闭完成")
 
 app = FastAPI(
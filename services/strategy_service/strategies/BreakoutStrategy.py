@@ -10,7 +10,6 @@
 适用场景：趋势启动阶段，价格突破重要通道边界
 """
 
-import time
 import json
 import os
 import numpy as np
@@ -390,7 +389,7 @@ class BreakoutStrategy(ARBIGCtaTemplate):
                 logger.warning(f"⚠️ [持仓管理] 多头已达上限{long_position}/{self.max_position}手")
             else:
                 if need_delay:
-                    time.sleep(0.1)
+                    self._sleep(0.1)
                 if long_position == 0:
                     logger.info(f"🚀 [开仓] 上突破开多{trade_volume}手")
                 else:
@@ -411,7 +410,7 @@ class BreakoutStrategy(ARBIGCtaTemplate):
                 logger.warning(f"⚠️ [持仓管理] 空头已达上限{short_position}/{self.max_position}手")
             else:
                 if need_delay:
-                    time.sleep(0.1)
+                    self._sleep(0.1)
                 if short_position == 0:
                     logger.info(f"🚀 [开仓] 下突破开空{trade_volume}手")
                 else:
@@ -421,7 +420,7 @@ class BreakoutStrategy(ARBIGCtaTemplate):
         # 更新持仓缓存
         old_cache = self.cached_position
         self.cached_position = self.pos
-        self.last_position_update = time.time()
+        self.last_position_update = self._time()
         logger.debug(f"[缓存更新] {old_cache} → {self.pos}")
 
     def _close_position_by_direction(self, direction: str, volume: int, price: float, entry_price: float, reason: str):
@@ -484,7 +483,7 @@ class BreakoutStrategy(ARBIGCtaTemplate):
                     self.sell(price, yesterday_volume, stop=False)
                 else:
                     self.cover(price, yesterday_volume, stop=False)
-                time.sleep(0.1)
+                self._sleep(0.1)
             if today_volume > 0:
                 if direction == 'LONG':
                     self.sell(price, today_volume, stop=False)
@@ -543,7 +542,7 @@ class BreakoutStrategy(ARBIGCtaTemplate):
         # 更新持仓缓存
         old_cache = self.cached_position
         self.cached_position = self.pos
-        self.last_position_update = time.time()
+        self.last_position_update = self._time()
         logger.debug(f"[缓存更新] {old_cache} → {self.pos}")
 
     def _calculate_position_size(self, signal_strength: float = 1.0) -> int:
@@ -5,7 +5,6 @@ MA-RSI组合策略 - 黄金期货专业交易策略
 详细设计文档见：MaRsiComboStrategy_design.md
 """
 
-import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 import sys
@@ -236,7 +235,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
         # 🛡️ 实时风控检查在on_tick_impl中处理，K线级别专注信号生成
 
         # 检查信号间隔（避免频繁交易）
-        current_time = time.time()
+        current_time = self._time()
         time_since_last_signal = current_time - self.last_signal_time
         # 2025-12-29 修复：使用 <= 避免边界条件问题（参考 EnhancedMaRsiComboStrategy）
         if time_since_last_signal <= self.min_signal_interval:
@@ -709,7 +708,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
                     self.sell(price, yesterday_volume, stop=False)
                 else:
                     self.cover(price, yesterday_volume, stop=False)
-                time.sleep(0.1)  # 短暂延迟，避免订单冲突
+                self._sleep(0.1)  # 短暂延迟，避免订单冲突
             # 再平今仓
             if today_volume > 0:
                 if direction == 'LONG':
@@ -761,7 +760,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
                 logger.warning(f"⚠️ [持仓管理] 多头已达上限{long_position}/{self.max_position}手，不开新仓")
             else:
                 if need_delay:
-                    time.sleep(0.1)
+                    self._sleep(0.1)
                 if long_position == 0:
                     logger.info(f"🚀 [开仓] 金叉开多{trade_volume}手")
                 else:
@@ -783,7 +782,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
                 logger.warning(f"⚠️ [持仓管理] 空头已达上限{short_position}/{self.max_position}手，不开新仓")
             else:
                 if need_delay:
-                    time.sleep(0.1)
+                    self._sleep(0.1)
                 if short_position == 0:
                     logger.info(f"🚀 [开仓] 死叉开空{trade_volume}手")
                 else:
@@ -791,7 +790,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
                 self.short(current_price, trade_volume, stop=False)
 
         # 更新信号时间
-        self.last_signal_time = time.time()
+        self.last_signal_time = self._time()
         logger.info(f"✅ [持仓管理] {action}信号处理完成")
 
     def on_tick_impl(self, tick: TickData):
@@ -819,7 +818,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
         # 🎯 更新持仓缓存（直接使用父类属性，不再查询CTP）
         old_cache = self.cached_position
         self.cached_position = self.pos
-        self.last_position_update = time.time()
+        self.last_position_update = self._time()
         logger.debug(f"[缓存更新] {old_cache} → {self.pos}")
 
     def _log_trade_info(self, trade):
@@ -827,10 +826,12 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
         logger.info(f"💰 [成交] {trade.direction.value} {trade.offset} {trade.volume}手 @ {trade.price:.2f} | 持仓→{self.pos}手")
 
     def _log_indicators_to_csv(self, bar, analysis):
-        """📊 记录指标数据到CSV文件"""
+        """📊 记录指标数据到CSV文件（回测时不记录）"""
         import csv
         import os
-        from datetime import datetime
+
+        if self.backtesting:
+            return
 
         try:
             # 创建logs目录
@@ -839,7 +840,7 @@ class MaRsiComboStrategy(ARBIGCtaTemplate):
                 os.makedirs(log_dir)
 
             # CSV文件路径 - 按日期分文件
-            today = datetime.now().strftime('%Y%m%d')
+            today = self._now().strftime('%Y%m%d')
             csv_file = f"{log_dir}/indicators_{self.strategy_name}_{self.symbol}_{today}.csv"
 
             # 检查文件是否存在，如果不存在则创建并写入表头
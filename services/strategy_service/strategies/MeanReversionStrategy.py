@@ -11,7 +11,6 @@
 适用场景：震荡行情，价格在布林带通道内来回波动
 """
 
-import time
 import json
 import os
 from typing import Dict, Any, Optional
@@ -392,7 +391,7 @@ class MeanReversionStrategy(ARBIGCtaTemplate):
 
             # 开多
             if need_delay:
-                time.sleep(0.1)
+                self._sleep(0.1)
             logger.info(f"📈 [开多] {volume}手 @ {price:.2f} | {reason}")
             self.buy(price, volume, stop=False)
 
@@ -410,7 +409,7 @@ class MeanReversionStrategy(ARBIGCtaTemplate):
 
             # 开空
             if need_delay:
-                time.sleep(0.1)
+                self._sleep(0.1)
             logger.info(f"📉 [开空] {volume}手 @ {price:.2f} | {reason}")
             self.short(price, volume, stop=False)
 
@@ -512,7 +511,7 @@ class MeanReversionStrategy(ARBIGCtaTemplate):
         # 更新持仓缓存
         old_cache = self.cached_position
         self.cached_position = self.pos
-        self.last_position_update = time.time()
+        self.last_position_update = self._time()
         logger.debug(f"[缓存更新] {old_cache} → {self.pos}")
 
     def _calculate_position_size(self, signal_strength: float = 1.0) -> int:
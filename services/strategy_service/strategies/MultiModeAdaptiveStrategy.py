@@ -29,7 +29,6 @@
 - ✅ 专业交易员使用（需要理解多种策略逻辑）
 """
 
-import time
 import numpy as np
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -300,7 +299,7 @@ class MultiModeAdaptiveStrategy(ARBIGCtaTemplate):
             if self.pos >= 0:  # 开空仓
                 self.entry_price = price
                 
-        self.last_signal_time = time.time()
+        self.last_signal_time = self._time()
         
         self.write_log(f"📊 信号 #{self.signal_count}: {signal} {volume}手")
         self.write_log(f"   原因: {reason}")
@@ -453,7 +452,7 @@ class MultiModeAdaptiveStrategy(ARBIGCtaTemplate):
             return
 
         # 检查信号间隔
-        current_time = time.time()
+        current_time = self._time()
         if current_time - self.last_signal_time < self.min_signal_interval:
             return
 
@@ -24,7 +24,6 @@
 - ✅ 性能基准测试
 """
 
-import time
 import random
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -122,7 +121,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
     def on_start(self):
         """策略启动回调"""
         try:
-            self.last_signal_time = time.time()
+            self.last_signal_time = self._time()
             self.write_log("🚀 测试策略已启动")
             logger.info(f"✅ TestStrategy on_start 执行成功: {self.strategy_name}")
         except Exception as e:
@@ -147,7 +146,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
 
         # 记录价格历史（用于分析）
         self.last_price_history.append({
-            'timestamp': time.time(),
+            'timestamp': self._time(),
             'price': tick.last_price,
             'volume': getattr(tick, 'volume', 0)
         })
@@ -156,7 +155,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
         if len(self.last_price_history) > 100:
             self.last_price_history = self.last_price_history[-100:]
 
-        current_time = time.time()
+        current_time = self._time()
 
         # 检查是否到了生成信号的时间
         if current_time - self.last_signal_time < self.signal_interval:
@@ -253,7 +252,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
                 if real_position is not None:
                     old_cache = self.cached_position
                     self.cached_position = real_position
-                    self.last_position_update = time.time()
+                    self.last_position_update = self._time()
                     self.write_log(f"🔧 成交后缓存更新: {old_cache} → {real_position}")
 
             # 在后台线程中更新缓存
@@ -335,7 +334,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
     def _generate_signal_with_cached_position(self, tick: TickData):
         """🔧 优化版信号生成：基于缓存持仓做初步判断，减少服务压力"""
         current_price = tick.last_price
-        current_time = time.time()
+        current_time = self._time()
 
         # 🚨 紧急风控：检查信号锁定
         if self.signal_lock:
@@ -374,7 +373,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
             self.write_log(f"🔄 持仓缓存更新: {self.cached_position} → {real_position}")
             self.cached_position = real_position
             self.pos = real_position  # 同步到策略持仓
-            self.last_position_update = time.time()
+            self.last_position_update = self._time()
 
         # 基于真实持仓进行精确风控检查
         predicted_position_buy = abs(real_position + self.trade_volume)
@@ -427,7 +426,7 @@ class SystemIntegrationTestStrategy(ARBIGCtaTemplate):
     def _analyze_market_conditions(self, tick: TickData) -> dict:
         """分析当前市场条件"""
         current_price = tick.last_price
-        current_time = time.time()
+        current_time = self._time()
 
         analysis = {
             'current_price': current_price,
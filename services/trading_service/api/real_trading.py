@@ -3,9 +3,10 @@
 提供真实的CTP交易功能
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
+import asyncio
 import uuid
 
 from services.trading_service.core.ctp_integration import get_ctp_integration
@@ -72,15 +73,19 @@ async def subscribe_symbol(symbol: str):
         raise HTTPException(status_code=500, detail=f"订阅合约失败: {str(e)}")
 
 @router.get("/account")
-async def get_account_info():
-    """获取账户信息"""
+async def get_account_info(request: Request, response: Response):
+    """获取账户信息（支持 ETag / If-None-Match，账户未变化时返回304）"""
     try:
         ctp = get_ctp_integration()
-        account_info = ctp.get_account_info()
+        account_info, version, etag = ctp.account_snapshot.get()
 
         if not account_info:
             raise HTTPException(status_code=404, detail="账户信息不可用，请检查CTP连接")
 
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
         return {
             "success": True,
             "data": account_info,
@@ -94,10 +99,23 @@ async def get_account_info():
         raise HTTPException(status_code=500, detail=f"获取账户信息失败: {str(e)}")
 
 @router.get("/positions")
-async def get_positions(symbol: Optional[str] = None):
+async def get_positions(
+    symbol: Optional[str] = None,
+    refresh: bool = Query(False, description="是否先向CTP重新查询持仓")
+):
     """获取持仓信息"""
     try:
         ctp = get_ctp_integration()
+
+        if refresh:
+            # 等待刷新完成但不阻塞事件循环；刷新期间缓存仍是完整的旧数据
+            future = ctp.request_position_refresh()
+            if future is not None:
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout=ctp.POSITION_REFRESH_TIMEOUT + 1.0)
+                except Exception as e:
+                    logger.warning(f"持仓刷新未完成，返回缓存数据: {e}")
+
         position_info = ctp.get_position_info(symbol)
 
         return {
@@ -111,6 +129,23 @@ async def get_positions(symbol: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"获取持仓信息失败: {str(e)}")
 
 
+@router.get("/pnl")
+async def get_pnl_summary():
+    """获取盈亏台账摘要（已实现盈亏、按合约/策略汇总、未平批次）"""
+    try:
+        ctp = get_ctp_integration()
+
+        return {
+            "success": True,
+            "data": ctp.order_store.pnl_ledger.get_summary(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"获取盈亏台账失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取盈亏台账失败: {str(e)}")
+
+
 @router.get("/ticks/debug")
 async def debug_ticks():
     """调试：获取行情数据键名"""
@@ -164,6 +199,42 @@ async def get_real_tick(symbol: str):
         logger.error(f"获取真实行情失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取真实行情失败: {str(e)}")
 
+@router.get("/history/{symbol}")
+async def get_history_bars(
+    symbol: str,
+    interval: str = Query("1m", description="K线周期：1m/5m/15m/30m/1h/1d"),
+    count: int = Query(100, ge=1, le=10000, description="返回最近N根K线（未指定start时生效）"),
+    start: Optional[str] = Query(None, description="开始时间（含），格式：YYYY-MM-DD HH:MM:SS"),
+    end: Optional[str] = Query(None, description="结束时间（不含），格式：YYYY-MM-DD HH:MM:SS")
+):
+    """获取历史K线（来自本地K线存储）"""
+    try:
+        try:
+            start_time = datetime.fromisoformat(start) if start else None
+            end_time = datetime.fromisoformat(end) if end else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="时间格式错误，应为：YYYY-MM-DD HH:MM:SS")
+
+        ctp = get_ctp_integration()
+        bars = ctp.get_historical_data(symbol, interval, count, start_time, end_time)
+
+        return {
+            "success": True,
+            "data": {
+                "symbol": symbol,
+                "interval": interval,
+                "bars": bars,
+                "count": len(bars)
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取历史K线失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取历史K线失败: {str(e)}")
+
 @router.get("/trades/{strategy_name}")
 async def get_strategy_trades(
     strategy_name: str,
@@ -393,6 +464,52 @@ async def simple_close_position(request: Dict[str, Any]):
         logger.error(f"简单平仓失败: {e}")
         raise HTTPException(status_code=500, detail=f"简单平仓失败: {str(e)}")
 
+def _convert_strategy_signal(action: str, direction: str) -> Tuple[str, str]:
+    """将策略信号(action + direction)转换为CTP买卖方向和开平仓类型
+
+    Returns:
+        (trade_direction, offset)，offset 为 AUTO 时由交易服务按持仓智能判断平今/平昨
+    """
+    if action == 'BUY':
+        if direction == 'LONG':
+            trade_direction = 'BUY'   # 开多仓
+            offset = 'OPEN'
+        else:  # SHORT - 这种组合不常见，但处理为平空仓
+            trade_direction = 'BUY'   # 平空仓
+            offset = 'AUTO'
+    elif action == 'SELL':
+        if direction == 'LONG':
+            trade_direction = 'SELL'  # 平多仓
+            offset = 'AUTO'
+        else:  # SHORT - vnpy标准：卖出平仓（平多仓）
+            trade_direction = 'SELL'  # 平多仓
+            offset = 'AUTO'
+    elif action == 'SHORT':
+        # vnpy标准：卖出开仓（空头建仓）
+        trade_direction = 'SELL'  # 开空仓
+        offset = 'OPEN'
+    elif action == 'COVER':
+        # vnpy标准：买入平仓（空头平仓）
+        trade_direction = 'BUY'   # 平空仓
+        offset = 'AUTO'
+    elif action == 'OPEN':
+        if direction == 'LONG':
+            trade_direction = 'BUY'   # 开多仓
+            offset = 'OPEN'
+        else:  # SHORT
+            trade_direction = 'SELL'  # 开空仓
+            offset = 'OPEN'
+    else:  # CLOSE
+        if direction == 'LONG':
+            trade_direction = 'SELL'  # 平多仓
+            offset = 'AUTO'
+        else:  # SHORT
+            trade_direction = 'BUY'   # 平空仓
+            offset = 'AUTO'
+
+    return trade_direction, offset
+
+
 @router.post("/strategy_signal")
 async def handle_strategy_signal(request: Dict[str, Any]):
     """处理策略信号"""
@@ -429,45 +546,10 @@ async def handle_strategy_signal(request: Dict[str, Any]):
         ctp = get_ctp_integration()
 
         # 🔧 修复信号转换逻辑
-        if action == 'BUY':
-            if direction == 'LONG':
-                trade_direction = 'BUY'   # 开多仓
-                offset = 'OPEN'
-            else:  # SHORT - 这种组合不常见，但处理为平空仓
-                trade_direction = 'BUY'   # 平空仓
-                offset = 'AUTO'
-        elif action == 'SELL':
-            if direction == 'LONG':
-                trade_direction = 'SELL'  # 平多仓
-                offset = 'AUTO'
-            else:  # SHORT - vnpy标准：卖出平仓（平多仓）
-                trade_direction = 'SELL'  # 平多仓
-                offset = 'AUTO'
-        elif action == 'SHORT':
-            # vnpy标准：卖出开仓（空头建仓）
-            trade_direction = 'SELL'  # 开空仓
-            offset = 'OPEN'
-        elif action == 'COVER':
-            # vnpy标准：买入平仓（空头平仓）
-            trade_direction = 'BUY'   # 平空仓
-            offset = 'AUTO'
-        elif action == 'OPEN':
-            if direction == 'LONG':
-                trade_direction = 'BUY'   # 开多仓
-                offset = 'OPEN'
-            else:  # SHORT
-                trade_direction = 'SELL'  # 开空仓
-                offset = 'OPEN'
-        else:  # CLOSE
-            if direction == 'LONG':
-                trade_direction = 'SELL'  # 平多仓
-                offset = 'AUTO'
-            else:  # SHORT
-                trade_direction = 'BUY'   # 平空仓
-                offset = 'AUTO'
+        trade_direction, offset = _convert_strategy_signal(action, direction)
 
         # 发送GFD订单到CTP（激进价格）
-        ctp_order_id = ctp.send_order(symbol, trade_direction, volume, price, order_type, offset, time_condition)
+        ctp_order_id = ctp.send_order(symbol, trade_direction, volume, price, order_type, offset, time_condition, strategy_name)
 
         if not ctp_order_id:
             raise HTTPException(status_code=500, detail="CTP订单发送失败")
@@ -496,6 +578,94 @@ async def handle_strategy_signal(request: Dict[str, Any]):
         logger.error(f"处理策略信号失败: {e}")
         raise HTTPException(status_code=500, detail=f"处理策略信号失败: {str(e)}")
 
+@router.post("/strategy_signals")
+async def handle_strategy_signals(request: Dict[str, Any]):
+    """批量处理策略信号 - 多腿/目标仓位调整一次提交
+
+    所有腿基于同一份持仓快照判断平今/平昨，并按顺序一次性提交，
+    避免反手(先平后开)时两次请求之间与其他策略的订单交错。
+    """
+    try:
+        # 验证必需参数
+        required_fields = ['strategy_name', 'legs']
+        for field in required_fields:
+            if field not in request:
+                raise HTTPException(status_code=400, detail=f"缺少必需参数: {field}")
+
+        strategy_name = request['strategy_name']
+        legs = request['legs']
+        time_condition = request.get('time_condition', 'GFD').upper()
+        stop_on_error = bool(request.get('stop_on_error', True))
+
+        if not isinstance(legs, list) or not legs:
+            raise HTTPException(status_code=400, detail="legs必须是非空列表")
+
+        # 逐腿校验并转换为CTP订单参数
+        orders: List[Dict[str, Any]] = []
+        for index, leg in enumerate(legs):
+            for field in ['direction', 'action', 'volume']:
+                if field not in leg:
+                    raise HTTPException(status_code=400, detail=f"第{index + 1}腿缺少必需参数: {field}")
+
+            symbol = leg.get('symbol', request.get('symbol'))
+            if not symbol:
+                raise HTTPException(status_code=400, detail=f"第{index + 1}腿缺少必需参数: symbol")
+
+            direction = leg['direction'].upper()
+            action = leg['action'].upper()
+            volume = int(leg['volume'])
+            price = float(leg.get('price') or 0)
+
+            if direction not in ['LONG', 'SHORT']:
+                raise HTTPException(status_code=400, detail=f"第{index + 1}腿direction必须是LONG或SHORT")
+
+            if action not in ['BUY', 'SELL', 'SHORT', 'COVER', 'OPEN', 'CLOSE']:
+                raise HTTPException(status_code=400, detail=f"第{index + 1}腿action必须是BUY、SELL、SHORT、COVER、OPEN或CLOSE")
+
+            if volume <= 0:
+                raise HTTPException(status_code=400, detail=f"第{index + 1}腿volume必须大于0")
+
+            trade_direction, offset = _convert_strategy_signal(action, direction)
+            orders.append({
+                'symbol': symbol,
+                'direction': trade_direction,
+                'volume': volume,
+                'price': price,
+                'order_type': 'MARKET' if price == 0 else 'LIMIT',
+                'offset': offset,
+                'time_condition': leg.get('time_condition', time_condition).upper(),
+                'action': action,
+                'signal_direction': direction,
+                'strategy_name': strategy_name
+            })
+
+        logger.info(f"📨 收到批量策略信号: {strategy_name} {len(orders)}腿 (time_condition={time_condition})")
+
+        ctp = get_ctp_integration()
+        results = await ctp.send_order_batch_async(orders, stop_on_error=stop_on_error)
+
+        # 按腿统计：一腿可能拆分为平昨+平今多笔，全部子单成功（且未被截断）才算该腿成功
+        failed_legs = {r['leg'] for r in results if not r['success']}
+        success_count = len({r['leg'] for r in results} - failed_legs)
+        logger.info(f"✅ 批量策略信号处理完成: {strategy_name} 成功{success_count}/{len(orders)}腿")
+
+        return {
+            "success": success_count == len(orders),
+            "message": "批量策略信号处理成功" if success_count == len(orders) else f"部分订单发送失败({success_count}/{len(orders)})",
+            "data": {
+                "strategy_name": strategy_name,
+                "orders": results,
+                "count": len(results)
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量处理策略信号失败: {e}")
+        raise HTTPException(status_code=500, detail=f"批量处理策略信号失败: {str(e)}")
+
 @router.post("/test_connection")
 async def test_ctp_connection():
     """测试CTP连接"""
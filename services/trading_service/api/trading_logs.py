@@ -73,6 +73,68 @@ async def get_trading_logs(
         raise HTTPException(status_code=500, detail=f"获取交易日志失败: {str(e)}")
 
 
+@router.get("/events")
+async def get_trading_events(
+    event_type: Optional[str] = Query(None, description="事件类型: ORDER, TRADE, SIGNAL, ERROR"),
+    strategy_name: Optional[str] = Query(None, description="策略名称"),
+    symbol: Optional[str] = Query(None, description="合约代码"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    limit: int = Query(100, description="返回条数", ge=1, le=1000),
+    offset: int = Query(0, description="偏移量", ge=0)
+):
+    """获取结构化交易事件"""
+    try:
+        trading_logger = get_trading_logger()
+
+        start_time = None
+        end_time = None
+
+        if start_date:
+            try:
+                start_time = datetime.strptime(start_date, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="开始日期格式错误，应为 YYYY-MM-DD")
+
+        if end_date:
+            try:
+                end_time = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="结束日期格式错误，应为 YYYY-MM-DD")
+
+        events = trading_logger.get_events(
+            event_type=event_type,
+            strategy_name=strategy_name,
+            symbol=symbol,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            offset=offset
+        )
+
+        return {
+            "success": True,
+            "data": {
+                "events": events,
+                "total": len(events),
+                "filters": {
+                    "event_type": event_type,
+                    "strategy_name": strategy_name,
+                    "symbol": symbol,
+                    "start_date": start_date,
+                    "end_date": end_date
+                }
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取交易事件失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取交易事件失败: {str(e)}")
+
+
 @router.get("/logs/summary")
 async def get_logs_summary(
     strategy_name: Optional[str] = Query(None, description="策略名称"),
@@ -85,36 +147,21 @@ async def get_logs_summary(
         end_time = datetime.now()
         start_time = end_time - timedelta(days=days)
 
-        log_types = ["ORDER", "TRADE", "SIGNAL", "ERROR", "INFO"]
-        summary = {}
-
-        for lt in log_types:
-            logs = trading_logger.get_logs(
-                strategy_name=strategy_name,
-                log_type=lt,
-                start_time=start_time,
-                end_time=end_time,
-                limit=10000
-            )
-            summary[lt.lower()] = len(logs)
-
-        all_logs = trading_logger.get_logs(
+        # 一次遍历完成按类型/成功失败/策略的计数
+        stats = trading_logger.get_summary(
             strategy_name=strategy_name,
             start_time=start_time,
-            end_time=end_time,
-            limit=10000
+            end_time=end_time
         )
 
-        success_count = len([log for log in all_logs if log.get("is_success", True)])
-        failed_count = len(all_logs) - success_count
-
         return {
             "success": True,
             "data": {
-                "summary": summary,
-                "success_count": success_count,
-                "failed_count": failed_count,
-                "total_count": len(all_logs),
+                "summary": stats["by_type"],
+                "success_count": stats["success_count"],
+                "failed_count": stats["failed_count"],
+                "total_count": stats["total_count"],
+                "by_strategy": stats["by_strategy"],
                 "time_range": {
                     "start_time": start_time.isoformat(),
                     "end_time": end_time.isoformat(),
@@ -0,0 +1,79 @@
+"""
+账户快照
+账户、持仓、成交回报到达时只标记失效，查询时若已失效才重新计算；
+内容变化时递增版本号，供 /real_trading/account 的 ETag 使用。
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 不参与内容比较的字段（每次计算都会变化）
+_VOLATILE_FIELDS = ('update_time',)
+
+
+class AccountSnapshot:
+    """事件驱动的账户快照缓存"""
+
+    def __init__(self, builder: Callable[[], Optional[Dict[str, Any]]]):
+        """
+        Args:
+            builder: 计算完整账户信息的函数（返回None表示账户不可用）
+        """
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._data: Optional[Dict[str, Any]] = None
+        self._digest = ''
+        self.version = 0
+        # 服务重启后版本号从0开始，ETag带上启动标识避免与旧缓存冲突
+        self._boot_id = format(int(time.time()), 'x')
+
+    def invalidate(self):
+        """标记快照失效（由CTP回报事件调用，不做计算）"""
+        self._dirty = True
+
+    @property
+    def etag(self) -> str:
+        return f'"{self._boot_id}-{self.version}"'
+
+    def get(self) -> Tuple[Optional[Dict[str, Any]], int, str]:
+        """
+        获取账户快照
+
+        Returns:
+            (账户信息, 版本号, ETag)
+        """
+        if self._dirty:
+            with self._lock:
+                if self._dirty:
+                    self._rebuild()
+        return self._data, self.version, self.etag
+
+    def _rebuild(self):
+        # 先清标记再计算：计算期间到达的新事件会再次置脏
+        self._dirty = False
+        try:
+            data = self._builder()
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"账户快照计算失败: {e}")
+            return
+
+        if data is None:
+            self._data = None
+            return
+
+        stable = {k: v for k, v in data.items() if k not in _VOLATILE_FIELDS}
+        digest = hashlib.md5(json.dumps(stable, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        if digest != self._digest:
+            self._digest = digest
+            self.version += 1
+            data['version'] = self.version
+            self._data = data
@@ -6,6 +6,8 @@ CTP网关集成模块
 import asyncio
 import time
 import json
+import threading
+from concurrent.futures import Future
 from typing import Dict, Any, Optional, Callable, List
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -18,13 +20,28 @@ from vnpy.trader.constant import Exchange, Direction, OrderType, Offset
 from vnpy.trader.event import EVENT_CONTRACT, EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_ACCOUNT, EVENT_POSITION
 
 from utils.logger import get_logger
+from utils.log_throttle import get_throttled_logger
 from config.config import get_main_contract_symbol
+from services.trading_service.core.order_trade_store import OrderTradeStore
+from services.trading_service.core.account_snapshot import AccountSnapshot
+from utils.contract_registry import get_contract_registry, split_close_volume
+from utils.trading_calendar import trading_day
+from utils.tick_recorder import get_tick_recorder
+from utils.event_journal import (
+    get_event_journal, EVENT_ORDER as JOURNAL_ORDER, EVENT_TRADE as JOURNAL_TRADE, EVENT_ERROR as JOURNAL_ERROR
+)
+from utils.bar_store import get_bar_store, resample, to_bar_dicts, interval_minutes
 
 logger = get_logger(__name__)
+tlog = get_throttled_logger(__name__)  # 热点路径限流日志
 
 class CtpIntegration:
     """CTP网关集成类"""
-    
+
+    # 持仓回报静默多久视为本轮查询结束 / 最长等待时间（秒）
+    POSITION_QUIET_PERIOD = 0.3
+    POSITION_REFRESH_TIMEOUT = 2.0
+
     def __init__(self):
         """初始化CTP集成"""
         self.event_engine = None
@@ -40,11 +57,22 @@ class CtpIntegration:
         
         # 数据缓存
         self.contracts = {}
+        self.contract_registry = get_contract_registry()  # 合约规格（乘数/最小变动价位/保证金率/手续费）
         self.ticks = {}
-        self.orders = {}
-        self.trades = {}
-        self.positions = {}  # 持仓数据
+        self.tick_recorder = get_tick_recorder()  # 行情落盘（后台线程写入，供回放/回测）
+        self.event_journal = get_event_journal('trading')  # 结构化订单/成交事件
+        self.order_store = OrderTradeStore(self._get_contract_size, commission_getter=self._estimate_trade_commission)
+        self._trading_day = trading_day(datetime.now())  # 当前交易日，行情/成交进入新交易日时今仓批次转为昨仓
+        self.orders = self.order_store.orders  # 兼容旧代码的只读视图
+        self.trades = self.order_store.trades
+        self.positions = {}  # 持仓数据（只做整体替换，读取方无需加锁）
+        self._position_staging: Optional[Dict[str, Any]] = None  # 刷新期间的暂存区
+        self._position_refresh_future: Optional[Future] = None
+        self._position_refresh_lock = threading.Lock()
+        self._position_quiet_timer: Optional[threading.Timer] = None
+        self._position_timeout_timer: Optional[threading.Timer] = None
         self.account = None
+        self.account_snapshot = AccountSnapshot(self._build_account_info)  # 回报驱动的账户快照
         
         # 回调函数
         self.tick_callbacks: list[Callable] = []
@@ -75,6 +103,9 @@ class CtpIntegration:
             
             # 注册事件处理
             self._register_event_handlers()
+
+            # 启动Tick录制
+            self.tick_recorder.start()
             
             logger.info("✅ CTP集成初始化成功")
             return True
@@ -259,20 +290,12 @@ class CtpIntegration:
         tick = event.data
 
         # 📈 关键调试：验证tick回调是否被触发（每10秒打印一次，避免日志过多）
-        current_time = time.time()
-        if not hasattr(self, '_last_tick_log_time'):
-            self._last_tick_log_time = 0
-
-        if current_time - self._last_tick_log_time > 10:  # 每10秒打印一次
-            logger.info(f"📈📈📈 [交易服务] CTP行情回调被触发！📈📈📈")
-            logger.info(f"📈 [交易服务] 合约: {tick.symbol}")
-            logger.info(f"📈 [交易服务] 最新价: {tick.last_price}")
-            logger.info(f"📈 [交易服务] 买一价: {tick.bid_price_1}")
-            logger.info(f"📈 [交易服务] 卖一价: {tick.ask_price_1}")
-            logger.info(f"📈 [交易服务] 成交量: {tick.volume}")
-            self._last_tick_log_time = current_time
+        tlog.info("📈 [交易服务] CTP行情回调: 合约=%s 最新价=%s 买一价=%s 卖一价=%s 成交量=%s",
+                  tick.symbol, tick.last_price, tick.bid_price_1, tick.ask_price_1, tick.volume, rate=0.1)
 
         self.ticks[tick.symbol] = tick
+        self.tick_recorder.record(tick)
+        self._check_trading_day(tick.datetime)
 
         # 转换为标准格式
         tick_data = {
@@ -355,7 +378,24 @@ class CtpIntegration:
                         if 'error' in key.lower() or 'msg' in key.lower():
                             logger.error(f"   {key}: {value}")
 
-        self.orders[order.orderid] = order
+        self.order_store.add_order(order)
+
+        status = getattr(order, 'status', '')
+        rejected = str(status) == 'Status.REJECTED'
+        self.event_journal.emit(
+            JOURNAL_ORDER,
+            strategy_name=self.order_store.get_order_strategy(order.orderid),
+            symbol=getattr(order, 'symbol', None),
+            is_success=not rejected,
+            message=getattr(order, 'status_msg', '') if rejected else '',
+            order_id=order.orderid,
+            direction=getattr(order, 'direction', ''),
+            offset=getattr(order, 'offset', ''),
+            status=status,
+            price=getattr(order, 'price', 0),
+            volume=getattr(order, 'volume', 0),
+            traded=getattr(order, 'traded', 0),
+        )
 
         # 🔌 WebSocket 推送订单数据
         order_data = {
@@ -394,9 +434,23 @@ class CtpIntegration:
         logger.info(f"🔥 [交易服务] 价格: {getattr(trade, 'price', 'N/A')}")
 
         # 存储成交数据
-        self.trades[trade.tradeid] = trade
+        self._check_trading_day(getattr(trade, 'datetime', None))
+        self.order_store.add_trade(trade)
+        self.account_snapshot.invalidate()
         logger.info(f"🔥 [交易服务] 成交数据已存储，当前总成交数: {len(self.trades)}")
 
+        self.event_journal.emit(
+            JOURNAL_TRADE,
+            strategy_name=self.order_store.get_order_strategy(getattr(trade, 'orderid', '')),
+            symbol=getattr(trade, 'symbol', None),
+            trade_id=trade.tradeid,
+            order_id=getattr(trade, 'orderid', ''),
+            direction=getattr(trade, 'direction', ''),
+            offset=getattr(trade, 'offset', ''),
+            price=getattr(trade, 'price', 0),
+            volume=getattr(trade, 'volume', 0),
+        )
+
         # 🔌 WebSocket 推送成交数据
         direction_val = getattr(trade, 'direction', '')
         offset_val = getattr(trade, 'offset', '')
@@ -430,6 +484,7 @@ class CtpIntegration:
         """处理账户更新"""
         account = event.data
         self.account = account
+        self.account_snapshot.invalidate()
         
         # 调用回调函数
         for callback in self.account_callbacks:
@@ -442,6 +497,7 @@ class CtpIntegration:
         """处理合约信息"""
         contract = event.data
         self.contracts[contract.symbol] = contract
+        self.contract_registry.update_from_contract(contract)
 
     @staticmethod
     def _normalize_direction(direction_value: str) -> str:
@@ -456,46 +512,125 @@ class CtpIntegration:
         position = event.data
         direction_str = self._normalize_direction(position.direction.value)
         position_key = f"{position.symbol}_{direction_str}"
-        self.positions[position_key] = position
+
+        with self._position_refresh_lock:
+            if self._position_staging is not None:
+                # 刷新进行中：写入暂存区，等本轮回报结束后整体替换
+                self._position_staging[position_key] = position
+                self._restart_position_quiet_timer()
+            else:
+                # 写时复制，读取方遍历的旧字典不会被修改
+                positions = dict(self.positions)
+                positions[position_key] = position
+                self.positions = positions
+
+        self.account_snapshot.invalidate()
+
+        # 首次收到持仓时用昨仓/今仓初始化盈亏台账的开仓批次
+        yd_volume = getattr(position, 'yd_volume', 0)
+        self.order_store.pnl_ledger.seed_position(
+            position.symbol, direction_str.upper(), yd_volume, max(0, position.volume - yd_volume),
+            getattr(position, 'price', 0)
+        )
         logger.debug(f"📍 [持仓缓存] {position.symbol} {direction_str}: {position.volume}手(昨{position.yd_volume})")
 
-    def refresh_positions(self):
-        """主动刷新持仓数据 - 从CTP网关重新查询
+    def _check_trading_day(self, dt: Optional[datetime]):
+        """交易日切换（夜盘开盘的第一笔行情/成交）：盈亏台账的今仓批次转为昨仓"""
+        if dt is None:
+            return
+        day = trading_day(dt)
+        if day <= self._trading_day:
+            return
+        logger.info(f"📅 [交易日切换] {self._trading_day} -> {day}，今仓转为昨仓")
+        self._trading_day = day
+        self.order_store.pnl_ledger.roll_day()
+
+    def request_position_refresh(self) -> Optional[Future]:
+        """发起持仓刷新（非阻塞）
+
+        查询结果先写入暂存区，回报静默 POSITION_QUIET_PERIOD 秒或超时后整体替换 self.positions，
+        刷新期间读取方始终看到完整的旧数据。并发请求合并为同一次查询。
 
-        关键：清空缓存后重新查询，确保获取最新的今昨仓数据
-        特别是跨越结算时间（15:00-21:00）后，今仓会变成昨仓
+        特别是跨越结算时间（15:00-21:00）后，今仓会变成昨仓，需要主动刷新
+
+        Returns:
+            Future: 刷新完成时结果为当前持仓数；交易服务器未连接时返回None
         """
-        try:
-            if not self.td_connected or not self.td_login_status:
-                logger.warning("⚠️ 交易服务器未连接，无法刷新持仓")
-                return False
+        if not self.td_connected or not self.td_login_status:
+            logger.warning("⚠️ 交易服务器未连接，无法刷新持仓")
+            return None
 
-            # 🔧 关键：清空旧的缓存数据，强制使用CTP返回的最新数据
-            old_positions = self.positions.copy()
-            self.positions.clear()
+        with self._position_refresh_lock:
+            if self._position_refresh_future is not None and not self._position_refresh_future.done():
+                return self._position_refresh_future
+
+            future = Future()
+            self._position_refresh_future = future
+            self._position_staging = {}
+
+            self._position_timeout_timer = threading.Timer(
+                self.POSITION_REFRESH_TIMEOUT, self._finish_position_refresh, args=(future, True)
+            )
+            self._position_timeout_timer.daemon = True
+            self._position_timeout_timer.start()
 
-            logger.info("🔄 [持仓刷新] 清空缓存，主动查询CTP持仓数据...")
+        try:
+            logger.info("🔄 [持仓刷新] 主动查询CTP持仓数据（暂存区）...")
             self.ctp_gateway.query_position()
+        except Exception as e:
+            logger.error(f"❌ [持仓刷新] 失败: {e}")
+            self._finish_position_refresh(future, False, e)
+
+        return future
+
+    def _restart_position_quiet_timer(self):
+        """收到一条刷新回报后重置静默计时（调用方持有锁）"""
+        if self._position_quiet_timer is not None:
+            self._position_quiet_timer.cancel()
+        self._position_quiet_timer = threading.Timer(
+            self.POSITION_QUIET_PERIOD, self._finish_position_refresh, args=(self._position_refresh_future, False)
+        )
+        self._position_quiet_timer.daemon = True
+        self._position_quiet_timer.start()
+
+    def _finish_position_refresh(self, future: Future, timed_out: bool, error: Optional[Exception] = None):
+        """结束本轮刷新：暂存区整体替换持仓缓存并完成Future"""
+        with self._position_refresh_lock:
+            if future is not self._position_refresh_future or future.done():
+                return
 
-            # 等待CTP返回数据（最多等待2秒）
-            import time
-            max_wait = 2.0
-            wait_interval = 0.1
-            waited = 0
+            for timer in (self._position_quiet_timer, self._position_timeout_timer):
+                if timer is not None:
+                    timer.cancel()
+            self._position_quiet_timer = None
+            self._position_timeout_timer = None
 
-            while waited < max_wait:
-                time.sleep(wait_interval)
-                waited += wait_interval
-                if len(self.positions) > 0:
-                    break
+            staging = self._position_staging or {}
+            self._position_staging = None
 
-            if len(self.positions) == 0 and len(old_positions) > 0:
-                # 如果没有收到新数据，恢复旧数据（可能是无持仓）
-                logger.warning(f"⚠️ [持仓刷新] 未收到CTP数据，可能无持仓")
+            if error is None:
+                if staging or timed_out:
+                    if not staging and self.positions:
+                        logger.warning(f"⚠️ [持仓刷新] 未收到CTP数据，可能无持仓")
+                    self.positions = staging
 
+        self.account_snapshot.invalidate()
+
+        if error is not None:
+            future.set_exception(error)
+        else:
             logger.info(f"✅ [持仓刷新] 完成，当前持仓数: {len(self.positions)}")
-            return True
+            future.set_result(len(self.positions))
 
+    def refresh_positions(self, timeout: float = None) -> bool:
+        """主动刷新持仓数据并等待完成（同步调用方使用，异步调用方请使用 request_position_refresh）"""
+        future = self.request_position_refresh()
+        if future is None:
+            return False
+
+        try:
+            future.result(timeout=timeout or self.POSITION_REFRESH_TIMEOUT + 1.0)
+            return True
         except Exception as e:
             logger.error(f"❌ [持仓刷新] 失败: {e}")
             return False
@@ -503,25 +638,12 @@ class CtpIntegration:
     def _round_price(self, symbol: str, price: float) -> float:
         """根据合约的最小变动单位调整价格精度"""
         try:
-            # 获取合约信息
-            if symbol in self.contracts:
-                contract = self.contracts[symbol]
-                pricetick = contract.pricetick
-                if pricetick > 0:
-                    # 将价格调整为最小变动单位的倍数
-                    return round(price / pricetick) * pricetick
-
-            # 默认精度处理（黄金期货通常是0.02）
-            if symbol.startswith('au'):
-                return round(price / 0.02) * 0.02
-            else:
-                return round(price, 2)
-
+            return self.contract_registry.get(symbol).round_price(price)
         except Exception as e:
             logger.warning(f"价格精度调整失败: {e}, 使用原价格: {price}")
             return price
 
-    def send_order(self, symbol: str, direction: str, volume: int, price: float = 0, order_type: str = "MARKET", offset: str = "OPEN", time_condition: str = "GFD") -> Optional[str]:
+    def send_order(self, symbol: str, direction: str, volume: int, price: float = 0, order_type: str = "MARKET", offset: str = "OPEN", time_condition: str = "GFD", strategy_name: Optional[str] = None) -> Optional[str]:
         """
         发送订单
 
@@ -536,6 +658,7 @@ class CtpIntegration:
                 - "GFD": Good For Day - 当日有效 (使用激进价格确保立即成交)
                 - "GFD": 当日有效
                 - "GFS": 本节有效
+            strategy_name: 下单策略名称（用于成交归属，默认使用当前策略）
 
         Returns:
             Optional[str]: 订单ID
@@ -626,14 +749,25 @@ class CtpIntegration:
             logger.info(f"🔍 CTP网关返回订单ID: {order_id}")
 
             if order_id:
+                self.order_store.bind_strategy(order_id, strategy_name or self.current_strategy)
                 logger.info(f"✅ 订单发送成功: {symbol} {direction} {volume}@{order_price} ({offset}) [订单ID: {order_id}]")
                 return order_id
             else:
                 logger.error(f"❌ 订单发送失败: {symbol} {direction} {volume}@{order_price} ({offset})")
+                self.event_journal.emit(
+                    JOURNAL_ERROR, strategy_name=strategy_name or self.current_strategy, symbol=symbol,
+                    is_success=False, message="订单发送失败",
+                    direction=direction, offset=offset, price=order_price, volume=volume
+                )
                 return None
 
         except Exception as e:
             logger.error(f"发送订单异常: {e}")
+            self.event_journal.emit(
+                JOURNAL_ERROR, strategy_name=strategy_name or self.current_strategy, symbol=symbol,
+                is_success=False, message=f"发送订单异常: {e}",
+                direction=direction, offset=offset, price=price, volume=volume
+            )
             return None
 
     def set_current_strategy(self, strategy_name: str):
@@ -653,26 +787,7 @@ class CtpIntegration:
         Returns:
             float: 最小变动价位
         """
-        # 根据合约类型返回最小变动价位
-        if symbol.startswith('au'):  # 黄金期货
-            return 0.02
-        elif symbol.startswith('ag'):  # 白银期货
-            return 1.0
-        elif symbol.startswith('cu'):  # 铜期货
-            return 10.0
-        elif symbol.startswith('al'):  # 铝期货
-            return 5.0
-        elif symbol.startswith('zn'):  # 锌期货
-            return 5.0
-        elif symbol.startswith('pb'):  # 铅期货
-            return 5.0
-        elif symbol.startswith('ni'):  # 镍期货
-            return 10.0
-        elif symbol.startswith('sn'):  # 锡期货
-            return 10.0
-        else:
-            # 默认最小变动价位
-            return 0.01
+        return self.contract_registry.get(symbol).pricetick
 
     def _calculate_aggressive_price(self, symbol: str, direction: Direction, fallback_price: float) -> Optional[float]:
         """
@@ -774,16 +889,14 @@ class CtpIntegration:
 
     def _convert_offset(self, offset: str, symbol: str = None, direction: str = None) -> Offset:
         """转换开平仓类型 - 上海期货交易所需要区分平今平昨"""
-        # 处理AUTO：智能判断开平仓
-        if offset == 'AUTO':
-            # AUTO应该是平仓，使用智能平仓逻辑
+        # 处理AUTO/CLOSE：智能判断平今/平昨（只在需要时查询持仓）
+        if offset in ('AUTO', 'CLOSE'):
             result = self._smart_close_offset(symbol, direction)
             logger.info(f"开平仓转换: {offset} -> {result} (智能平仓)")
             return result
 
         offset_map = {
             'OPEN': Offset.OPEN,
-            'CLOSE': self._smart_close_offset(symbol, direction),  # 修改：使用智能平仓逻辑
             'CLOSE_TODAY': Offset.CLOSETODAY,
             'CLOSE_YESTERDAY': Offset.CLOSEYESTERDAY,
             'CLOSETODAY': Offset.CLOSETODAY,  # 添加：支持CLOSETODAY格式
@@ -840,6 +953,140 @@ class CtpIntegration:
             logger.error(f"⚠️ 智能平仓判断异常: {e}")
             return Offset.CLOSEYESTERDAY
 
+    @staticmethod
+    def _batch_needs_positions(orders: List[Dict[str, Any]]) -> bool:
+        """批量订单中是否有需要按持仓拆分平今/平昨的腿"""
+        return any(str(o.get('offset', 'OPEN')).upper() in ('AUTO', 'CLOSE') for o in orders)
+
+    async def send_order_batch_async(self, orders: List[Dict[str, Any]],
+                                     stop_on_error: bool = True) -> List[Dict[str, Any]]:
+        """
+        批量发送订单（异步调用方使用）：等待持仓刷新时不阻塞事件循环，再基于刷新后的快照下单
+
+        参数和返回值同 send_order_batch
+        """
+        if self._batch_needs_positions(orders):
+            future = self.request_position_refresh()
+            if future is not None:
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.POSITION_REFRESH_TIMEOUT + 1.0)
+                except Exception as e:
+                    logger.warning(f"⚠️ [批量下单] 持仓刷新未完成，使用缓存持仓: {e}")
+        return self.send_order_batch(orders, stop_on_error=stop_on_error, refresh=False)
+
+    def send_order_batch(self, orders: List[Dict[str, Any]], stop_on_error: bool = True,
+                         refresh: bool = True) -> List[Dict[str, Any]]:
+        """
+        批量发送订单 - 基于同一份持仓快照判断平今/平昨
+
+        AUTO 平仓腿按"优先平昨、再平今"拆分（split_close_volume，与模拟撮合一致），并在快照上扣减已分配的数量，
+        后续腿不会重复占用同一笔持仓；超出可平持仓的部分不发送，另记一条失败结果（trimmed），没有可平持仓的腿记为失败。
+
+        Args:
+            orders: 订单列表，每项包含 symbol/direction/volume/price/order_type/offset/time_condition
+            stop_on_error: 某一腿发送失败后是否停止提交后续腿（反手时避免只开不平）
+            refresh: 是否先同步刷新持仓（会阻塞等待回报，事件循环中请使用 send_order_batch_async）
+
+        Returns:
+            List[Dict]: 每笔实际提交订单的结果（带腿序号 leg，一腿可能对应多笔），以及未发送部分的失败结果
+        """
+        results = []
+
+        # 只有存在需要智能平仓的腿时才取持仓，整批共用一份快照
+        snapshot = {}
+        if self._batch_needs_positions(orders):
+            if refresh:
+                self.refresh_positions()
+            for symbol in {o['symbol'] for o in orders}:
+                info = self.get_position_info(symbol)
+                snapshot[symbol] = {
+                    'LONG': {'yesterday': info.get('long_yesterday', 0), 'today': info.get('long_today', 0)},
+                    'SHORT': {'yesterday': info.get('short_yesterday', 0), 'today': info.get('short_today', 0)}
+                }
+            logger.info(f"📸 [批量下单] 持仓快照: {snapshot}")
+
+        for index, order in enumerate(orders):
+            symbol = order['symbol']
+            direction = order['direction'].upper()
+            offset = str(order.get('offset', 'OPEN')).upper()
+            volume = int(order['volume'])
+
+            # 拆分为 (offset, volume) 子单
+            if offset in ('AUTO', 'CLOSE'):
+                position_direction = 'SHORT' if direction == 'BUY' else 'LONG'
+                available = snapshot[symbol][position_direction]
+                parts, excess = split_close_volume(volume, available['yesterday'], available['today'])
+                for part_offset, part_volume in parts:
+                    bucket = 'yesterday' if part_offset == 'CLOSEYESTERDAY' else 'today'
+                    available[bucket] -= part_volume
+                if excess > 0:
+                    logger.warning(f"⚠️ [批量下单] {symbol} {position_direction} 可平持仓不足，超出的{excess}手不发送")
+                if not parts:
+                    results.append({
+                        'leg': index,
+                        'order_id': '',
+                        'symbol': symbol,
+                        'direction': direction,
+                        'offset': offset,
+                        'volume': volume,
+                        'price': order.get('price', 0),
+                        'success': False,
+                        'error': '可平持仓不足'
+                    })
+                    if stop_on_error:
+                        logger.error(f"❌ [批量下单] 第{index + 1}腿无可平持仓，停止提交后续{len(orders) - index - 1}腿")
+                        break
+                    continue
+            else:
+                parts, excess = [(offset, volume)], 0
+
+            leg_failed = False
+            for part_offset, part_volume in parts:
+                order_id = self.send_order(
+                    symbol,
+                    direction,
+                    part_volume,
+                    order.get('price', 0),
+                    order.get('order_type', 'MARKET'),
+                    part_offset,
+                    order.get('time_condition', 'GFD'),
+                    order.get('strategy_name')
+                )
+                results.append({
+                    'leg': index,
+                    'order_id': order_id or '',
+                    'symbol': symbol,
+                    'direction': direction,
+                    'offset': part_offset,
+                    'volume': part_volume,
+                    'price': order.get('price', 0),
+                    'success': bool(order_id)
+                })
+                if not order_id:
+                    leg_failed = True
+                    break
+
+            if excess > 0 and not leg_failed:
+                # 超出可平持仓的部分未发送，该腿不算完整成功
+                results.append({
+                    'leg': index,
+                    'order_id': '',
+                    'symbol': symbol,
+                    'direction': direction,
+                    'offset': offset,
+                    'volume': excess,
+                    'price': order.get('price', 0),
+                    'success': False,
+                    'trimmed': True,
+                    'error': f'可平持仓不足，超出的{excess}手未发送'
+                })
+
+            if leg_failed and stop_on_error:
+                logger.error(f"❌ [批量下单] 第{index + 1}腿发送失败，停止提交后续{len(orders) - index - 1}腿")
+                break
+
+        return results
+
     def _calculate_total_margin(self) -> float:
         """计算总保证金"""
         total_margin = 0.0
@@ -855,31 +1102,32 @@ class CtpIntegration:
                         if field in ['margin', 'frozen', 'margin_used', 'position_margin', 'use_margin'] and value > 0:
                             total_margin += value
 
-        # 如果没有找到保证金字段，使用计算方式
+        # 如果没有找到保证金字段，按合约规格计算：价格 × 乘数 × 手数 × 保证金率
         if total_margin == 0:
-            positions_info = self.get_position_info()
-            if isinstance(positions_info, dict):
-                for symbol, pos_info in positions_info.items():
-                    if isinstance(pos_info, dict):
-                        long_pos = pos_info.get('long_position', 0)
-                        short_pos = pos_info.get('short_position', 0)
-                        total_volume = long_pos + short_pos
-
-                        if total_volume > 0:
-                            # 获取当前价格
-                            current_price = 775.0  # 默认价格
-                            if symbol in self.ticks:
-                                current_price = self.ticks[symbol].last_price
-
-                            # 根据实际情况调整保证金率
-                            # 217117.60 / (2手 × 777价格 × 1000) = 0.1397 ≈ 13.97%
-                            contract_value = current_price * 1000  # 每手合约价值
-                            margin_rate = 0.1397  # 13.97%保证金率（根据实际数据调整）
-                            position_margin = contract_value * margin_rate * total_volume
-                            total_margin += position_margin
+            for position in self.positions.values():
+                volume = getattr(position, 'volume', 0)
+                if volume <= 0:
+                    continue
+                current_price = self._get_mark_price(position.symbol, getattr(position, 'price', 0))
+                direction = self._normalize_direction(position.direction.value).upper()
+                total_margin += self.contract_registry.get(position.symbol).margin(current_price, volume, direction)
 
         return round(total_margin, 2)
 
+    def _get_mark_price(self, symbol: str, fallback_price: float = 0.0) -> float:
+        """估值价格：最新价，无行情时使用持仓均价"""
+        tick = self.ticks.get(symbol)
+        if tick and getattr(tick, 'last_price', 0) > 0:
+            return tick.last_price
+        return fallback_price or 0.0
+
+    def _estimate_trade_commission(self, trade) -> float:
+        """按合约规格估算单笔成交手续费（成交回报不含手续费时使用）"""
+        spec = self.contract_registry.get(getattr(trade, 'symbol', ''))
+        offset = getattr(trade, 'offset', '')
+        offset = getattr(offset, 'name', offset)  # vnpy枚举: Offset.OPEN / CLOSETODAY ...
+        return spec.commission(offset, getattr(trade, 'volume', 0), getattr(trade, 'price', 0))
+
     def _calculate_close_profit(self) -> float:
         """计算平仓盈亏（从CTP账户数据获取）"""
         # 直接从CTP账户数据获取平仓盈亏
@@ -893,103 +1141,23 @@ class CtpIntegration:
         return self._calculate_realized_pnl_from_trades()
 
     def _calculate_commission(self) -> float:
-        """计算手续费（开仓2元/手，平仓0元/手）"""
+        """计算手续费（CTP未提供时按合约规格累计）"""
         # 优先从CTP账户数据获取手续费
         if hasattr(self, 'account_data') and self.account_data:
             commission = self.account_data.get('commission', 0.0)
             if commission != 0:
                 return float(commission)
 
-        # 如果CTP没有提供，根据实际规则计算
-        total_commission = 0.0
-
-        # 从成交记录计算手续费
-        for trade in self.trades.values():
-            if hasattr(trade, 'commission'):
-                # 如果成交记录中有手续费字段，直接使用
-                total_commission += float(getattr(trade, 'commission', 0))
-            elif hasattr(trade, 'volume') and hasattr(trade, 'offset'):
-                # 根据开平仓类型计算手续费
-                volume = trade.volume
-                offset_str = str(trade.offset).upper()
-
-                if 'OPEN' in offset_str:
-                    # 开仓手续费：2元/手
-                    total_commission += volume * 2.0
-                else:
-                    # 平仓手续费：0元/手
-                    total_commission += volume * 0.0
-
-        return total_commission
+        # 如果CTP没有提供，使用成交回报增量累计的手续费
+        return self.order_store.commission_total
 
     def _calculate_realized_pnl_from_trades(self) -> float:
-        """从成交记录计算已实现盈亏"""
-        realized_pnl = 0.0
-
-        # 简化的盈亏计算：配对开平仓交易
-        open_trades = {}  # 存储开仓交易 {symbol_direction: [trades]}
-
-        for trade in self.trades.values():
-            if not hasattr(trade, 'symbol') or not hasattr(trade, 'offset'):
-                continue
-
-            symbol = trade.symbol
-            offset_str = str(trade.offset).upper()
-            direction = str(getattr(trade, 'direction', '')).upper()
-            volume = getattr(trade, 'volume', 0)
-            price = getattr(trade, 'price', 0)
-
-            if 'OPEN' in offset_str:
-                # 开仓交易
-                key = f"{symbol}_{direction}"
-                if key not in open_trades:
-                    open_trades[key] = []
-                open_trades[key].append({
-                    'volume': volume,
-                    'price': price,
-                    'direction': direction
-                })
-            elif 'CLOSE' in offset_str:
-                # 平仓交易，计算盈亏
-                # 平仓方向与开仓方向相反
-                open_direction = 'LONG' if 'SELL' in direction else 'SHORT'
-                key = f"{symbol}_{open_direction}"
-
-                if key in open_trades and open_trades[key]:
-                    # 找到对应的开仓交易计算盈亏
-                    open_trade = open_trades[key].pop(0)  # FIFO
-
-                    # 如果成交记录中有盈亏字段，直接使用
-                    if hasattr(trade, 'pnl'):
-                        realized_pnl += float(getattr(trade, 'pnl', 0))
-                    else:
-                        # 否则根据价格差计算（使用实际的合约信息）
-                        price_diff = price - open_trade['price']
-                        if open_direction == 'SHORT':
-                            price_diff = -price_diff  # 空单盈亏相反
-
-                        # 从合约信息获取合约乘数，如果没有则使用默认值
-                        contract_size = self._get_contract_size(symbol)
-                        pnl = price_diff * min(volume, open_trade['volume']) * contract_size
-                        realized_pnl += pnl
-
-        return realized_pnl
+        """从成交记录计算已实现盈亏（盈亏台账在成交回报时增量配对，此处直接读取聚合值）"""
+        return self.order_store.pnl_ledger.realized_total
 
     def _get_contract_size(self, symbol: str) -> float:
-        """获取合约乘数（从CTP合约信息获取）"""
-        # 从CTP合约信息获取
-        if symbol in self.contracts:
-            contract = self.contracts[symbol]
-            if hasattr(contract, 'size'):
-                return float(contract.size)
-
-        # 根据合约代码推断（黄金期货通常是1000克/手）
-        if symbol.startswith('au'):
-            return 1000.0  # 黄金期货
-        elif symbol.startswith('ag'):
-            return 15000.0  # 白银期货
-        else:
-            return 1.0  # 默认值
+        """获取合约乘数（CTP合约回报优先，其次品种默认值）"""
+        return self.contract_registry.get(symbol).size
 
     def _calculate_daily_pnl(self) -> float:
         """计算当日盈亏"""
@@ -1044,30 +1212,32 @@ class CtpIntegration:
         }
 
     def get_trades_by_strategy(self, strategy_name: str, since_time: Optional[datetime] = None) -> List[Dict[str, Any]]:
-        """获取成交数据（交易服务不做任何过滤，返回所有原始数据）"""
+        """获取成交数据（交易服务不做业务过滤，返回所有原始数据；since_time 通过时间索引截取）"""
         trades = []
 
-        logger.info(f"🔍 [交易服务] 查询成交数据，CTP总成交数: {len(self.trades)}")
+        source_trades = self.order_store.get_trades_since(since_time)
+        logger.info(f"🔍 [交易服务] 查询成交数据，CTP总成交数: {len(self.trades)}，本次范围: {len(source_trades)}")
 
-        for trade_id, trade in self.trades.items():
+        for trade in source_trades:
             try:
                 # 🔧 交易服务只负责数据转换，不做任何业务逻辑过滤
                 order_id = getattr(trade, 'orderid', '') or getattr(trade, 'orderref', '')
 
                 # 构造标准格式的成交数据
                 trade_data = {
-                    'trade_id': trade_id,
+                    'trade_id': trade.tradeid,
                     'order_id': order_id,
                     'symbol': getattr(trade, 'symbol', ''),
                     'direction': str(getattr(trade, 'direction', '')).upper(),
                     'offset': str(getattr(trade, 'offset', 'OPEN')).upper(),
                     'price': float(getattr(trade, 'price', 0.0)),
                     'volume': int(getattr(trade, 'volume', 0)),
-                    'datetime': datetime.now().isoformat(),  # 简化时间处理
+                    'datetime': self.order_store.get_trade_time(trade).isoformat(),
+                    'strategy_name': self.order_store.get_order_strategy(order_id) or '',
                 }
 
                 trades.append(trade_data)
-                logger.debug(f"🔍 [交易服务] 成交数据: {trade_id} -> 订单ID: {order_id}")
+                logger.debug(f"🔍 [交易服务] 成交数据: {trade.tradeid} -> 订单ID: {order_id}")
 
             except Exception as e:
                 logger.warning(f"[交易服务] 处理成交数据失败: {e}")
@@ -1077,7 +1247,12 @@ class CtpIntegration:
         return trades
 
     def get_account_info(self) -> Optional[Dict[str, Any]]:
-        """获取账户信息"""
+        """获取账户信息（读取快照，仅在账户/持仓/成交回报后重新计算）"""
+        data, _, _ = self.account_snapshot.get()
+        return data
+
+    def _build_account_info(self) -> Optional[Dict[str, Any]]:
+        """计算完整账户信息"""
         if not self.account:
             return None
 
@@ -1123,9 +1298,11 @@ class CtpIntegration:
         margin_ratio = (margin / available * 100) if available > 0 else 0  # 保证金率
         daily_pnl = balance - pre_balance  # 当日盈亏
 
-        # 计算可开仓手数（基于实际保证金需求）
-        avg_margin_per_lot = 62000  # 黄金期货每手约6.2万保证金
-        available_lots = int(available / avg_margin_per_lot) if available > 0 else 0
+        # 计算可开仓手数（按主力合约每手保证金）
+        main_symbol = get_main_contract_symbol()
+        main_price = self._get_mark_price(main_symbol)
+        margin_per_lot = self.contract_registry.get(main_symbol).margin(main_price, 1) if main_price > 0 else 0
+        available_lots = int(available / margin_per_lot) if available > 0 and margin_per_lot > 0 else 0
 
         # 计算持仓相关信息
         position_value = 0.0  # 持仓市值
@@ -1134,11 +1311,9 @@ class CtpIntegration:
         # 从持仓数据计算
         for symbol, position in self.positions.items():
             if hasattr(position, 'volume') and position.volume > 0:
-                # 持仓市值
-                current_price = 775.0  # 默认价格
-                if position.symbol in self.ticks:
-                    current_price = self.ticks[position.symbol].last_price
-                pos_value = position.volume * current_price * 1000  # 每手1000克
+                # 持仓市值 = 价格 × 乘数 × 手数
+                current_price = self._get_mark_price(position.symbol, getattr(position, 'price', 0))
+                pos_value = position.volume * current_price * self._get_contract_size(position.symbol)
                 position_value += pos_value
 
                 # 持仓盈亏
@@ -1167,6 +1342,9 @@ class CtpIntegration:
             'position_value': round(position_value, 2),
             'position_pnl': round(position_pnl, 2),      # 持仓盈亏（原未实现盈亏）
             'close_pnl': round(close_profit, 2),         # 平仓盈亏（原已实现盈亏）
+            'close_pnl_by_strategy': {
+                name: round(pnl, 2) for name, pnl in self.order_store.pnl_ledger.realized_by_strategy.items()
+            },
             'total_pnl': round(position_pnl + close_profit, 2),  # 总盈亏
 
             # 兼容旧字段名
@@ -1224,6 +1402,9 @@ class CtpIntegration:
                 'long_yesterday': long_yesterday,
                 'short_today': short_today,
                 'short_yesterday': short_yesterday,
+                # 盈亏台账中未平批次的持仓成本（先开先平）
+                'long_open_cost': self.order_store.pnl_ledger.get_open_cost(symbol, 'LONG'),
+                'short_open_cost': self.order_store.pnl_ledger.get_open_cost(symbol, 'SHORT'),
                 'position_detail': {
                     'long': {
                         'total': long_pos.volume if long_pos else 0,
@@ -1312,6 +1493,10 @@ class CtpIntegration:
                 positions[symbol]['short_pnl'] = short_pnl
                 positions[symbol]['total_pnl'] = long_pnl + short_pnl
 
+            for symbol, info in positions.items():
+                info['long_open_cost'] = self.order_store.pnl_ledger.get_open_cost(symbol, 'LONG')
+                info['short_open_cost'] = self.order_store.pnl_ledger.get_open_cost(symbol, 'SHORT')
+
             return positions
 
     def get_position_detail(self, symbol: str, direction: str):
@@ -1365,9 +1550,15 @@ class CtpIntegration:
         # 总是开仓，允许双向持仓
         return 'OPEN'
 
-    def get_historical_data(self, symbol: str, interval: str = "1m", count: int = 100):
-        """获取历史K线数据"""
+    def get_historical_data(self, symbol: str, interval: str = "1m", count: int = 100,
+                            start: Optional[datetime] = None, end: Optional[datetime] = None):
+        """获取历史K线数据（优先读取本地K线存储，CTP不支持历史查询）"""
         try:
+            stored = self._get_stored_bars(symbol, interval, count, start, end)
+            if stored:
+                logger.info(f"获取历史数据成功(本地K线存储): {symbol} {interval} {len(stored)}条")
+                return stored
+
             from vnpy.trader.constant import Interval
             from vnpy.trader.object import HistoryRequest
             from datetime import datetime, timedelta
@@ -1430,6 +1621,26 @@ class CtpIntegration:
             logger.error(f"获取历史数据失败: {e}")
             return []
 
+    def _get_stored_bars(self, symbol: str, interval: str, count: int,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """从本地K线存储读取，非1分钟周期由1分钟K线聚合"""
+        store = get_bar_store()
+        minutes = interval_minutes(interval)
+        source_interval = interval if store.count(symbol, interval) else '1m'
+
+        if start is not None:
+            data = store.read(symbol, source_interval, start, end)
+        else:
+            # 只读取末尾需要的1分钟K线
+            need = count if source_interval == interval else count * minutes + minutes
+            data = store.read_last(symbol, source_interval, need, end)
+
+        if source_interval != interval:
+            data = resample(data, minutes)
+        if start is None:
+            data = {name: array[-count:] for name, array in data.items()}
+        return to_bar_dicts(symbol, data, interval)
+
     def get_simulated_historical_data(self, symbol: str, interval: str = "1m", count: int = 100):
         """生成模拟历史数据用于回测（当CTP历史数据不可用时）"""
         try:
@@ -1517,12 +1728,7 @@ class CtpIntegration:
                     asyncio.run(ws_manager.push_tick(tick_data))
             else:
                 # 每10秒打印一次无连接提示
-                current_time = time.time()
-                if not hasattr(self, '_last_ws_no_conn_log'):
-                    self._last_ws_no_conn_log = 0
-                if current_time - self._last_ws_no_conn_log > 10:
-                    logger.debug(f"🔌 [WS] 无活跃连接，跳过tick推送")
-                    self._last_ws_no_conn_log = current_time
+                tlog.debug("🔌 [WS] 无活跃连接，跳过tick推送", rate=0.1)
         except Exception as e:
             logger.error(f"🔌 [WS] tick推送异常: {e}")
 
@@ -1609,7 +1815,10 @@ class CtpIntegration:
             'contracts_count': len(self.contracts),
             'subscribed_symbols': list(self.ticks.keys()),
             'orders_count': len(self.orders),
-            'trades_count': len(self.trades)
+            'trades_count': len(self.trades),
+            'tick_recorder': self.tick_recorder.get_stats(),
+            'event_journal': self.event_journal.get_stats(),
+            'log_throttle': tlog.get_stats()
         }
     
     async def disconnect(self):
@@ -1622,6 +1831,9 @@ class CtpIntegration:
             
             if self.main_engine:
                 self.main_engine.close()
+
+            self.tick_recorder.stop()
+            self.event_journal.stop()
             
             logger.info("✅ CTP连接已断开")
             
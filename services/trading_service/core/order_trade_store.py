@@ -0,0 +1,238 @@
+"""
+订单/成交内存存储
+为CTP回报提供按合约、策略、时间的二级索引，并在每笔成交时增量维护手续费和已实现盈亏(PnlLedger)，
+账户查询直接读取聚合值，不再遍历全部成交。
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from utils.logger import get_logger
+from services.trading_service.core.pnl_ledger import PnlLedger
+
+logger = get_logger(__name__)
+
+# 已结束的订单状态（可被淘汰）
+INACTIVE_ORDER_STATUSES = ('ALLTRADED', 'CANCELLED', 'REJECTED', '全部成交', '已撤销', '拒单')
+
+
+def _enum_str(value) -> str:
+    """枚举/字符串统一转为大写字符串"""
+    return str(getattr(value, 'value', value)).upper()
+
+
+class OrderTradeStore:
+    """订单/成交存储（带二级索引和运行聚合）"""
+
+    def __init__(
+        self,
+        contract_size_getter: Callable[[str], float],
+        max_orders: int = 10000,
+        max_trades: int = 50000,
+        commission_getter: Optional[Callable[[Any], float]] = None
+    ):
+        """
+        初始化存储
+
+        Args:
+            contract_size_getter: 根据合约代码返回合约乘数
+            max_orders: 订单容量上限，超出时淘汰最早的已结束订单
+            max_trades: 成交容量上限，超出时淘汰最早的成交（聚合值保留）
+            commission_getter: 成交回报不含手续费时按成交估算手续费（默认开仓2元/手，平仓0元/手）
+        """
+        self._contract_size = contract_size_getter
+        self.max_orders = max_orders
+        self.max_trades = max_trades
+        self._commission_getter = commission_getter
+
+        self._lock = threading.RLock()
+
+        # 主存储（保持插入顺序，兼容原 self.orders / self.trades 的用法）
+        self.orders: Dict[str, Any] = {}
+        self.trades: Dict[str, Any] = {}
+
+        # 二级索引
+        self._orders_by_symbol: Dict[str, List[str]] = defaultdict(list)
+        self._trades_by_symbol: Dict[str, List[str]] = defaultdict(list)
+        self._trades_by_strategy: Dict[str, List[str]] = defaultdict(list)
+        self._trade_times: List[Tuple[float, str]] = []  # (时间戳, trade_id) 按时间有序
+        self._trade_ts: Dict[str, float] = {}  # trade_id -> 时间戳
+        self._order_strategy: Dict[str, str] = {}  # orderid -> 策略名
+
+        # 运行聚合
+        self.commission_total = 0.0
+        self.commission_by_strategy: Dict[str, float] = defaultdict(float)
+        self.pnl_ledger = PnlLedger(contract_size_getter)
+
+    # ==================== 写入 ====================
+
+    @staticmethod
+    def _bare_order_id(order_id: str) -> str:
+        """vt_orderid(CTP.xxx) 与 orderid(xxx) 统一为 orderid"""
+        return order_id.split('.', 1)[-1] if order_id else ''
+
+    def bind_strategy(self, order_id: str, strategy_name: Optional[str]):
+        """记录订单所属策略（下单成功后调用）"""
+        if not order_id or not strategy_name:
+            return
+        with self._lock:
+            self._order_strategy[self._bare_order_id(order_id)] = strategy_name
+
+    def get_order_strategy(self, order_id: str) -> Optional[str]:
+        """查询订单所属策略"""
+        return self._order_strategy.get(self._bare_order_id(order_id))
+
+    def add_order(self, order):
+        """新增或更新订单"""
+        with self._lock:
+            order_id = order.orderid
+            if order_id not in self.orders:
+                self._orders_by_symbol[getattr(order, 'symbol', '')].append(order_id)
+            self.orders[order_id] = order
+
+            if len(self.orders) > self.max_orders:
+                self._evict_orders()
+
+    def add_trade(self, trade) -> bool:
+        """
+        新增成交并更新聚合
+
+        Returns:
+            bool: 是否为新成交（重复推送的成交返回False，不重复累计）
+        """
+        with self._lock:
+            trade_id = trade.tradeid
+            if trade_id in self.trades:
+                self.trades[trade_id] = trade
+                return False
+
+            self.trades[trade_id] = trade
+            symbol = getattr(trade, 'symbol', '')
+            strategy_name = self.get_order_strategy(getattr(trade, 'orderid', ''))
+
+            self._trades_by_symbol[symbol].append(trade_id)
+            if strategy_name:
+                self._trades_by_strategy[strategy_name].append(trade_id)
+            trade_ts = self._trade_timestamp(trade)
+            self._trade_ts[trade_id] = trade_ts
+            insort(self._trade_times, (trade_ts, trade_id))
+
+            commission = self._trade_commission(trade)
+            self.commission_total += commission
+            if strategy_name:
+                self.commission_by_strategy[strategy_name] += commission
+            self.pnl_ledger.on_trade(trade, strategy_name)
+
+            if len(self.trades) > self.max_trades:
+                self._evict_trades()
+            return True
+
+    def _trade_commission(self, trade) -> float:
+        """单笔成交手续费"""
+        if hasattr(trade, 'commission'):
+            return float(getattr(trade, 'commission', 0) or 0)
+        if self._commission_getter is not None:
+            return self._commission_getter(trade)
+        if 'OPEN' in _enum_str(getattr(trade, 'offset', '')):
+            return getattr(trade, 'volume', 0) * 2.0
+        return 0.0
+
+    @staticmethod
+    def _trade_timestamp(trade) -> float:
+        trade_time = getattr(trade, 'datetime', None)
+        if isinstance(trade_time, datetime):
+            return trade_time.timestamp()
+        return datetime.now().timestamp()
+
+    @property
+    def realized_pnl_total(self) -> float:
+        """已实现盈亏合计"""
+        return self.pnl_ledger.realized_total
+
+    # ==================== 淘汰 ====================
+
+    def _evict_orders(self):
+        """淘汰最早的已结束订单，活动订单保留"""
+        overflow = len(self.orders) - self.max_orders
+        evicted = []
+        for order_id, order in self.orders.items():
+            if len(evicted) >= overflow:
+                break
+            if _enum_str(getattr(order, 'status', '')) in INACTIVE_ORDER_STATUSES:
+                evicted.append(order_id)
+
+        for order_id in evicted:
+            order = self.orders.pop(order_id)
+            symbol_ids = self._orders_by_symbol.get(getattr(order, 'symbol', ''))
+            if symbol_ids:
+                try:
+                    symbol_ids.remove(order_id)
+                except ValueError:
+                    pass
+
+        if evicted:
+            logger.debug(f"[订单存储] 淘汰 {len(evicted)} 笔已结束订单")
+
+    def _evict_trades(self):
+        """按时间淘汰最早的成交（超出上限10%时批量淘汰，聚合值不受影响）"""
+        overflow = len(self.trades) - self.max_trades
+        if overflow < max(1, self.max_trades // 10):
+            return
+
+        evicted = {trade_id for _, trade_id in self._trade_times[:overflow]}
+        del self._trade_times[:overflow]
+        for trade_id in evicted:
+            self.trades.pop(trade_id, None)
+            self._trade_ts.pop(trade_id, None)
+
+        for index in (self._trades_by_symbol, self._trades_by_strategy):
+            for key in list(index.keys()):
+                index[key] = [trade_id for trade_id in index[key] if trade_id not in evicted]
+
+        logger.debug(f"[订单存储] 淘汰 {len(evicted)} 笔历史成交")
+
+    # ==================== 查询 ====================
+
+    def get_orders_by_symbol(self, symbol: str) -> List[Any]:
+        """按合约查询订单"""
+        with self._lock:
+            return [self.orders[oid] for oid in self._orders_by_symbol.get(symbol, []) if oid in self.orders]
+
+    def get_trades_by_symbol(self, symbol: str) -> List[Any]:
+        """按合约查询成交"""
+        with self._lock:
+            return [self.trades[tid] for tid in self._trades_by_symbol.get(symbol, []) if tid in self.trades]
+
+    def get_trades_by_strategy(self, strategy_name: str) -> List[Any]:
+        """按策略查询成交（仅包含通过策略信号下单的成交）"""
+        with self._lock:
+            return [self.trades[tid] for tid in self._trades_by_strategy.get(strategy_name, []) if tid in self.trades]
+
+    def get_trades_since(self, since_time: Optional[datetime] = None) -> List[Any]:
+        """按时间查询成交（二分定位起点）"""
+        with self._lock:
+            start = 0
+            if since_time is not None:
+                start = bisect_left(self._trade_times, (since_time.timestamp(), ''))
+            return [self.trades[tid] for _, tid in self._trade_times[start:] if tid in self.trades]
+
+    def get_trade_time(self, trade) -> datetime:
+        """成交时间（回报缺失时间时使用入库时间）"""
+        trade_time = getattr(trade, 'datetime', None)
+        if isinstance(trade_time, datetime):
+            return trade_time
+        trade_ts = self._trade_ts.get(trade.tradeid)
+        return datetime.fromtimestamp(trade_ts) if trade_ts else datetime.now()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        with self._lock:
+            return {
+                'orders_count': len(self.orders),
+                'trades_count': len(self.trades),
+                'commission_total': self.commission_total,
+                'realized_pnl_total': self.realized_pnl_total
+            }
@@ -0,0 +1,248 @@
+"""
+已实现盈亏台账
+按 (合约, 持仓方向) 维护开仓批次队列，每笔成交到达时增量配对：
+- CLOSE: 先昨后今 FIFO
+- CLOSETODAY: 只消耗今仓批次
+- CLOSEYESTERDAY: 只消耗昨仓批次
+支持部分成交拆分批次，已实现盈亏、持仓成本、按策略/合约归属均可常数时间查询。
+"""
+
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OpenLot:
+    """开仓批次"""
+
+    __slots__ = ('price', 'volume', 'strategy_name', 'trade_id')
+
+    def __init__(self, price: float, volume: float, strategy_name: str = '', trade_id: str = ''):
+        self.price = price
+        self.volume = volume
+        self.strategy_name = strategy_name
+        self.trade_id = trade_id
+
+
+def _is_long(direction) -> bool:
+    """成交方向是否为买入（兼容 vnpy 中英文枚举值）"""
+    value = str(getattr(direction, 'value', direction)).upper()
+    return value in ('LONG', '多', 'BUY') or value.endswith('.LONG')
+
+
+def _offset_str(offset) -> str:
+    value = str(getattr(offset, 'value', offset)).upper()
+    # vnpy 的 Offset 枚举值为中文
+    return {'开': 'OPEN', '平': 'CLOSE', '平今': 'CLOSETODAY', '平昨': 'CLOSEYESTERDAY'}.get(value, value)
+
+
+class PnlLedger:
+    """已实现盈亏台账"""
+
+    def __init__(self, contract_size_getter: Callable[[str], float]):
+        """
+        Args:
+            contract_size_getter: 根据合约代码返回合约乘数
+        """
+        self._contract_size = contract_size_getter
+        self._lock = threading.RLock()
+
+        # {(symbol, 'LONG'|'SHORT'): deque[OpenLot]}，今昨分开存放
+        self._today_lots: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        self._yesterday_lots: Dict[Tuple[str, str], deque] = defaultdict(deque)
+
+        # 持仓成本聚合 {(symbol, direction): [成本金额(价格×手数), 手数]}
+        self._open_cost: Dict[Tuple[str, str], list] = defaultdict(lambda: [0.0, 0.0])
+
+        # 已实现盈亏聚合
+        self.realized_total = 0.0
+        self.realized_by_symbol: Dict[str, float] = defaultdict(float)
+        self.realized_by_strategy: Dict[str, float] = defaultdict(float)
+
+        # 找不到开仓批次的平仓手数（服务启动前的持仓且未做初始化时出现）
+        self.unmatched_volume = 0.0
+        self._seeded = set()
+        # 今仓初始化时间 {(symbol, direction): 时间戳}：早于该时间的开仓成交（登录后补推）已计入初始化的今仓批次
+        self._seed_times: Dict[Tuple[str, str], float] = {}
+
+    # ==================== 写入 ====================
+
+    def seed_position(self, symbol: str, direction: str, yesterday_volume: float, today_volume: float,
+                      avg_price: float, as_of: Optional[datetime] = None):
+        """
+        用CTP持仓初始化开仓批次（每个合约方向只初始化一次）
+
+        昨仓、今仓各按持仓均价作为一个批次入账。登录后补推的当日开仓成交先到达时，今仓只补足其余部分；
+        在初始化之后到达（成交时间早于初始化时间）时替换初始化的今仓批次，不重复计入。
+
+        Args:
+            symbol: 合约代码
+            direction: 持仓方向 LONG/SHORT
+            yesterday_volume: 昨仓手数
+            today_volume: 今仓手数
+            avg_price: 持仓均价
+            as_of: 持仓数据的时间（默认当前时间）
+        """
+        key = (symbol, direction.upper())
+        with self._lock:
+            if key in self._seeded:
+                return
+            self._seeded.add(key)
+            if avg_price <= 0:
+                return
+
+            if yesterday_volume > 0:
+                self._add_lot(self._yesterday_lots[key], key, OpenLot(avg_price, yesterday_volume, '', 'YESTERDAY'))
+            today_volume -= sum(lot.volume for lot in self._today_lots[key])
+            if today_volume > 0:
+                self._add_lot(self._today_lots[key], key, OpenLot(avg_price, today_volume, '', 'TODAY'))
+                self._seed_times[key] = (as_of or datetime.now()).timestamp()
+
+            if yesterday_volume > 0 or today_volume > 0:
+                logger.info(
+                    f"📒 [盈亏台账] 初始化开仓批次: {symbol} {key[1]} 昨{yesterday_volume}手 今{max(today_volume, 0)}手@{avg_price}"
+                )
+
+    def _add_lot(self, lots: deque, key: Tuple[str, str], lot: OpenLot):
+        lots.append(lot)
+        cost = self._open_cost[key]
+        cost[0] += lot.price * lot.volume
+        cost[1] += lot.volume
+
+    def _absorb_seeded_today(self, key: Tuple[str, str], trade, volume: float):
+        """初始化之前发生的开仓成交（登录后补推）从初始化的今仓批次中扣除，由真实成交批次替代"""
+        seed_time = self._seed_times.get(key)
+        trade_time = getattr(trade, 'datetime', None)
+        if seed_time is None or trade_time is None or trade_time.timestamp() > seed_time:
+            return
+
+        lots = self._today_lots[key]
+        for lot in lots:
+            if lot.trade_id == 'TODAY':
+                matched = min(volume, lot.volume)
+                lot.volume -= matched
+                cost = self._open_cost[key]
+                cost[0] -= lot.price * matched
+                cost[1] -= matched
+                if lot.volume <= 0:
+                    lots.remove(lot)
+                return
+
+    def on_trade(self, trade, strategy_name: Optional[str] = None) -> float:
+        """
+        处理一笔成交
+
+        Returns:
+            float: 本笔成交产生的已实现盈亏
+        """
+        symbol = getattr(trade, 'symbol', '')
+        volume = float(getattr(trade, 'volume', 0) or 0)
+        price = float(getattr(trade, 'price', 0) or 0)
+        offset = _offset_str(getattr(trade, 'offset', ''))
+        is_buy = _is_long(getattr(trade, 'direction', ''))
+
+        if volume <= 0:
+            return 0.0
+
+        with self._lock:
+            # 开仓：买开为多头批次，卖开为空头批次
+            if offset == 'OPEN':
+                key = (symbol, 'LONG' if is_buy else 'SHORT')
+                self._absorb_seeded_today(key, trade, volume)
+                self._add_lot(self._today_lots[key], key,
+                              OpenLot(price, volume, strategy_name or '', getattr(trade, 'tradeid', '')))
+                return 0.0
+
+            if 'CLOSE' not in offset:
+                return 0.0
+
+            # 平仓：买平消耗空头批次，卖平消耗多头批次
+            key = (symbol, 'SHORT' if is_buy else 'LONG')
+            if offset == 'CLOSETODAY':
+                queues = (self._today_lots[key],)
+            elif offset == 'CLOSEYESTERDAY':
+                queues = (self._yesterday_lots[key],)
+            else:
+                queues = (self._yesterday_lots[key], self._today_lots[key])
+
+            sign = 1.0 if key[1] == 'LONG' else -1.0
+            size = self._contract_size(symbol)
+            cost = self._open_cost[key]
+            remaining = volume
+            pnl = 0.0
+
+            for lots in queues:
+                while remaining > 0 and lots:
+                    lot = lots[0]
+                    matched = min(remaining, lot.volume)
+                    lot_pnl = (price - lot.price) * sign * matched * size
+
+                    pnl += lot_pnl
+                    self.realized_by_strategy[lot.strategy_name or strategy_name or ''] += lot_pnl
+                    cost[0] -= lot.price * matched
+                    cost[1] -= matched
+
+                    lot.volume -= matched
+                    remaining -= matched
+                    if lot.volume <= 0:
+                        lots.popleft()
+
+            if remaining > 0:
+                self.unmatched_volume += remaining
+                logger.warning(f"⚠️ [盈亏台账] {symbol} {key[1]} 平仓{remaining}手找不到对应开仓批次({offset})")
+
+            self.realized_total += pnl
+            self.realized_by_symbol[symbol] += pnl
+            return pnl
+
+    def roll_day(self):
+        """交易日切换：今仓批次并入昨仓（保持先开先平顺序）"""
+        with self._lock:
+            for key, lots in self._today_lots.items():
+                if lots:
+                    self._yesterday_lots[key].extend(lots)
+                    lots.clear()
+            # 补推的成交只会在登录当日到达
+            self._seed_times.clear()
+
+    # ==================== 查询 ====================
+
+    def get_realized_pnl(self, symbol: Optional[str] = None, strategy_name: Optional[str] = None) -> float:
+        """已实现盈亏（可按合约或策略过滤）"""
+        if symbol is not None:
+            return self.realized_by_symbol.get(symbol, 0.0)
+        if strategy_name is not None:
+            return self.realized_by_strategy.get(strategy_name, 0.0)
+        return self.realized_total
+
+    def get_open_cost(self, symbol: str, direction: str) -> Dict[str, float]:
+        """未平批次的持仓成本"""
+        with self._lock:
+            amount, volume = self._open_cost.get((symbol, direction.upper()), (0.0, 0.0))
+            return {
+                'volume': volume,
+                'cost': amount * self._contract_size(symbol),
+                'avg_price': amount / volume if volume > 0 else 0.0
+            }
+
+    def get_summary(self) -> Dict[str, Any]:
+        """台账摘要"""
+        with self._lock:
+            return {
+                'realized_pnl': self.realized_total,
+                'by_symbol': dict(self.realized_by_symbol),
+                'by_strategy': dict(self.realized_by_strategy),
+                'unmatched_volume': self.unmatched_volume,
+                'open_lots': {
+                    f"{symbol}_{direction}": {
+                        'today': sum(lot.volume for lot in self._today_lots.get((symbol, direction), ())),
+                        'yesterday': sum(lot.volume for lot in self._yesterday_lots.get((symbol, direction), ()))
+                    }
+                    for (symbol, direction) in self._open_cost
+                }
+            }
@@ -25,7 +25,7 @@ from shared.models.base import (
     RunningMode, ServiceInfo, ServiceStatus
 )
 # 移除对旧系统控制器的依赖，使用简化的状态管理
-from utils.logger import get_logger
+from utils.logger import get_logger, get_dropped_count
 
 logger = get_logger(__name__)
 
@@ -87,7 +87,9 @@ class TradingService:
             "start_time": self.start_time.isoformat(),
             "uptime": uptime,
             "system_status": self.system_status,
-            "system_mode": self.system_mode
+            "system_mode": self.system_mode,
+            # 日志队列满时丢弃的条数（持续增长说明日志写入跟不上）
+            "dropped_logs": get_dropped_count()
         }
 
 # 创建交易服务实例
@@ -193,7 +195,8 @@ async def health_check():
         dependencies={
             "system_status": status["system_status"],
             "config_manager": "healthy",
-            "event_engine": "healthy"
+            "event_engine": "healthy",
+            "logging": "healthy" if status["dropped_logs"] == 0 else f"已丢弃{status['dropped_logs']}条日志"
         }
     )
 
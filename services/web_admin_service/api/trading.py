@@ -286,6 +286,71 @@ async def run_backtest(backtest_request: dict):
         logger.error(f"运行回测失败: {e}")
         raise HTTPException(status_code=500, detail=f"运行回测失败: {str(e)}")
 
+# 后台回测任务：提交后立即返回任务ID，进度和结果另行查询，不受代理超时限制
+BACKTEST_JOB_TYPES = ("run", "batch", "optimize", "walk_forward")
+
+
+async def _forward_backtest_job(method: str, path: str, **kwargs):
+    """转发回测任务请求到 Strategy Service"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.request(method, f"http://localhost:8002/backtest/jobs{path}", **kwargs)
+        return response.json()
+
+
+@router.post("/backtest/jobs/{job_type}")
+async def submit_backtest_job(job_type: str, job_request: dict):
+    """提交后台回测任务（run / batch / optimize / walk_forward）"""
+    if job_type not in BACKTEST_JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"不支持的任务类型: {job_type}")
+    try:
+        return await _forward_backtest_job("POST", f"/{job_type}", json=job_request)
+    except Exception as e:
+        logger.error(f"提交回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"提交回测任务失败: {str(e)}")
+
+
+@router.get("/backtest/jobs")
+async def list_backtest_jobs(status: Optional[str] = None, limit: int = 50):
+    """回测任务列表"""
+    try:
+        params = {"limit": limit}
+        if status:
+            params["status"] = status
+        return await _forward_backtest_job("GET", "", params=params)
+    except Exception as e:
+        logger.error(f"获取回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取回测任务失败: {str(e)}")
+
+
+@router.get("/backtest/jobs/{job_id}")
+async def get_backtest_job(job_id: str):
+    """回测任务状态和进度"""
+    try:
+        return await _forward_backtest_job("GET", f"/{job_id}")
+    except Exception as e:
+        logger.error(f"获取回测任务状态失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取回测任务状态失败: {str(e)}")
+
+
+@router.get("/backtest/jobs/{job_id}/result")
+async def get_backtest_job_result(job_id: str):
+    """回测任务结果"""
+    try:
+        return await _forward_backtest_job("GET", f"/{job_id}/result")
+    except Exception as e:
+        logger.error(f"获取回测任务结果失败: {e}")
+        raise HTTPException(status_code=500, detail=f"获取回测任务结果失败: {str(e)}")
+
+
+@router.post("/backtest/jobs/{job_id}/cancel")
+async def cancel_backtest_job(job_id: str):
+    """取消回测任务"""
+    try:
+        return await _forward_backtest_job("POST", f"/{job_id}/cancel")
+    except Exception as e:
+        logger.error(f"取消回测任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"取消回测任务失败: {str(e)}")
+
 @router.get("/positions")
 async def get_positions(
     symbol: Optional[str] = None,
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+K线列式存储测试（不需要服务运行）
+覆盖追加/读取往返、中断写入后的恢复、含夜盘的聚合边界
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from utils.bar_store import (
+    BarStore, resample, interval_minutes, to_ns, ns_to_datetime, TIME_COLUMN, PRICE_COLUMNS
+)
+
+SYMBOL = "au2512"
+
+
+def make_bars(times) -> dict:
+    """按时间生成列数据，价格为行号便于核对"""
+    rows = np.arange(len(times), dtype=np.float64)
+    return {
+        TIME_COLUMN: [to_ns(t) for t in times],
+        'open': rows + 0.1,
+        'high': rows + 0.5,
+        'low': rows - 0.5,
+        'close': rows + 0.2,
+        'volume': np.ones(len(times)),
+        'turnover': np.ones(len(times)) * 10,
+        'open_interest': rows,
+    }
+
+
+def minutes_from(start: datetime, count: int):
+    return [start + timedelta(minutes=i) for i in range(count)]
+
+
+def test_append_read_roundtrip():
+    """追加后按区间读取，重复和早于已存时间的行被跳过"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = BarStore(base_dir)
+        times = minutes_from(datetime(2026, 10, 15, 9, 0), 10)
+
+        assert store.append(SYMBOL, '1m', make_bars(times[:6])) == 6
+        # 前两行与已存数据重复
+        assert store.append(SYMBOL, '1m', {name: values[4:] for name, values in make_bars(times).items()}) == 4
+        assert store.count(SYMBOL) == 10
+
+        data = store.read(SYMBOL, '1m', times[2], times[5])
+        assert [ns_to_datetime(ts) for ts in data[TIME_COLUMN]] == times[2:5]
+        assert data['close'].tolist() == [2.2, 3.2, 4.2]
+
+        last = store.read_last(SYMBOL, '1m', 3)
+        assert last['open'].tolist() == [7.1, 8.1, 9.1]
+
+        # 新实例从文件读取最后时间，不会重复写入
+        store = BarStore(base_dir)
+        assert store.append(SYMBOL, '1m', make_bars(times[-1:])) == 0
+    print("✅ 追加/读取往返")
+
+
+def test_recover_after_torn_write():
+    """价格列残留中断写入的半行时，下次追加先截断，各列保持对齐"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = BarStore(base_dir)
+        times = minutes_from(datetime(2026, 10, 15, 9, 0), 4)
+        store.append(SYMBOL, '1m', make_bars(times[:2]))
+
+        # 模拟进程在写完部分价格列、写时间列之前退出
+        torn = make_bars(times[2:3])
+        for name in PRICE_COLUMNS[:3]:
+            with open(store._column_path(SYMBOL, '1m', name), 'ab') as f:
+                f.write(np.asarray(torn[name], dtype=np.float64).tobytes())
+        assert store.count(SYMBOL) == 2
+
+        store = BarStore(base_dir)
+        bars = make_bars(times)
+        assert store.append(SYMBOL, '1m', {name: values[2:] for name, values in bars.items()}) == 2
+
+        data = store.read(SYMBOL, '1m')
+        assert data[TIME_COLUMN].size == 4
+        for name in PRICE_COLUMNS:
+            assert os.path.getsize(store._column_path(SYMBOL, '1m', name)) == 4 * 8
+            assert data[name].tolist() == np.asarray(bars[name], dtype=np.float64).tolist()
+    print("✅ 中断写入恢复")
+
+
+def test_resample_daily_with_night_session():
+    """日线按交易日聚合：夜盘计入下一交易日，周五夜盘计入下周一"""
+    times = (
+        minutes_from(datetime(2026, 10, 15, 14, 58), 2)     # 周四日盘 -> 10-15
+        + minutes_from(datetime(2026, 10, 15, 21, 0), 2)    # 周四夜盘 -> 10-16
+        + minutes_from(datetime(2026, 10, 16, 0, 59), 2)    # 跨零点夜盘 -> 10-16
+        + minutes_from(datetime(2026, 10, 16, 14, 58), 2)   # 周五日盘 -> 10-16
+        + minutes_from(datetime(2026, 10, 16, 21, 0), 2)    # 周五夜盘 -> 10-19
+        + minutes_from(datetime(2026, 10, 17, 2, 28), 2)    # 周六凌晨 -> 10-19
+        + minutes_from(datetime(2026, 10, 19, 9, 0), 2)     # 周一日盘 -> 10-19
+    )
+    data = {name: np.asarray(values) for name, values in make_bars(times).items()}
+    data[TIME_COLUMN] = data[TIME_COLUMN].astype(np.int64)
+
+    daily = resample(data, interval_minutes('1d'))
+    assert [ns_to_datetime(ts) for ts in daily[TIME_COLUMN]] == [
+        datetime(2026, 10, 15), datetime(2026, 10, 16), datetime(2026, 10, 19)
+    ]
+    assert daily['open'].tolist() == [0.1, 2.1, 8.1]
+    assert daily['close'].tolist() == [1.2, 7.2, 13.2]
+    assert daily['high'].tolist() == [1.5, 7.5, 13.5]
+    assert daily['volume'].tolist() == [2, 6, 6]
+    print("✅ 日线交易日边界")
+
+
+def test_resample_intraday_boundaries():
+    """日内周期按自然时间对齐，夜盘开盘不与日盘收盘合并"""
+    times = minutes_from(datetime(2026, 10, 15, 14, 55), 5) + minutes_from(datetime(2026, 10, 15, 21, 0), 7)
+    data = {name: np.asarray(values) for name, values in make_bars(times).items()}
+    data[TIME_COLUMN] = data[TIME_COLUMN].astype(np.int64)
+
+    bars = resample(data, interval_minutes('5m'))
+    assert [ns_to_datetime(ts) for ts in bars[TIME_COLUMN]] == [
+        datetime(2026, 10, 15, 14, 55), datetime(2026, 10, 15, 21, 0), datetime(2026, 10, 15, 21, 5)
+    ]
+    assert bars['volume'].tolist() == [5, 5, 2]
+    print("✅ 日内周期边界")
+
+
+def test_unknown_interval():
+    """不支持的周期抛出 ValueError，不回退为1分钟"""
+    try:
+        interval_minutes('2m')
+    except ValueError:
+        print("✅ 不支持的周期")
+        return
+    raise AssertionError("未知周期应抛出 ValueError")
+
+
+if __name__ == "__main__":
+    test_append_read_roundtrip()
+    test_recover_after_torn_write()
+    test_resample_daily_with_night_session()
+    test_resample_intraday_boundaries()
+    test_unknown_interval()
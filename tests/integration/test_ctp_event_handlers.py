@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+CTP事件注册测试（不需要服务运行、不连接CTP）
+确认委托/成交回调注册在 vnpy 网关推送的事件名上，而不是事件日志的类型名
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from vnpy.trader.event import EVENT_TICK, EVENT_ORDER, EVENT_TRADE, EVENT_ACCOUNT, EVENT_POSITION
+from services.trading_service.core.ctp_integration import CtpIntegration
+from utils import event_journal
+
+
+class RecordingEventEngine:
+    """只记录注册关系的事件引擎替身"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, event_type, handler):
+        self.handlers.setdefault(event_type, []).append(handler)
+
+
+def test_order_trade_handlers_registered_on_vnpy_events():
+    """_on_order/_on_trade 注册在 vnpy 的 EVENT_ORDER/EVENT_TRADE 上"""
+    integration = CtpIntegration()
+    integration.event_engine = RecordingEventEngine()
+    integration._register_event_handlers()
+    handlers = integration.event_engine.handlers
+
+    assert handlers[EVENT_ORDER] == [integration._on_order]
+    assert handlers[EVENT_TRADE] == [integration._on_trade]
+    assert handlers[EVENT_TICK] == [integration._on_tick]
+    assert handlers[EVENT_ACCOUNT] == [integration._on_account]
+    assert handlers[EVENT_POSITION] == [integration._on_position]
+
+    # 事件日志的类型名不是网关事件
+    assert event_journal.EVENT_ORDER not in handlers
+    assert event_journal.EVENT_TRADE not in handlers
+    print("✅ 委托/成交事件注册")
+
+
+if __name__ == "__main__":
+    test_order_trade_handlers_registered_on_vnpy_events()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+盈亏台账测试（不需要服务运行）
+覆盖跨批次部分平仓、平今/平昨配对、CTP持仓初始化、交易日切换
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from services.trading_service.core.pnl_ledger import PnlLedger
+
+SYMBOL = "au2512"
+SIZE = 1000
+
+
+def make_ledger() -> PnlLedger:
+    return PnlLedger(lambda symbol: SIZE)
+
+
+def make_trade(direction: str, offset: str, volume: float, price: float, tradeid: str = "",
+               dt: datetime = None) -> SimpleNamespace:
+    return SimpleNamespace(symbol=SYMBOL, direction=direction, offset=offset, volume=volume,
+                           price=price, tradeid=tradeid, datetime=dt or datetime.now())
+
+
+def test_partial_close_across_lots():
+    """一笔平仓跨越多个开仓批次，批次按先开先平部分消耗"""
+    ledger = make_ledger()
+    ledger.on_trade(make_trade("LONG", "OPEN", 2, 800.0, "t1"), "s1")
+    ledger.on_trade(make_trade("LONG", "OPEN", 3, 810.0, "t2"), "s2")
+
+    pnl = ledger.on_trade(make_trade("SHORT", "CLOSE", 4, 820.0))
+    # 2手@800 + 2手@810
+    assert pnl == (20.0 * 2 + 10.0 * 2) * SIZE
+    assert ledger.realized_by_strategy["s1"] == 20.0 * 2 * SIZE
+    assert ledger.realized_by_strategy["s2"] == 10.0 * 2 * SIZE
+
+    cost = ledger.get_open_cost(SYMBOL, "LONG")
+    assert cost["volume"] == 1
+    assert cost["avg_price"] == 810.0
+
+    # 空头平仓方向相反
+    ledger.on_trade(make_trade("SHORT", "OPEN", 1, 830.0))
+    assert ledger.on_trade(make_trade("LONG", "CLOSE", 1, 825.0)) == 5.0 * SIZE
+    print("✅ 跨批次部分平仓")
+
+
+def test_close_today_and_yesterday_matching():
+    """平今只消耗今仓批次，平昨只消耗昨仓批次，CLOSE 先昨后今"""
+    ledger = make_ledger()
+    ledger.seed_position(SYMBOL, "LONG", 2, 0, 790.0)
+    ledger.on_trade(make_trade("LONG", "OPEN", 2, 800.0))
+
+    assert ledger.on_trade(make_trade("SHORT", "CLOSETODAY", 1, 805.0)) == 5.0 * SIZE
+    assert ledger.on_trade(make_trade("SHORT", "CLOSEYESTERDAY", 1, 805.0)) == 15.0 * SIZE
+    # 剩余 昨1手@790 今1手@800，CLOSE 先平昨仓
+    assert ledger.on_trade(make_trade("SHORT", "CLOSE", 1, 800.0)) == 10.0 * SIZE
+
+    summary = ledger.get_summary()
+    assert summary["open_lots"][f"{SYMBOL}_LONG"] == {"today": 1, "yesterday": 0}
+
+    # 昨仓已平完，平昨找不到批次计入未配对手数
+    assert ledger.on_trade(make_trade("SHORT", "CLOSEYESTERDAY", 1, 800.0)) == 0.0
+    assert ledger.unmatched_volume == 1
+    print("✅ 平今/平昨配对")
+
+
+def test_seed_position():
+    """CTP持仓初始化昨仓和今仓批次，每个合约方向只初始化一次"""
+    ledger = make_ledger()
+    ledger.seed_position(SYMBOL, "SHORT", 2, 1, 800.0)
+    ledger.seed_position(SYMBOL, "SHORT", 5, 5, 900.0)
+
+    summary = ledger.get_summary()
+    assert summary["open_lots"][f"{SYMBOL}_SHORT"] == {"today": 1, "yesterday": 2}
+    assert ledger.get_open_cost(SYMBOL, "SHORT")["volume"] == 3
+
+    assert ledger.on_trade(make_trade("LONG", "CLOSETODAY", 1, 795.0)) == 5.0 * SIZE
+    assert ledger.on_trade(make_trade("LONG", "CLOSEYESTERDAY", 2, 810.0)) == -20.0 * SIZE
+    print("✅ 持仓初始化")
+
+
+def test_seed_with_replayed_trades():
+    """登录后补推的当日开仓成交与初始化的今仓批次不重复计入"""
+    seed_time = datetime.now()
+
+    # 补推成交先于持仓到达：今仓只补足其余部分
+    ledger = make_ledger()
+    ledger.on_trade(make_trade("LONG", "OPEN", 1, 800.0, "t1", seed_time - timedelta(hours=1)))
+    ledger.seed_position(SYMBOL, "LONG", 0, 3, 805.0, as_of=seed_time)
+    assert ledger.get_summary()["open_lots"][f"{SYMBOL}_LONG"]["today"] == 3
+
+    # 补推成交晚于持仓到达：替换初始化的今仓批次
+    ledger = make_ledger()
+    ledger.seed_position(SYMBOL, "LONG", 0, 3, 805.0, as_of=seed_time)
+    ledger.on_trade(make_trade("LONG", "OPEN", 2, 800.0, "t1", seed_time - timedelta(hours=1)))
+    assert ledger.get_summary()["open_lots"][f"{SYMBOL}_LONG"]["today"] == 3
+
+    # 初始化之后的新成交正常累加
+    ledger.on_trade(make_trade("LONG", "OPEN", 1, 820.0, "t2", seed_time + timedelta(minutes=1)))
+    cost = ledger.get_open_cost(SYMBOL, "LONG")
+    assert cost["volume"] == 4
+    assert cost["cost"] == (800.0 * 2 + 805.0 + 820.0) * SIZE
+    print("✅ 补推成交与初始化去重")
+
+
+def test_roll_day():
+    """交易日切换后今仓批次转为昨仓，保持先开先平顺序"""
+    ledger = make_ledger()
+    ledger.seed_position(SYMBOL, "LONG", 1, 0, 790.0)
+    ledger.on_trade(make_trade("LONG", "OPEN", 1, 800.0))
+    ledger.roll_day()
+
+    assert ledger.get_summary()["open_lots"][f"{SYMBOL}_LONG"] == {"today": 0, "yesterday": 2}
+    # 平今已无批次
+    assert ledger.on_trade(make_trade("SHORT", "CLOSETODAY", 1, 810.0)) == 0.0
+    # 平昨按原先后顺序：先790后800
+    assert ledger.on_trade(make_trade("SHORT", "CLOSEYESTERDAY", 2, 810.0)) == (20.0 + 10.0) * SIZE
+    print("✅ 交易日切换")
+
+
+if __name__ == "__main__":
+    test_partial_close_across_lots()
+    test_close_today_and_yesterday_matching()
+    test_seed_position()
+    test_seed_with_replayed_trades()
+    test_roll_day()
@@ -34,13 +34,17 @@ class ARBIGTestRunner:
                 'description': '策略相关测试',
                 'tests': [
                     'strategy/test_strategy_offline.py',
-                    'strategy/test_strategy_management.py'
+                    'strategy/test_strategy_management.py',
+                    'strategy/test_simulated_signal_sender.py'
                 ]
             },
             'integration': {
                 'description': '集成测试',
                 'tests': [
-                    'integration/test_gfd_default.py'
+                    'integration/test_gfd_default.py',
+                    'integration/test_pnl_ledger.py',
+                    'integration/test_bar_store.py',
+                    'integration/test_ctp_event_handlers.py'
                 ]
             },
             'legacy': {
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+模拟信号发送器测试（不需要服务运行）
+覆盖上期所平今/平昨拆分、超出可平持仓的处理、模拟成交
+"""
+
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from vnpy.trader.constant import Direction, Offset, Exchange
+from services.strategy_service.core.signal_sender import SignalData
+from services.strategy_service.core.simulated_signal_sender import SimulatedSignalSender
+from utils.contract_registry import ContractSpec, split_close_volume
+
+SYMBOL = "au2512"
+SPEC = ContractSpec(SYMBOL, pricetick=0.02, size=1000, open_commission=2.0,
+                    close_commission=2.0, close_today_commission=5.0)
+
+
+class TradeCollector:
+    """接收成交回调的策略替身"""
+
+    def __init__(self):
+        self.trades = []
+
+    def on_trade(self, trade):
+        self.trades.append((trade.direction, trade.offset, trade.price, trade.volume))
+
+
+def make_signal(action: str, volume: int, price: float = None) -> SignalData:
+    return SignalData(strategy_name="test", symbol=SYMBOL, direction=Direction.LONG,
+                      action=action, volume=volume, price=price)
+
+
+def make_bar(dt: datetime, open_price: float, high: float, low: float, close: float) -> SimpleNamespace:
+    return SimpleNamespace(datetime=dt, open_price=open_price, high_price=high, low_price=low, close_price=close)
+
+
+def make_sender(exchange: Exchange = Exchange.SHFE, slippage: float = 0.0):
+    sender = SimulatedSignalSender(SYMBOL, exchange=exchange, spec=SPEC, slippage=slippage)
+    collector = TradeCollector()
+    sender.bind(collector)
+    return sender, collector
+
+
+def hold_long(sender: SimulatedSignalSender, yesterday: int, today: int):
+    """建立昨仓/今仓多头：日盘开仓，夜盘进入下一交易日后再开今仓"""
+    sender.update_bar(make_bar(datetime(2026, 10, 14, 10, 0), 800, 801, 799, 800))
+    if yesterday:
+        sender.send_signal(make_signal("BUY", yesterday))
+    sender.update_bar(make_bar(datetime(2026, 10, 14, 21, 0), 800, 801, 799, 800))
+    if today:
+        sender.send_signal(make_signal("BUY", today))
+    assert (sender.long_yesterday, sender.long_today) == (yesterday, today)
+
+
+def test_split_close_volume():
+    """先平昨、再平今，超出部分单独返回；不区分平今的交易所只有一笔 CLOSE"""
+    assert split_close_volume(3, 2, 2) == ([('CLOSEYESTERDAY', 2), ('CLOSETODAY', 1)], 0)
+    assert split_close_volume(2, 0, 3) == ([('CLOSETODAY', 2)], 0)
+    assert split_close_volume(5, 1, 2) == ([('CLOSEYESTERDAY', 1), ('CLOSETODAY', 2)], 2)
+    assert split_close_volume(1, 0, 0) == ([], 1)
+    assert split_close_volume(4, 1, 2, split_close_today=False) == ([('CLOSE', 3)], 1)
+    print("✅ 平今/平昨拆分")
+
+
+def test_single_close_offsets():
+    """单条平仓优先平昨，数量超过昨仓时拒单；昨仓为零时平今"""
+    sender, collector = make_sender()
+    hold_long(sender, yesterday=2, today=1)
+
+    assert sender.send_signal(make_signal("SELL", 3)) == ""
+    assert sender.send_signal(make_signal("SELL", 2))
+    assert collector.trades[-1][:2] == (Direction.SHORT, Offset.CLOSEYESTERDAY)
+
+    assert sender.send_signal(make_signal("SELL", 1))
+    assert collector.trades[-1][:2] == (Direction.SHORT, Offset.CLOSETODAY)
+    assert sender.long_pos == 0
+    print("✅ 单条平仓开平类型")
+
+
+def test_batch_close_split_and_excess():
+    """批量平仓按持仓快照拆分为平昨+平今，超出可平持仓的部分不发送"""
+    sender, collector = make_sender()
+    hold_long(sender, yesterday=1, today=2)
+    opened = len(collector.trades)
+
+    order_ids = sender.send_batch([make_signal("SELL", 5), make_signal("SHORT", 1)])
+    assert all(order_ids)
+    assert [trade[1:2] + trade[3:] for trade in collector.trades[opened:]] == [
+        (Offset.CLOSEYESTERDAY, 1), (Offset.CLOSETODAY, 2), (Offset.OPEN, 1)
+    ]
+    assert (sender.long_pos, sender.short_pos, sender.net_pos) == (0, 1, -1)
+
+    # 已无多头可平：整条拒绝，不产生成交
+    assert sender.send_batch([make_signal("SELL", 1)]) == [""]
+    assert len(collector.trades) == opened + 3
+    print("✅ 批量平仓拆分与超量处理")
+
+
+def test_close_without_split_exchange():
+    """非上期所合约平仓不区分平今/平昨，超出部分按可平数量成交"""
+    sender, collector = make_sender(exchange=Exchange.DCE)
+    hold_long(sender, yesterday=1, today=1)
+
+    assert sender.send_signal(make_signal("SELL", 3))
+    assert collector.trades[-1][1:2] + collector.trades[-1][3:] == (Offset.CLOSE, 2)
+    assert sender.long_pos == 0
+    print("✅ 不区分平今的交易所")
+
+
+def test_simulated_fills():
+    """GFD激进价成交、滑点、手续费、平仓盈亏，限价挂单在后续K线穿越时成交"""
+    sender, collector = make_sender(slippage=0.02)
+    sender.update_tick(SimpleNamespace(datetime=datetime(2026, 10, 15, 10, 0), last_price=800.0,
+                                       bid_price_1=799.98, ask_price_1=800.02))
+
+    sender.send_signal(make_signal("BUY", 2))
+    # 卖一价+滑点，不超过激进委托价（卖一+1跳）
+    assert collector.trades[-1] == (Direction.LONG, Offset.OPEN, 800.04, 2)
+    assert sender.long_price == 800.04
+
+    # 未到价的限价平仓挂单，K线最高价穿越时按委托价成交（不计滑点）
+    order_id = sender.send_signal(make_signal("SELL", 2, 805.0), "GFS")
+    assert order_id in sender.active_orders
+    sender.update_bar(make_bar(datetime(2026, 10, 15, 10, 1), 801, 806, 800, 805))
+    assert not sender.active_orders
+    assert collector.trades[-1] == (Direction.SHORT, Offset.CLOSETODAY, 805.0, 2)
+
+    fill = sender.fills[-1]
+    assert round(fill[6], 6) == round((805.0 - 800.04) * 2 * 1000, 6)
+    assert sender.commission == 2.0 * 2 + 5.0 * 2
+    assert sender.net_pos == 0
+    print("✅ 模拟成交")
+
+
+if __name__ == "__main__":
+    test_split_close_volume()
+    test_single_close_offsets()
+    test_batch_close_split_and_excess()
+    test_close_without_split_exchange()
+    test_simulated_fills()
@@ -0,0 +1,335 @@
+"""
+本地K线列式存储
+每个合约每个周期一个目录，每列一个原始二进制文件：
+    data/bars/{symbol}/{interval}/datetime.i8  (纳秒时间戳，升序)
+    data/bars/{symbol}/{interval}/open.f8 ... open_interest.f8
+
+- 追加写：K线生成器每分钟追加一行，时间列最后写入，读取方以最短列为准，不会读到半行；
+  追加前先把各列截断到时间列行数，清除上次中断写入残留的半行
+- 区间读：memmap + searchsorted 定位 [start, end)，返回零拷贝的列切片
+供回测加载、策略预热、Web历史K线查询共用。
+"""
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union, Any
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_BAR_DIR = Path(__file__).parent.parent / "data" / "bars"
+
+TIME_COLUMN = 'datetime'
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'turnover', 'open_interest')
+COLUMN_DTYPES = {TIME_COLUMN: np.dtype('<i8'), **{name: np.dtype('<f8') for name in PRICE_COLUMNS}}
+
+# 周期字符串 -> 分钟数
+INTERVAL_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60, '1d': 1440}
+
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_DAY = 86400 * _NS_PER_SECOND
+# 夜盘（21:00后）计入下一交易日
+_NIGHT_SHIFT_NS = 3 * 3600 * _NS_PER_SECOND
+
+TimeLike = Union[datetime, int, float, None]
+
+
+def to_ns(value: TimeLike) -> Optional[int]:
+    """datetime / 秒级时间戳 / 纳秒时间戳 统一转为纳秒"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp() * _NS_PER_SECOND)
+    value = int(value)
+    return value if value > 10 ** 14 else value * _NS_PER_SECOND
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    """纳秒时间戳转本地时间"""
+    return datetime.fromtimestamp(int(ns) / _NS_PER_SECOND)
+
+
+def interval_minutes(interval: str) -> int:
+    """周期字符串转分钟数，不支持的周期抛出 ValueError"""
+    minutes = INTERVAL_MINUTES.get(interval)
+    if minutes is None:
+        raise ValueError(f"不支持的K线周期: {interval}（可选: {', '.join(INTERVAL_MINUTES)}）")
+    return minutes
+
+
+def local_offset_ns(ts: int) -> int:
+    """本地时区相对UTC的偏移（纳秒），K线存储的时间戳按本地时间换算日期"""
+    offset = datetime.fromtimestamp(int(ts) // _NS_PER_SECOND).astimezone().utcoffset()
+    return int(offset.total_seconds()) * _NS_PER_SECOND
+
+
+def trading_day_keys(times: np.ndarray) -> np.ndarray:
+    """
+    纳秒时间戳所属交易日（本地日期距1970-01-01的天数），规则同 utils.trading_calendar.trading_day：
+    夜盘（21:00后）归属下一交易日，周五夜盘归属下周一
+    """
+    times = np.asarray(times, dtype=np.int64)
+    if times.size == 0:
+        return times
+    days = (times + local_offset_ns(times[0]) + _NIGHT_SHIFT_NS) // _NS_PER_DAY
+    # 1970-01-01 为周四：(days + 3) % 7 为星期（周一为0）
+    weekday = (days + 3) % 7
+    return np.where(weekday >= 5, days + 7 - weekday, days)
+
+
+class BarStore:
+    """列式K线存储"""
+
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir or _BAR_DIR)
+        self._lock = threading.Lock()
+        self._last_ts: Dict[tuple, int] = {}  # (symbol, interval) -> 已写入的最后时间戳
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.base_dir / symbol / interval
+
+    def _column_path(self, symbol: str, interval: str, column: str) -> Path:
+        return self._dir(symbol, interval) / f"{column}.{COLUMN_DTYPES[column].kind}{COLUMN_DTYPES[column].itemsize}"
+
+    # ==================== 写入 ====================
+
+    def append_bar(self, bar, interval: str = '1m') -> bool:
+        """追加一根K线（vnpy BarData）"""
+        return self.append(bar.symbol, interval, {
+            TIME_COLUMN: [to_ns(bar.datetime)],
+            'open': [bar.open_price],
+            'high': [bar.high_price],
+            'low': [bar.low_price],
+            'close': [bar.close_price],
+            'volume': [getattr(bar, 'volume', 0)],
+            'turnover': [getattr(bar, 'turnover', 0)],
+            'open_interest': [getattr(bar, 'open_interest', 0)],
+        }) > 0
+
+    def append(self, symbol: str, interval: str, columns: Dict[str, Any]) -> int:
+        """
+        批量追加K线（时间必须升序；早于已存最后时间的行会被跳过）
+
+        Args:
+            columns: {列名: 数组}，datetime 列为纳秒时间戳或datetime，缺失的价格列补0
+
+        Returns:
+            int: 实际写入行数
+        """
+        times = columns[TIME_COLUMN]
+        if len(times) and isinstance(times[0], datetime):
+            times = [to_ns(t) for t in times]
+        times = np.asarray(times, dtype=COLUMN_DTYPES[TIME_COLUMN])
+        if times.size == 0:
+            return 0
+
+        key = (symbol, interval)
+        with self._lock:
+            self._truncate_partial_rows(symbol, interval)
+            last_ts = self._last_ts.get(key)
+            if last_ts is None:
+                last_ts = self._read_last_ts(symbol, interval)
+
+            mask = times > last_ts if last_ts is not None else np.ones(times.size, dtype=bool)
+            # 去掉本批内部的乱序/重复行
+            if times.size > 1:
+                mask[1:] &= times[1:] > np.maximum.accumulate(times)[:-1]
+            if not mask.any():
+                return 0
+
+            directory = self._dir(symbol, interval)
+            directory.mkdir(parents=True, exist_ok=True)
+
+            # 时间列最后写入：读取方按最短列截断即可得到完整行
+            for name in PRICE_COLUMNS:
+                values = columns.get(name)
+                values = np.zeros(times.size) if values is None else np.asarray(values, dtype=COLUMN_DTYPES[name])
+                with open(self._column_path(symbol, interval, name), 'ab') as f:
+                    f.write(values[mask].tobytes())
+            with open(self._column_path(symbol, interval, TIME_COLUMN), 'ab') as f:
+                f.write(times[mask].tobytes())
+
+            self._last_ts[key] = int(times[mask][-1])
+            return int(mask.sum())
+
+    def _truncate_partial_rows(self, symbol: str, interval: str):
+        """
+        各列截断到完整行数（调用方持有锁）
+
+        追加时时间列最后写入，中断的写入只会在价格列留下多余的行；不截断的话下次追加的
+        价格会错位到这些残留行之后。
+        """
+        paths = {name: self._column_path(symbol, interval, name) for name in COLUMN_DTYPES}
+        sizes = {name: os.path.getsize(path) if path.exists() else 0 for name, path in paths.items()}
+        rows = min(sizes[name] // COLUMN_DTYPES[name].itemsize for name in COLUMN_DTYPES)
+
+        for name, path in paths.items():
+            size = rows * COLUMN_DTYPES[name].itemsize
+            if sizes[name] > size:
+                logger.warning(f"⚠️ [K线存储] {symbol} {interval} {name} 列残留未完成写入，截断到{rows}行")
+                os.truncate(path, size)
+                if name == TIME_COLUMN:
+                    self._last_ts.pop((symbol, interval), None)
+
+    def _read_last_ts(self, symbol: str, interval: str) -> Optional[int]:
+        path = self._column_path(symbol, interval, TIME_COLUMN)
+        if not path.exists() or os.path.getsize(path) < 8:
+            return None
+        with open(path, 'rb') as f:
+            f.seek((os.path.getsize(path) // 8 - 1) * 8)
+            return int(np.frombuffer(f.read(8), dtype=COLUMN_DTYPES[TIME_COLUMN])[0])
+
+    # ==================== 读取 ====================
+
+    def _map_columns(self, symbol: str, interval: str) -> Optional[Dict[str, np.ndarray]]:
+        """memmap所有列，按最短列截断为完整行"""
+        paths = {name: self._column_path(symbol, interval, name) for name in COLUMN_DTYPES}
+        if not all(path.exists() for path in paths.values()):
+            return None
+
+        rows = min(os.path.getsize(path) // COLUMN_DTYPES[name].itemsize for name, path in paths.items())
+        if rows == 0:
+            return None
+        return {
+            name: np.memmap(path, dtype=COLUMN_DTYPES[name], mode='r', shape=(rows,))
+            for name, path in paths.items()
+        }
+
+    def read(self, symbol: str, interval: str = '1m', start: TimeLike = None, end: TimeLike = None) -> Dict[str, np.ndarray]:
+        """
+        读取 [start, end) 区间的K线（零拷贝列切片）
+
+        Returns:
+            {列名: 数组}，无数据时各列为空数组
+        """
+        columns = self._map_columns(symbol, interval)
+        if columns is None:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+
+        times = columns[TIME_COLUMN]
+        lo = 0 if start is None else int(np.searchsorted(times, to_ns(start), side='left'))
+        hi = times.size if end is None else int(np.searchsorted(times, to_ns(end), side='left'))
+        return {name: array[lo:hi] for name, array in columns.items()}
+
+    def read_last(self, symbol: str, interval: str = '1m', count: int = 100, end: TimeLike = None) -> Dict[str, np.ndarray]:
+        """读取 end 之前（不含）的最后 count 根K线"""
+        data = self.read(symbol, interval, None, end)
+        return {name: array[-count:] if count > 0 else array[:0] for name, array in data.items()}
+
+    def count(self, symbol: str, interval: str = '1m') -> int:
+        """已存K线数量"""
+        columns = self._map_columns(symbol, interval)
+        return 0 if columns is None else int(columns[TIME_COLUMN].size)
+
+    def list_symbols(self) -> List[str]:
+        """已有数据的合约"""
+        if not self.base_dir.exists():
+            return []
+        return sorted(d.name for d in self.base_dir.iterdir() if d.is_dir())
+
+
+def resample(data: Dict[str, np.ndarray], minutes: int) -> Dict[str, np.ndarray]:
+    """
+    1分钟K线聚合为N分钟K线
+
+    日内周期按自然时间对齐；日线及以上按交易日聚合（夜盘计入下一交易日，周五夜盘计入下周一），
+    K线时间为交易日本地零点。
+
+    Args:
+        data: read() 返回的列数据
+        minutes: 目标周期（分钟）
+    """
+    times = np.asarray(data[TIME_COLUMN])
+    if minutes <= 1 or times.size == 0:
+        return data
+
+    if minutes >= 1440:
+        days = minutes // 1440
+        buckets = trading_day_keys(times) // days
+        bucket_times = buckets * days * _NS_PER_DAY - local_offset_ns(times[0])
+    else:
+        period = minutes * 60 * _NS_PER_SECOND
+        buckets = times // period
+        bucket_times = buckets * period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], times.size] - 1
+
+    return {
+        TIME_COLUMN: bucket_times[starts],
+        'open': np.asarray(data['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(data['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(data['low']), starts),
+        'close': np.asarray(data['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(data['volume']), starts),
+        'turnover': np.add.reduceat(np.asarray(data['turnover']), starts),
+        'open_interest': np.asarray(data['open_interest'])[ends],
+    }
+
+
+def aggregate_ticks(ticks: np.ndarray, minutes: int = 1) -> Dict[str, np.ndarray]:
+    """
+    tick记录聚合为K线列数据（输入为 utils.tick_recorder.load_ticks 的结构化数组）
+
+    成交量/成交额为当日累计值，按相邻K线末笔的差值还原为区间量。
+    """
+    if ticks.size == 0:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+
+    times = np.asarray(ticks['ts'])
+    period = minutes * 60 * _NS_PER_SECOND
+    buckets = times // period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], times.size] - 1
+    last = np.asarray(ticks['last_price'])
+
+    def _period_delta(cumulative: np.ndarray) -> np.ndarray:
+        values = np.asarray(cumulative)
+        # 交易日切换时累计值归零，差值为负的按0处理
+        return np.clip(np.diff(np.r_[values[starts[0]], values[ends]]), 0, None)
+
+    return {
+        TIME_COLUMN: buckets[starts] * period,
+        'open': last[starts],
+        'high': np.maximum.reduceat(last, starts),
+        'low': np.minimum.reduceat(last, starts),
+        'close': last[ends],
+        'volume': _period_delta(ticks['volume']),
+        'turnover': _period_delta(ticks['turnover']),
+        'open_interest': np.asarray(ticks['open_interest'])[ends],
+    }
+
+
+def to_bar_dicts(symbol: str, data: Dict[str, np.ndarray], interval: str = '1m') -> List[Dict[str, Any]]:
+    """列数据转为接口返回的字典列表"""
+    return [
+        {
+            'symbol': symbol,
+            'datetime': ns_to_datetime(ts).isoformat(),
+            'open': float(o),
+            'high': float(h),
+            'low': float(l),
+            'close': float(c),
+            'volume': float(v),
+            'interval': interval,
+        }
+        for ts, o, h, l, c, v in zip(
+            data[TIME_COLUMN], data['open'], data['high'], data['low'], data['close'], data['volume']
+        )
+    ]
+
+
+# 全局实例
+_bar_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> BarStore:
+    """获取K线存储实例"""
+    global _bar_store
+    if _bar_store is None:
+        _bar_store = BarStore()
+    return _bar_store
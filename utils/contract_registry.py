@@ -0,0 +1,240 @@
+"""
+合约规格注册表
+缓存最小变动价位、合约乘数、保证金率、手续费等合约元数据：
+- 品种默认值覆盖常用上期所品种，未收到合约回报时也能正确定价
+- CTP合约回报(_on_contract)到达时覆盖为实际值，并持久化到 data/contract_specs.json，重启后直接可用
+下单定价和保证金计算只做字典查找。
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SPEC_FILE = Path(__file__).parent.parent / "data" / "contract_specs.json"
+
+# 合约代码中的品种前缀: au2604 -> au
+_PRODUCT_RE = re.compile(r"^([a-zA-Z]+)")
+
+
+@dataclass
+class ContractSpec:
+    """合约规格"""
+    symbol: str
+    pricetick: float = 0.01             # 最小变动价位
+    size: float = 1.0                   # 合约乘数
+    long_margin_ratio: float = 0.12     # 多头保证金率
+    short_margin_ratio: float = 0.12    # 空头保证金率
+    open_commission: float = 0.0        # 开仓手续费（元/手）
+    close_commission: float = 0.0       # 平昨手续费（元/手）
+    close_today_commission: float = 0.0  # 平今手续费（元/手）
+    commission_rate: float = 0.0        # 按成交金额计的手续费率（与按手数的部分叠加）
+
+    def round_price(self, price: float) -> float:
+        """价格调整到最小变动价位的整数倍"""
+        if self.pricetick <= 0:
+            return round(price, 2)
+        return round(round(price / self.pricetick) * self.pricetick, 6)
+
+    def margin(self, price: float, volume: float, direction: str = 'LONG') -> float:
+        """保证金 = 价格 × 乘数 × 手数 × 保证金率"""
+        ratio = self.long_margin_ratio if str(direction).upper() in ('LONG', 'BUY', '多') else self.short_margin_ratio
+        return price * self.size * volume * ratio
+
+    def commission(self, offset: str, volume: float, price: float = 0.0) -> float:
+        """按开平类型估算手续费"""
+        offset = str(offset).upper()
+        if 'OPEN' in offset or offset == '开':
+            per_lot = self.open_commission
+        elif 'TODAY' in offset or offset == '平今':
+            per_lot = self.close_today_commission
+        else:
+            per_lot = self.close_commission
+        return per_lot * volume + self.commission_rate * price * self.size * volume
+
+
+# 上期所常用品种默认规格（收到CTP合约回报后以实际值为准）
+PRODUCT_DEFAULTS: Dict[str, ContractSpec] = {
+    'au': ContractSpec('au', pricetick=0.02, size=1000, long_margin_ratio=0.1397, short_margin_ratio=0.1397,
+                       open_commission=2.0),
+    'ag': ContractSpec('ag', pricetick=1.0, size=15, long_margin_ratio=0.15, short_margin_ratio=0.15,
+                       commission_rate=0.00005),
+    'cu': ContractSpec('cu', pricetick=10.0, size=5, long_margin_ratio=0.12, short_margin_ratio=0.12,
+                       commission_rate=0.00005),
+    'al': ContractSpec('al', pricetick=5.0, size=5, long_margin_ratio=0.12, short_margin_ratio=0.12,
+                       open_commission=3.0, close_commission=3.0),
+    'zn': ContractSpec('zn', pricetick=5.0, size=5, long_margin_ratio=0.12, short_margin_ratio=0.12,
+                       open_commission=3.0, close_commission=3.0),
+    'pb': ContractSpec('pb', pricetick=5.0, size=5, long_margin_ratio=0.12, short_margin_ratio=0.12,
+                       commission_rate=0.00004),
+    'ni': ContractSpec('ni', pricetick=10.0, size=1, long_margin_ratio=0.14, short_margin_ratio=0.14,
+                       open_commission=3.0, close_commission=3.0),
+    'sn': ContractSpec('sn', pricetick=10.0, size=1, long_margin_ratio=0.14, short_margin_ratio=0.14,
+                       open_commission=3.0, close_commission=3.0),
+}
+
+
+def get_product(symbol: str) -> str:
+    """合约代码转品种代码（小写）"""
+    match = _PRODUCT_RE.match(symbol or '')
+    return match.group(1).lower() if match else ''
+
+
+def split_close_volume(volume: int, yesterday: int, today: int,
+                       split_close_today: bool = True) -> Tuple[List[Tuple[str, int]], int]:
+    """
+    平仓数量按"先平昨、再平今"拆分（CtpIntegration 批量下单与 SimulatedSignalSender 共用）
+
+    超出可平持仓的部分必然被交易所拒单，不再发送，由调用方记录。
+
+    Args:
+        volume: 平仓手数
+        yesterday / today: 可平的昨仓/今仓手数
+        split_close_today: 是否区分平今/平昨（上期所/能源中心）
+
+    Returns:
+        ([(开平类型, 手数)], 超出可平持仓的手数)；开平类型为 CLOSEYESTERDAY/CLOSETODAY，不区分时为 CLOSE
+    """
+    yesterday, today = max(int(yesterday), 0), max(int(today), 0)
+    closable = min(int(volume), yesterday + today)
+    excess = int(volume) - closable
+    if not split_close_today:
+        return ([('CLOSE', closable)] if closable > 0 else []), excess
+
+    parts = []
+    yesterday_volume = min(closable, yesterday)
+    if yesterday_volume > 0:
+        parts.append(('CLOSEYESTERDAY', yesterday_volume))
+    if closable > yesterday_volume:
+        parts.append(('CLOSETODAY', closable - yesterday_volume))
+    return parts, excess
+
+
+class ContractRegistry:
+    """合约规格注册表"""
+
+    # 合约回报集中到达，延迟合并写盘（秒）
+    SAVE_DELAY = 5.0
+
+    def __init__(self, spec_file: Optional[Path] = None):
+        self._spec_file = Path(spec_file) if spec_file else _SPEC_FILE
+        self._specs: Dict[str, ContractSpec] = {}
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self.load()
+
+    def get(self, symbol: str) -> ContractSpec:
+        """获取合约规格：合约 -> 品种默认值 -> 通用默认值"""
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            return spec
+
+        default = PRODUCT_DEFAULTS.get(get_product(symbol))
+        spec = replace(default, symbol=symbol) if default else ContractSpec(symbol)
+        self._specs[symbol] = spec
+        return spec
+
+    def update_from_contract(self, contract) -> ContractSpec:
+        """用CTP合约回报更新规格（缺失字段沿用默认值）"""
+        symbol = contract.symbol
+        base = self.get(symbol)
+        updates: Dict[str, Any] = {}
+
+        pricetick = getattr(contract, 'pricetick', 0) or 0
+        size = getattr(contract, 'size', 0) or 0
+        if pricetick > 0:
+            updates['pricetick'] = float(pricetick)
+        if size > 0:
+            updates['size'] = float(size)
+
+        # 部分网关会在合约数据或extra中带出保证金率
+        extra = getattr(contract, 'extra', None) or {}
+        for field, keys in (
+            ('long_margin_ratio', ('long_margin_ratio', 'LongMarginRatio')),
+            ('short_margin_ratio', ('short_margin_ratio', 'ShortMarginRatio')),
+        ):
+            for key in keys:
+                value = getattr(contract, key, None)
+                if value is None and isinstance(extra, dict):
+                    value = extra.get(key)
+                if value and 0 < float(value) < 1:
+                    updates[field] = float(value)
+                    break
+
+        spec = replace(base, **updates) if updates else base
+        self._specs[symbol] = spec
+        if updates:
+            self._schedule_save()
+        return spec
+
+    def update_commission(self, symbol: str, open_commission: float = None, close_commission: float = None,
+                          close_today_commission: float = None, commission_rate: float = None) -> ContractSpec:
+        """更新手续费（如查询到经纪商实际费率时调用）"""
+        updates = {
+            key: float(value) for key, value in (
+                ('open_commission', open_commission),
+                ('close_commission', close_commission),
+                ('close_today_commission', close_today_commission),
+                ('commission_rate', commission_rate),
+            ) if value is not None
+        }
+        spec = replace(self.get(symbol), **updates)
+        self._specs[symbol] = spec
+        self._schedule_save()
+        return spec
+
+    # ==================== 持久化 ====================
+
+    def load(self):
+        """从磁盘加载上次保存的合约规格"""
+        try:
+            if not self._spec_file.exists():
+                return
+            with open(self._spec_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for symbol, fields in data.items():
+                self._specs[symbol] = ContractSpec(**fields)
+            logger.info(f"📑 加载合约规格缓存: {len(self._specs)} 个合约")
+        except Exception as e:
+            logger.warning(f"加载合约规格缓存失败: {e}")
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        """写盘（先写临时文件再替换，避免写到一半被读取）"""
+        with self._lock:
+            self._save_timer = None
+        try:
+            self._spec_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._spec_file.with_suffix('.json.tmp')
+            data = {symbol: asdict(spec) for symbol, spec in list(self._specs.items())}
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_file.replace(self._spec_file)
+            logger.debug(f"合约规格已保存: {len(data)} 个合约")
+        except Exception as e:
+            logger.error(f"保存合约规格失败: {e}")
+
+
+# 全局实例
+_contract_registry: Optional[ContractRegistry] = None
+
+
+def get_contract_registry() -> ContractRegistry:
+    """获取合约规格注册表实例"""
+    global _contract_registry
+    if _contract_registry is None:
+        _contract_registry = ContractRegistry()
+    return _contract_registry
@@ -0,0 +1,268 @@
+"""
+交易事件日志（JSON Lines）
+与人读日志并行，记录结构化的订单/成交/信号/错误事件，查询时无需再从日志文本中用正则推断类型、策略和合约。
+    logs/events/{source}_{YYYYMMDD}.jsonl
+
+- 调用线程只构造字典并 put_nowait，队列满时丢弃并计数
+- 后台写线程批量序列化后追加写入；每个进程使用各自的 source，避免多进程写同一文件
+"""
+
+import atexit
+import heapq
+import json
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_EVENT_DIR = Path(__file__).parent.parent / "logs" / "events"
+
+# 事件类型
+EVENT_ORDER = "ORDER"
+EVENT_TRADE = "TRADE"
+EVENT_SIGNAL = "SIGNAL"
+EVENT_ERROR = "ERROR"
+
+
+def _enum_value(value: Any) -> Any:
+    """vnpy 枚举转为其值，其他类型原样返回"""
+    return getattr(value, 'value', value)
+
+
+class EventJournal:
+    """后台线程写入的结构化事件日志"""
+
+    def __init__(self, source: str, base_dir: Optional[Path] = None, max_queue: int = 50000,
+                 flush_interval: float = 1.0):
+        """
+        Args:
+            source: 事件来源（trading / strategy），决定写入的文件名
+            base_dir: 事件日志目录，默认 logs/events
+            max_queue: 待写队列上限，超出后丢弃新事件
+            flush_interval: 写线程空闲时的最长等待（秒）
+        """
+        self.source = source
+        self.base_dir = Path(base_dir or _EVENT_DIR)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._running = False
+        self._file = None
+        self._file_day = ''
+
+        # 统计
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+
+    # ==================== 调用线程 ====================
+
+    def emit(self, event_type: str, strategy_name: Optional[str] = None, symbol: Optional[str] = None,
+             is_success: bool = True, message: str = '', **fields) -> bool:
+        """
+        记录一条事件（不阻塞）
+
+        Args:
+            event_type: ORDER / TRADE / SIGNAL / ERROR
+            strategy_name: 策略名称
+            symbol: 合约代码
+            is_success: 是否成功
+            message: 简要说明
+            **fields: 事件字段（vnpy枚举自动转为值）
+
+        Returns:
+            bool: 是否进入写队列
+        """
+        if not self._running:
+            self.start()
+
+        event = {
+            'timestamp': datetime.now().isoformat(),
+            'log_type': event_type,
+            'source': self.source,
+            'strategy_name': strategy_name,
+            'symbol': symbol,
+            'is_success': is_success,
+            'message': message,
+        }
+        for key, value in fields.items():
+            event[key] = _enum_value(value)
+
+        try:
+            self._queue.put_nowait(event)
+            self.emitted += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 10000 == 1:
+                logger.warning(f"⚠️ [事件日志] 写队列已满，累计丢弃 {self.dropped} 条")
+            return False
+
+    # ==================== 写线程 ====================
+
+    def start(self):
+        """启动后台写线程"""
+        with self._start_lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"EventJournal-{self.source}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """停止写线程并写完队列中剩余事件"""
+        if not self._running:
+            return
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_file()
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        # 按事件日期分组，跨日时切换文件
+        lines: Dict[str, List[str]] = {}
+        for event in batch:
+            try:
+                lines.setdefault(event['timestamp'][:10].replace('-', ''), []).append(
+                    json.dumps(event, ensure_ascii=False, default=str)
+                )
+            except Exception as e:
+                logger.debug(f"[事件日志] 序列化失败: {e}")
+
+        for day, day_lines in lines.items():
+            try:
+                handle = self._open_file(day)
+                handle.write('\n'.join(day_lines) + '\n')
+                handle.flush()
+                self.written += len(day_lines)
+            except Exception as e:
+                logger.error(f"❌ [事件日志] 写入失败 {self.source}_{day}: {e}")
+
+    def _open_file(self, day: str):
+        if self._file is None or self._file_day != day:
+            self._close_file()
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+            self._file = open(event_file_path(self.source, day, self.base_dir), 'a', encoding='utf-8')
+            self._file_day = day
+        return self._file
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """写入统计"""
+        return {
+            'emitted': self.emitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+        }
+
+
+# ==================== 读取 ====================
+
+def event_file_path(source: str, day: str, base_dir: Optional[Path] = None) -> Path:
+    """事件文件路径: {base}/{source}_{YYYYMMDD}.jsonl"""
+    return Path(base_dir or _EVENT_DIR) / f"{source}_{day}.jsonl"
+
+
+def iter_events(event_type: Optional[str] = None,
+                strategy_name: Optional[str] = None,
+                symbol: Optional[str] = None,
+                start_time: Optional[datetime] = None,
+                end_time: Optional[datetime] = None,
+                base_dir: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """
+    按时间倒序产出符合条件的事件（只打开日期在查询区间内的文件）
+    """
+    from utils.trading_logger import _read_lines_reversed
+
+    root = Path(base_dir or _EVENT_DIR)
+    if not root.exists():
+        return
+
+    # 按日期分组，同一天内多个来源的事件合并后按时间倒序
+    files_by_day: Dict[str, List[Path]] = {}
+    for path in root.glob('*.jsonl'):
+        day = path.stem.rsplit('_', 1)[-1]
+        if start_time and day < start_time.strftime('%Y%m%d'):
+            continue
+        if end_time and day > end_time.strftime('%Y%m%d'):
+            continue
+        files_by_day.setdefault(day, []).append(path)
+
+    start_str = start_time.isoformat() if start_time else None
+    end_str = end_time.isoformat() if end_time else None
+
+    def _scan(path: Path) -> Iterator[Dict[str, Any]]:
+        try:
+            for line in _read_lines_reversed(str(path)):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                timestamp = event.get('timestamp', '')
+                if start_str and timestamp < start_str:
+                    break
+                if end_str and timestamp > end_str:
+                    continue
+                if event_type and event.get('log_type') != event_type:
+                    continue
+                if strategy_name and event.get('strategy_name') != strategy_name:
+                    continue
+                if symbol and event.get('symbol') != symbol:
+                    continue
+                yield event
+        except OSError:
+            return
+
+    for day in sorted(files_by_day, reverse=True):
+        paths = files_by_day[day]
+        if len(paths) == 1:
+            yield from _scan(paths[0])
+        else:
+            # 同一天有多个来源时按时间倒序归并
+            yield from heapq.merge(*(_scan(path) for path in paths),
+                                   key=lambda e: e.get('timestamp', ''), reverse=True)
+
+
+# 全局实例（按来源）
+_journals: Dict[str, EventJournal] = {}
+
+
+def get_event_journal(source: str) -> EventJournal:
+    """获取事件日志实例（进程退出时自动写完队列）"""
+    journal = _journals.get(source)
+    if journal is None:
+        journal = EventJournal(source)
+        _journals[source] = journal
+        atexit.register(journal.stop)
+    return journal
@@ -0,0 +1,164 @@
+"""
+日志限流
+按调用位置（或指定key）维护令牌桶，热点路径的日志超出速率时直接丢弃并计数：
+- 被抑制后再次放行的那条日志附带期间被抑制的条数
+- 定期输出一行汇总，列出各调用位置被抑制的数量
+- 消息使用 logging 的 %s 参数延迟格式化，被抑制的日志不做字符串拼接
+
+用法:
+    tlog = get_throttled_logger(__name__)
+    tlog.info("收到tick推送: %s @ %.2f", symbol, price, rate=0.2)   # 每个调用位置最多每5秒一条
+"""
+
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Optional, Any
+
+from utils.logger import get_logger
+
+
+class _Bucket:
+    """单个调用位置的令牌桶"""
+
+    __slots__ = ('tokens', 'updated', 'suppressed')
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+        self.suppressed = 0  # 上次放行后被抑制的条数
+
+
+class ThrottledLogger:
+    """带令牌桶限流的日志包装器"""
+
+    def __init__(self, logger: logging.Logger, rate: float = 1.0, burst: float = 1.0,
+                 summary_interval: float = 60.0):
+        """
+        Args:
+            logger: 实际写日志的 logger
+            rate: 默认每秒放行条数（每个调用位置独立计算）
+            burst: 默认突发上限
+            summary_interval: 抑制汇总的输出间隔（秒），0 表示不输出
+        """
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+
+        self._buckets: Dict[Any, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._period_suppressed: Dict[Any, int] = {}
+        self._last_summary = time.monotonic()
+
+        # 统计
+        self.emitted = 0
+        self.suppressed = 0
+
+    def debug(self, msg: str, *args, **kwargs):
+        self._log(logging.DEBUG, msg, args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs):
+        self._log(logging.INFO, msg, args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self._log(logging.WARNING, msg, args, **kwargs)
+
+    def error(self, msg: str, *args, **kwargs):
+        self._log(logging.ERROR, msg, args, **kwargs)
+
+    def _log(self, level: int, msg: str, args: tuple, key: Any = None,
+             rate: Optional[float] = None, burst: Optional[float] = None):
+        """
+        Args:
+            key: 限流key，默认为调用位置（文件名, 行号）
+            rate: 本调用位置每秒放行条数
+            burst: 本调用位置突发上限
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if key is None:
+            frame = sys._getframe(2)
+            key = (frame.f_code.co_filename, frame.f_lineno)
+
+        now = time.monotonic()
+        rate = self.rate if rate is None else rate
+        burst = self.burst if burst is None else burst
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(burst, now)
+            else:
+                bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+                bucket.updated = now
+
+            if bucket.tokens < 1.0:
+                bucket.suppressed += 1
+                self.suppressed += 1
+                self._period_suppressed[key] = self._period_suppressed.get(key, 0) + 1
+                allowed = False
+                skipped = 0
+            else:
+                bucket.tokens -= 1.0
+                skipped = bucket.suppressed
+                bucket.suppressed = 0
+                self.emitted += 1
+                allowed = True
+
+            summary = self._take_summary(now)
+
+        if allowed:
+            if skipped:
+                msg = f"{msg} [已抑制{skipped}条]"
+            self.logger.log(level, msg, *args)
+
+        if summary:
+            self.logger.info(summary)
+
+    def _take_summary(self, now: float) -> Optional[str]:
+        """到达汇总间隔时生成汇总行并清空本期计数（调用方持有锁）"""
+        if self.summary_interval <= 0 or now - self._last_summary < self.summary_interval:
+            return None
+
+        elapsed = now - self._last_summary
+        self._last_summary = now
+        if not self._period_suppressed:
+            return None
+
+        top = sorted(self._period_suppressed.items(), key=lambda item: item[1], reverse=True)[:5]
+        total = sum(self._period_suppressed.values())
+        self._period_suppressed = {}
+        details = ", ".join(f"{_format_key(key)}={count}" for key, count in top)
+        return f"🔇 [日志限流] 最近{elapsed:.0f}秒抑制 {total} 条: {details}"
+
+    def get_stats(self) -> Dict[str, int]:
+        """限流统计"""
+        return {
+            'emitted': self.emitted,
+            'suppressed': self.suppressed,
+            'callsites': len(self._buckets),
+        }
+
+
+def _format_key(key: Any) -> str:
+    if isinstance(key, tuple) and len(key) == 2:
+        filename, lineno = key
+        return f"{filename.replace(chr(92), '/').rsplit('/', 1)[-1]}:{lineno}"
+    return str(key)
+
+
+# 全局实例缓存
+_throttled_loggers: Dict[str, ThrottledLogger] = {}
+
+
+def get_throttled_logger(name: str = 'gold_arbitrage', rate: float = 1.0, burst: float = 1.0,
+                         summary_interval: float = 60.0) -> ThrottledLogger:
+    """获取限流日志记录器（与 get_logger 同名的 logger 共用输出）"""
+    throttled = _throttled_loggers.get(name)
+    if throttled is None:
+        throttled = ThrottledLogger(get_logger(name), rate, burst, summary_interval)
+        _throttled_loggers[name] = throttled
+    return throttled
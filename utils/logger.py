@@ -1,16 +1,155 @@
 """
 日志工具模块
 提供统一的日志记录功能 - 支持按日期自动切换日志文件
+
+所有logger只挂一个 QueueHandler，文件/控制台写入由每个日志文件对应的一个后台 QueueListener 完成，
+调用线程（行情回调、K线生成等热点路径）不再做阻塞的磁盘和控制台IO。
+
+环境变量:
+    ARBIG_LOG_LEVEL        日志文件/控制台写入级别，默认取 config.config.CONFIG['log_level']（INFO）
+    ARBIG_LOG_CONSOLE      是否输出到控制台，0/false/off 关闭（生产环境建议关闭），默认开启
+    ARBIG_LOG_QUEUE_SIZE   日志队列上限，默认 10000
+    ARBIG_LOG_OVERFLOW     队列满时的处理: drop（默认，丢弃 WARNING 以下的日志并计数）/ block（阻塞等待）
 """
 
+import atexit
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 # 全局logger缓存，避免重复创建handlers
 _logger_cache = {}
 
+# 日志文件 -> (队列, 后台写线程)，同一个文件只有一个写入者
+_listeners = {}
+_listener_lock = threading.Lock()
+
+# 队列满时阻塞等待的最长时间（秒），WARNING 及以上级别或 block 策略使用
+_BLOCK_TIMEOUT = 1.0
+
+
+def _env_flag(name, default=True):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('0', 'false', 'off', 'no')
+
+
+class BoundedQueueHandler(QueueHandler):
+    """有界队列的 QueueHandler：队列满时按溢出策略丢弃或阻塞，不会无限占用内存"""
+
+    def __init__(self, log_queue, overflow='drop'):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.overflow == 'drop' and record.levelno < logging.WARNING:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+            return
+
+        # 警告和错误尽量不丢：短暂阻塞等待写线程腾出空间
+        try:
+            self.queue.put(record, timeout=_BLOCK_TIMEOUT)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _configured_level():
+    """后台写线程handler的日志级别：环境变量 ARBIG_LOG_LEVEL 优先，其次配置文件 log_level"""
+    name = os.environ.get('ARBIG_LOG_LEVEL')
+    if not name:
+        try:
+            from config.config import CONFIG
+            name = CONFIG.get('log_level', 'INFO')
+        except Exception:
+            name = 'INFO'
+    level = logging.getLevelName(str(name).strip().upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _get_queue(log_file):
+    """获取日志文件对应的队列，首次调用时创建文件/控制台handler并启动后台写线程"""
+    with _listener_lock:
+        entry = _listeners.get(log_file)
+        if entry is not None:
+            return entry[0]
+
+        log_queue = queue.Queue(maxsize=int(os.environ.get('ARBIG_LOG_QUEUE_SIZE', '10000')))
+        # 写入级别按配置设置，不随首个创建该队列的logger变化
+        level = _configured_level()
+
+        # 🎯 使用TimedRotatingFileHandler - 每天午夜自动切换日志文件
+        # when='midnight': 每天午夜切换
+        # interval=1: 每1天切换一次
+        # backupCount=30: 保留30天的日志文件
+        # encoding='utf-8': 使用UTF-8编码
+        file_handler = TimedRotatingFileHandler(
+            filename=log_file,
+            when='midnight',
+            interval=1,
+            backupCount=30,
+            encoding='utf-8'
+        )
+        file_handler.setLevel(level)
+
+        # 设置日志文件名后缀格式为日期
+        file_handler.suffix = "%Y%m%d"
+
+        # 创建格式化器
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        file_handler.setFormatter(formatter)
+        handlers = [file_handler]
+
+        # 创建控制台处理器（可通过 ARBIG_LOG_CONSOLE=0 关闭）
+        if _env_flag('ARBIG_LOG_CONSOLE'):
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(level)
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[log_file] = (log_queue, listener)
+        return log_queue
+
+
+def shutdown_logging():
+    """停止后台写线程并写完队列中剩余日志（进程退出时自动调用）"""
+    with _listener_lock:
+        for log_queue, listener in _listeners.values():
+            try:
+                listener.stop()
+            except Exception:
+                pass
+            for handler in listener.handlers:
+                try:
+                    handler.close()
+                except Exception:
+                    pass
+        _listeners.clear()
+
+
+atexit.register(shutdown_logging)
+
+
+def get_dropped_count():
+    """因队列满被丢弃的日志条数"""
+    return sum(
+        handler.dropped
+        for logger in _logger_cache.values()
+        for handler in logger.handlers
+        if isinstance(handler, BoundedQueueHandler)
+    )
+
 
 def clear_logger_cache():
     """清理logger缓存，强制重新创建"""
@@ -29,7 +168,7 @@ def clear_logger_cache():
 
 def setup_logger(name, log_file, level=logging.INFO):
     """
-    设置日志记录器 - 使用TimedRotatingFileHandler自动按日期切换
+    设置日志记录器 - 通过队列交给后台线程写入，TimedRotatingFileHandler自动按日期切换
 
     Args:
         name: 日志记录器名称
@@ -51,37 +190,13 @@ def setup_logger(name, log_file, level=logging.INFO):
     if logger.handlers:
         logger.handlers.clear()
 
-    # 🎯 使用TimedRotatingFileHandler - 每天午夜自动切换日志文件
-    # when='midnight': 每天午夜切换
-    # interval=1: 每1天切换一次
-    # backupCount=30: 保留30天的日志文件
-    # encoding='utf-8': 使用UTF-8编码
-    file_handler = TimedRotatingFileHandler(
-        filename=log_file,
-        when='midnight',
-        interval=1,
-        backupCount=30,
-        encoding='utf-8'
+    # 所有logger共用该日志文件的队列，实际写入在后台线程完成
+    queue_handler = BoundedQueueHandler(
+        _get_queue(os.path.abspath(log_file)),
+        overflow=os.environ.get('ARBIG_LOG_OVERFLOW', 'drop').strip().lower()
     )
-    file_handler.setLevel(level)
-
-    # 设置日志文件名后缀格式为日期
-    file_handler.suffix = "%Y%m%d"
-
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-
-    # 创建格式化器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
-    # 添加处理器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
 
     # 🔧 防止向父logger传播，避免重复输出
     logger.propagate = False
@@ -0,0 +1,244 @@
+"""
+Tick录制器
+将CTP行情按定长二进制记录追加写入 data/ticks/YYYYMMDD/{symbol}.tick，可直接用 numpy.memmap 读取回放。
+
+- 行情线程只做打包和 put_nowait，队列满时丢弃并计数，绝不阻塞事件引擎
+- 后台写线程批量取出记录，按文件分组追加写入
+"""
+
+import atexit
+import os
+import queue
+import struct
+import threading
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_TICK_DIR = Path(__file__).parent.parent / "data" / "ticks"
+
+# 定长记录格式（小端，96字节），字段顺序与 TICK_DTYPE 一致
+TICK_FIELDS = (
+    'last_price', 'volume', 'turnover', 'open_interest',
+    'bid_price_1', 'ask_price_1', 'bid_volume_1', 'ask_volume_1',
+    'high_price', 'low_price', 'open_price',
+)
+_RECORD = struct.Struct('<q' + 'd' * len(TICK_FIELDS))
+TICK_DTYPE = np.dtype([('ts', '<i8')] + [(name, '<f8') for name in TICK_FIELDS])
+assert TICK_DTYPE.itemsize == _RECORD.size
+
+TICK_FILE_SUFFIX = '.tick'
+
+
+def tick_file_path(symbol: str, day: Union[str, date], base_dir: Optional[Path] = None) -> Path:
+    """tick文件路径: {base}/YYYYMMDD/{symbol}.tick"""
+    day_str = day if isinstance(day, str) else day.strftime('%Y%m%d')
+    return Path(base_dir or _TICK_DIR) / day_str / f"{symbol}{TICK_FILE_SUFFIX}"
+
+
+class TickRecorder:
+    """后台线程写入的Tick录制器"""
+
+    def __init__(self, base_dir: Optional[Path] = None, max_queue: int = 100000, flush_interval: float = 1.0):
+        """
+        Args:
+            base_dir: 录制根目录，默认 data/ticks
+            max_queue: 待写队列上限，超出后丢弃新记录
+            flush_interval: 写线程空闲时的最长等待（秒）
+        """
+        self.base_dir = Path(base_dir or _TICK_DIR)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[str, str, bytes]]" = queue.Queue(maxsize=max_queue)
+        self._files: Dict[Tuple[str, str], object] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 统计
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+    # ==================== 行情线程调用 ====================
+
+    def record(self, tick) -> bool:
+        """
+        录制一条tick（在事件线程中调用，不阻塞）
+
+        Returns:
+            bool: 是否进入写队列
+        """
+        if not self._running:
+            return False
+
+        try:
+            tick_time = getattr(tick, 'datetime', None) or datetime.now()
+            payload = _RECORD.pack(
+                int(tick_time.timestamp() * 1_000_000_000),
+                *[float(getattr(tick, name, 0) or 0) for name in TICK_FIELDS]
+            )
+            self._queue.put_nowait((tick_time.strftime('%Y%m%d'), tick.symbol, payload))
+            self.recorded += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 10000 == 1:
+                logger.warning(f"⚠️ [Tick录制] 写队列已满，累计丢弃 {self.dropped} 条")
+            return False
+        except Exception as e:
+            logger.debug(f"[Tick录制] 打包失败: {e}")
+            return False
+
+    # ==================== 写线程 ====================
+
+    def start(self):
+        """启动后台写线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="TickRecorder", daemon=True)
+        self._thread.start()
+        logger.info(f"📼 [Tick录制] 已启动，目录: {self.base_dir}")
+
+    def stop(self, timeout: float = 5.0):
+        """停止写线程并写完队列中剩余记录"""
+        if not self._running:
+            return
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_files()
+        logger.info(f"📼 [Tick录制] 已停止: 写入{self.written}条, 丢弃{self.dropped}条")
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # 一次取空队列，按文件分组后批量写
+            batch: Dict[Tuple[str, str], List[bytes]] = {}
+            item = first
+            while True:
+                day_str, symbol, payload = item
+                batch.setdefault((day_str, symbol), []).append(payload)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: Dict[Tuple[str, str], List[bytes]]):
+        for key, payloads in batch.items():
+            try:
+                handle = self._files.get(key)
+                if handle is None:
+                    self._roll_day(key[0])
+                    path = tick_file_path(key[1], key[0], self.base_dir)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    handle = open(path, 'ab')
+                    self._files[key] = handle
+                handle.write(b''.join(payloads))
+                handle.flush()
+                self.written += len(payloads)
+            except Exception as e:
+                logger.error(f"❌ [Tick录制] 写入失败 {key}: {e}")
+
+    def _roll_day(self, day_str: str):
+        """日期切换时关闭前一天的文件句柄"""
+        for key in [k for k in self._files if k[0] != day_str]:
+            try:
+                self._files.pop(key).close()
+            except Exception:
+                pass
+
+    def _close_files(self):
+        for handle in self._files.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """录制统计"""
+        return {
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+        }
+
+
+# ==================== 读取 ====================
+
+def load_ticks(symbol: str, day: Union[str, date], base_dir: Optional[Path] = None) -> np.ndarray:
+    """
+    以只读 memmap 方式加载某日某合约的tick记录（零拷贝）
+
+    Returns:
+        结构化数组（字段见 TICK_DTYPE，ts 为纳秒时间戳）；文件不存在时返回空数组
+    """
+    path = tick_file_path(symbol, day, base_dir)
+    if not path.exists():
+        return np.empty(0, dtype=TICK_DTYPE)
+
+    # 写线程可能正在追加，只映射完整记录
+    count = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+
+def list_tick_days(symbol: str, base_dir: Optional[Path] = None) -> List[str]:
+    """列出某合约有录制数据的日期（升序）"""
+    root = Path(base_dir or _TICK_DIR)
+    if not root.exists():
+        return []
+    return sorted(d.name for d in root.iterdir() if (d / f"{symbol}{TICK_FILE_SUFFIX}").exists())
+
+
+def load_tick_range(symbol: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    base_dir: Optional[Path] = None) -> List[np.ndarray]:
+    """
+    加载 [start, end) 区间的tick记录，按日期返回 memmap 切片列表（不拼接、不复制）
+
+    同一文件内的记录按到达顺序写入，时间戳单调递增，用 searchsorted 截取区间两端。
+    """
+    start_day = start.strftime('%Y%m%d') if start else None
+    end_day = end.strftime('%Y%m%d') if end else None
+    start_ns = int(start.timestamp() * 1_000_000_000) if start else None
+    end_ns = int(end.timestamp() * 1_000_000_000) if end else None
+
+    segments = []
+    for day in list_tick_days(symbol, base_dir):
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+
+        ticks = load_ticks(symbol, day, base_dir)
+        lo = 0 if start_ns is None else int(np.searchsorted(ticks['ts'], start_ns, side='left'))
+        hi = ticks.size if end_ns is None else int(np.searchsorted(ticks['ts'], end_ns, side='left'))
+        if hi > lo:
+            segments.append(ticks[lo:hi])
+    return segments
+
+
+# 全局实例
+_tick_recorder: Optional[TickRecorder] = None
+
+
+def get_tick_recorder() -> TickRecorder:
+    """获取Tick录制器实例（进程退出时自动停止并写完队列）"""
+    global _tick_recorder
+    if _tick_recorder is None:
+        _tick_recorder = TickRecorder()
+        atexit.register(_tick_recorder.stop)
+    return _tick_recorder
@@ -0,0 +1,17 @@
+"""
+交易日归属
+国内期货夜盘（21:00后）归属下一交易日，周五夜盘归属下周一（不处理节假日）。
+"""
+
+from datetime import datetime, date, timedelta
+
+# 夜盘开始时间距次日零点的偏移：加3小时后取日期即为交易日
+NIGHT_SHIFT = timedelta(hours=3)
+
+
+def trading_day(dt: datetime) -> date:
+    """交易日：夜盘（21:00后）归属下一交易日，周五夜盘归属下周一"""
+    day = (dt + NIGHT_SHIFT).date()
+    if day.weekday() >= 5:
+        day += timedelta(days=7 - day.weekday())
+    return day
@@ -0,0 +1,324 @@
+"""
+交易日志索引
+增量跟踪 logs/gold_arbitrage.log，将解析后的日志行写入 SQLite 表，按时间/类型/策略/合约建索引：
+- 读取位置(inode + 偏移)与数据在同一事务中持久化，重启后从上次位置继续，不重复不遗漏
+- 日志按日滚动(文件被重命名)时，先按inode找到滚动后的旧文件读完剩余部分，再从新文件开头读取
+- 查询时只做一次 stat 判断是否有新内容，过滤条件走索引，不再重复扫描和正则解析日志文件
+"""
+
+import glob
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.trading_logger import _BASE_LOG, _ROTATED_PATTERN, _parse_line
+
+_INDEX_FILE = Path(__file__).parent.parent / "data" / "trading_log_index.db"
+
+# 与 TimedRotatingFileHandler 的 backupCount 保持一致
+RETENTION_DAYS = 30
+
+# 单次读取的最大字节数（首次建索引时分批提交）
+_READ_CHUNK = 4 * 1024 * 1024
+
+_COLUMNS = ("timestamp", "log_type", "level", "module", "strategy_name", "symbol", "message", "is_success")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    log_type TEXT NOT NULL,
+    level TEXT NOT NULL,
+    module TEXT,
+    strategy_name TEXT,
+    symbol TEXT,
+    message TEXT,
+    is_success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_type_ts ON logs(log_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_strategy_ts ON logs(strategy_name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_symbol_ts ON logs(symbol, timestamp);
+CREATE TABLE IF NOT EXISTS cursor (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+class TradingLogIndex:
+    """基于 SQLite 的交易日志增量索引"""
+
+    def __init__(self, log_file: Optional[Path] = None, index_file: Optional[Path] = None):
+        """
+        Args:
+            log_file: 被跟踪的日志文件，默认 logs/gold_arbitrage.log
+            index_file: 索引数据库文件，默认 data/trading_log_index.db
+        """
+        self.log_file = Path(log_file or _BASE_LOG)
+        self.index_file = Path(index_file or _INDEX_FILE)
+        self._rotated_pattern = str(self.log_file) + ".*" if log_file else _ROTATED_PATTERN
+        self._lock = threading.Lock()
+        self._last_stat: Optional[Tuple[int, int]] = None
+        self._last_prune_day: Optional[str] = None
+        # 已结束交易日的分组计数缓存 {'YYYY-MM-DD': Counter{(strategy_name, log_type, is_success): n}}
+        self._day_counts: Dict[str, Counter] = {}
+
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # ==================== 增量同步 ====================
+
+    def sync(self) -> int:
+        """
+        将日志文件新增内容写入索引
+
+        Returns:
+            int: 新增索引行数
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.log_file)
+            except OSError:
+                return 0
+
+            # 文件未变化时不做任何读取
+            current = (stat.st_ino, stat.st_size)
+            if current == self._last_stat:
+                return 0
+
+            added = 0
+            cursor = self._load_cursor()
+            if cursor is None:
+                # 首次建索引：先导入已滚动的历史文件（从旧到新）
+                for path in self._rotated_files():
+                    added += self._ingest(path, 0, None)
+                inode, offset = stat.st_ino, 0
+            else:
+                inode, offset = cursor
+                if inode != stat.st_ino:
+                    # 已滚动：读完旧文件剩余部分，新文件从头开始
+                    old_path = self._find_by_inode(inode)
+                    if old_path is not None:
+                        added += self._ingest(old_path, offset, None)
+                    inode, offset = stat.st_ino, 0
+                elif stat.st_size < offset:
+                    # 文件被截断
+                    offset = 0
+
+            added += self._ingest(self.log_file, offset, inode)
+            self._last_stat = current
+            self._prune()
+            return added
+
+    def _ingest(self, path: Path, offset: int, inode: Optional[int]) -> int:
+        """
+        从 offset 开始读取完整行并写入索引；inode 不为空时同步更新读取位置
+
+        Returns:
+            int: 写入行数
+        """
+        added = 0
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while True:
+                    chunk = f.read(_READ_CHUNK)
+                    if not chunk:
+                        break
+                    # 只处理到最后一个换行符，未写完的行留到下次
+                    end = chunk.rfind(b"\n")
+                    if end < 0:
+                        if len(chunk) < _READ_CHUNK:
+                            break
+                        end = len(chunk) - 1
+                    chunk = chunk[:end + 1]
+                    offset += len(chunk)
+                    f.seek(offset)
+
+                    rows = []
+                    for line in chunk.decode("utf-8", errors="replace").splitlines():
+                        entry = _parse_line(line)
+                        if entry is not None:
+                            rows.append(tuple(entry[column] for column in _COLUMNS))
+
+                    with self._conn:
+                        if rows:
+                            self._conn.executemany(
+                                f"INSERT INTO logs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                                rows
+                            )
+                        if inode is not None:
+                            self._save_cursor(inode, offset)
+                    added += len(rows)
+        except OSError:
+            pass
+
+        if inode is not None:
+            with self._conn:
+                self._save_cursor(inode, offset)
+        return added
+
+    def _load_cursor(self) -> Optional[Tuple[int, int]]:
+        row = self._conn.execute(
+            "SELECT inode, offset FROM cursor WHERE path = ?", (str(self.log_file),)
+        ).fetchone()
+        return (row["inode"], row["offset"]) if row else None
+
+    def _save_cursor(self, inode: int, offset: int):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cursor (path, inode, offset) VALUES (?, ?, ?)",
+            (str(self.log_file), inode, offset)
+        )
+
+    def _rotated_files(self) -> List[Path]:
+        """滚动后的日志文件，按日期后缀升序"""
+        return [Path(f) for f in sorted(glob.glob(self._rotated_pattern)) if f != str(self.log_file)]
+
+    def _find_by_inode(self, inode: int) -> Optional[Path]:
+        for path in reversed(self._rotated_files()):
+            try:
+                if os.stat(path).st_ino == inode:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    def _prune(self):
+        """每天清理一次超出保留期的索引行"""
+        today = datetime.now().strftime("%Y%m%d")
+        if self._last_prune_day == today:
+            return
+        self._last_prune_day = today
+        cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).isoformat()
+        with self._conn:
+            self._conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff,))
+
+    # ==================== 查询 ====================
+
+    def query(self,
+              strategy_name: Optional[str] = None,
+              log_type: Optional[str] = None,
+              start_time: Optional[datetime] = None,
+              end_time: Optional[datetime] = None,
+              limit: int = 100,
+              offset: int = 0) -> List[Dict]:
+        """按条件查询日志（最新的在前）"""
+        self.sync()
+
+        where, params = self._build_where(strategy_name, log_type, start_time, end_time)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM logs{where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+
+        results = []
+        for row in rows:
+            entry = dict(row)
+            entry["is_success"] = bool(entry["is_success"])
+            results.append(entry)
+        return results
+
+    def count(self,
+              strategy_name: Optional[str] = None,
+              log_type: Optional[str] = None,
+              start_time: Optional[datetime] = None,
+              end_time: Optional[datetime] = None) -> int:
+        """按条件统计日志条数"""
+        self.sync()
+
+        where, params = self._build_where(strategy_name, log_type, start_time, end_time)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM logs{where}", params).fetchone()[0]
+
+    def count_groups(self,
+                     start_time: Optional[datetime] = None,
+                     end_time: Optional[datetime] = None) -> Counter:
+        """
+        按 (策略, 类型, 是否成功) 分组计数，一次查询完成
+
+        区间内已结束的整天结果会被缓存，后续查询只统计未缓存的部分。
+
+        Returns:
+            Counter{(strategy_name, log_type, is_success): 条数}
+        """
+        self.sync()
+
+        totals: Counter = Counter()
+        cacheable = set()
+        cached = []
+        if start_time and end_time:
+            today = date.today()
+            day = start_time.date()
+            while day <= end_time.date() and day < today:
+                day_start = datetime.combine(day, datetime.min.time())
+                day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
+                if day_start >= start_time and day_end <= end_time:
+                    key = day.isoformat()
+                    if key in self._day_counts:
+                        cached.append(key)
+                    else:
+                        cacheable.add(key)
+                day += timedelta(days=1)
+
+        where, params = self._build_where(None, None, start_time, end_time)
+        if cached:
+            where += (" AND " if where else " WHERE ") + f"substr(timestamp, 1, 10) NOT IN ({', '.join('?' * len(cached))})"
+            params += cached
+        sql = (f"SELECT substr(timestamp, 1, 10) AS day, strategy_name, log_type, is_success, COUNT(*) AS n "
+               f"FROM logs{where} GROUP BY day, strategy_name, log_type, is_success")
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            new_days: Dict[str, Counter] = {key: Counter() for key in cacheable}
+            for row in rows:
+                group = (row["strategy_name"], row["log_type"], bool(row["is_success"]))
+                totals[group] += row["n"]
+                if row["day"] in new_days:
+                    new_days[row["day"]][group] += row["n"]
+            self._day_counts.update(new_days)
+            for key in cached:
+                totals.update(self._day_counts[key])
+
+        return totals
+
+    @staticmethod
+    def _build_where(strategy_name, log_type, start_time, end_time) -> Tuple[str, list]:
+        clauses, params = [], []
+        if strategy_name:
+            clauses.append("strategy_name = ?")
+            params.append(strategy_name)
+        if log_type:
+            clauses.append("log_type = ?")
+            params.append(log_type)
+        if start_time:
+            clauses.append("timestamp >= ?")
+            params.append(start_time.isoformat())
+        if end_time:
+            clauses.append("timestamp <= ?")
+            params.append(end_time.isoformat())
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 全局实例
+_trading_log_index: Optional[TradingLogIndex] = None
+
+
+def get_trading_log_index() -> TradingLogIndex:
+    """获取交易日志索引实例"""
+    global _trading_log_index
+    if _trading_log_index is None:
+        _trading_log_index = TradingLogIndex()
+    return _trading_log_index
@@ -6,10 +6,16 @@
 import os
 import re
 import glob
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from itertools import islice
 from pathlib import Path
 
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 
 # 日志文件目录和基础文件名
 _LOG_DIR = Path(__file__).parent.parent / "logs"
@@ -40,6 +46,53 @@ _TYPE_PATTERNS = {
 }
 
 
+# 汇总统计的日志类型
+LOG_TYPES = ("ORDER", "TRADE", "SIGNAL", "ERROR", "INFO")
+
+
+def _build_summary(counts: Counter, strategy_name: Optional[str] = None) -> Dict:
+    """
+    将分组计数整理为汇总统计
+
+    Args:
+        counts: Counter{(strategy_name, log_type, is_success): 条数}
+        strategy_name: 只统计该策略（为空时统计全部）
+    """
+    by_type = {lt.lower(): 0 for lt in LOG_TYPES}
+    by_strategy: Dict[str, Dict[str, int]] = {}
+    orders = {"total": 0, "success": 0, "failed": 0}
+    success_count = 0
+    failed_count = 0
+
+    for (name, log_type, is_success), n in counts.items():
+        if strategy_name and name != strategy_name:
+            continue
+
+        by_type[log_type.lower()] = by_type.get(log_type.lower(), 0) + n
+        if is_success:
+            success_count += n
+        else:
+            failed_count += n
+
+        if log_type == "ORDER":
+            orders["total"] += n
+            orders["success" if is_success else "failed"] += n
+
+        if name:
+            stats = by_strategy.setdefault(name, {"total": 0, **{lt.lower(): 0 for lt in LOG_TYPES}})
+            stats["total"] += n
+            stats[log_type.lower()] = stats.get(log_type.lower(), 0) + n
+
+    return {
+        "by_type": by_type,
+        "success_count": success_count,
+        "failed_count": failed_count,
+        "total_count": success_count + failed_count,
+        "orders": orders,
+        "by_strategy": by_strategy,
+    }
+
+
 def _infer_log_type(message: str, level: str) -> str:
     """根据日志消息内容推断交易日志类型"""
     if level == "ERROR":
@@ -73,26 +126,75 @@ def _infer_symbol(message: str) -> Optional[str]:
     return m.group(1) if m else None
 
 
+# 反向读取的块大小
+_REVERSE_BLOCK_SIZE = 64 * 1024
+
+
+def _rotated_file_day(filepath: str) -> Optional[datetime]:
+    """滚动文件的日期后缀（gold_arbitrage.log.20260313 -> 2026-03-13），无法识别时返回None"""
+    suffix = filepath.rsplit(".", 1)[-1]
+    try:
+        return datetime.strptime(suffix, "%Y%m%d")
+    except ValueError:
+        return None
+
+
 def _collect_log_files(start_time: Optional[datetime] = None,
                        end_time: Optional[datetime] = None) -> List[str]:
-    """收集需要读取的日志文件列表，按时间降序排列"""
+    """收集需要读取的日志文件列表，按时间降序排列（跳过日期不在查询区间内的滚动文件）"""
+    dated = []
+    undated = []
+
+    # 滚动后的日志文件：后缀日期即该文件记录的日期
+    for f in glob.glob(_ROTATED_PATTERN):
+        if f == str(_BASE_LOG):
+            continue
+        day = _rotated_file_day(f)
+        if day is None:
+            undated.append(f)
+            continue
+        if start_time and day.date() < start_time.date():
+            continue
+        if end_time and day.date() > end_time.date():
+            continue
+        dated.append((day, f))
+
     files = []
 
-    # 当前日志文件
+    # 当前日志文件（最新）
     if _BASE_LOG.exists():
         files.append(str(_BASE_LOG))
 
-    # 滚动后的日志文件
-    for f in glob.glob(_ROTATED_PATTERN):
-        if f != str(_BASE_LOG):
-            files.append(f)
-
-    # 按文件修改时间降序（最新的在前面）
-    files.sort(key=lambda f: os.path.getmtime(f), reverse=True)
+    files.extend(f for _, f in sorted(dated, reverse=True))
+    files.extend(sorted(undated, key=lambda f: os.path.getmtime(f), reverse=True))
 
     return files
 
 
+def _read_lines_reversed(filepath: str, block_size: int = _REVERSE_BLOCK_SIZE) -> Iterator[str]:
+    """从文件末尾按块向前读取，逐行倒序产出（不整体加载文件）"""
+    with open(filepath, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+
+            lines = block.split(b"\n")
+            # 第一段可能是不完整的行，留到下一块拼接
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line.decode("utf-8", errors="replace")
+
+        if remainder:
+            yield remainder.decode("utf-8", errors="replace")
+
+
 def _parse_line(line: str) -> Optional[Dict]:
     """解析单行日志为结构化字典"""
     m = _LINE_RE.match(line.strip())
@@ -122,6 +224,19 @@ def _parse_line(line: str) -> Optional[Dict]:
 class TradingLogger:
     """基于文件的交易日志查询器"""
 
+    def __init__(self, use_index: bool = True):
+        """
+        Args:
+            use_index: 是否使用 SQLite 日志索引（索引不可用时自动退回逐行扫描文件）
+        """
+        self._index = None
+        if use_index:
+            try:
+                from utils.trading_log_index import get_trading_log_index
+                self._index = get_trading_log_index()
+            except Exception as e:
+                logger.warning(f"⚠️ [交易日志] 日志索引不可用，使用文件扫描: {e}")
+
     def get_logs(self,
                  strategy_name: Optional[str] = None,
                  log_type: Optional[str] = None,
@@ -129,49 +244,95 @@ class TradingLogger:
                  end_time: Optional[datetime] = None,
                  limit: int = 100,
                  offset: int = 0) -> List[Dict]:
-        """查询交易日志"""
-        results = []
-        skipped = 0
+        """查询交易日志（最新的在前）"""
+        if self._index is not None:
+            try:
+                return self._index.query(strategy_name, log_type, start_time, end_time, limit, offset)
+            except Exception as e:
+                logger.warning(f"⚠️ [交易日志] 索引查询失败，使用文件扫描: {e}")
+
+        return self._scan_logs(strategy_name, log_type, start_time, end_time, limit, offset)
+
+    def _scan_logs(self,
+                   strategy_name: Optional[str] = None,
+                   log_type: Optional[str] = None,
+                   start_time: Optional[datetime] = None,
+                   end_time: Optional[datetime] = None,
+                   limit: int = 100,
+                   offset: int = 0) -> List[Dict]:
+        """逐行扫描日志文件查询"""
+        entries = self._iter_entries(strategy_name, log_type, start_time, end_time)
+        return list(islice(entries, offset, offset + limit))
+
+    def _iter_entries(self,
+                      strategy_name: Optional[str] = None,
+                      log_type: Optional[str] = None,
+                      start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None) -> Iterator[Dict]:
+        """倒序逐条产出符合条件的日志（调用方停止迭代即停止读取）"""
         files = _collect_log_files(start_time, end_time)
 
         for filepath in files:
             try:
-                with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-                    # 逆序读取（最新的在后面），所以先读全部再反转
-                    lines = f.readlines()
-            except OSError:
-                continue
+                for line in _read_lines_reversed(filepath):
+                    entry = _parse_line(line)
+                    if entry is None:
+                        continue
 
-            for line in reversed(lines):
-                entry = _parse_line(line)
-                if entry is None:
-                    continue
+                    # 时间过滤（倒序读取，早于开始时间后本文件剩余部分都不再需要）
+                    entry_time = datetime.fromisoformat(entry["timestamp"])
+                    if start_time and entry_time < start_time:
+                        break
+                    if end_time and entry_time > end_time:
+                        continue
 
-                # 时间过滤
-                entry_time = datetime.fromisoformat(entry["timestamp"])
-                if start_time and entry_time < start_time:
-                    continue
-                if end_time and entry_time > end_time:
-                    continue
+                    # 策略名过滤
+                    if strategy_name and entry.get("strategy_name") != strategy_name:
+                        continue
 
-                # 策略名过滤
-                if strategy_name and entry.get("strategy_name") != strategy_name:
-                    continue
+                    # 类型过滤
+                    if log_type and entry["log_type"] != log_type:
+                        continue
 
-                # 类型过滤
-                if log_type and entry["log_type"] != log_type:
-                    continue
+                    yield entry
 
-                # offset 跳过
-                if skipped < offset:
-                    skipped += 1
-                    continue
+            except OSError:
+                continue
 
-                results.append(entry)
-                if len(results) >= limit:
-                    return results
+    def get_events(self,
+                   event_type: Optional[str] = None,
+                   strategy_name: Optional[str] = None,
+                   symbol: Optional[str] = None,
+                   start_time: Optional[datetime] = None,
+                   end_time: Optional[datetime] = None,
+                   limit: int = 100,
+                   offset: int = 0) -> List[Dict]:
+        """查询结构化交易事件（订单/成交/信号/错误，最新的在前），字段直接来自事件日志，无需正则推断"""
+        from utils.event_journal import iter_events
+
+        events = iter_events(event_type, strategy_name, symbol, start_time, end_time)
+        return list(islice(events, offset, offset + limit))
+
+    def get_summary(self,
+                    strategy_name: Optional[str] = None,
+                    start_time: Optional[datetime] = None,
+                    end_time: Optional[datetime] = None) -> Dict:
+        """
+        日志汇总统计（按类型、成功/失败、策略计数），一次遍历完成
+
+        Returns:
+            {"by_type", "success_count", "failed_count", "total_count", "orders", "by_strategy"}
+        """
+        if self._index is not None:
+            try:
+                return _build_summary(self._index.count_groups(start_time, end_time), strategy_name)
+            except Exception as e:
+                logger.warning(f"⚠️ [交易日志] 索引统计失败，使用文件扫描: {e}")
 
-        return results
+        counts: Counter = Counter()
+        for entry in self._iter_entries(strategy_name, None, start_time, end_time):
+            counts[(entry["strategy_name"], entry["log_type"], entry["is_success"])] += 1
+        return _build_summary(counts, strategy_name)
 
     def get_strategy_performance(self,
                                  strategy_name: str,
@@ -180,42 +341,19 @@ class TradingLogger:
         end_time = datetime.now()
         start_time = end_time - timedelta(days=days)
 
-        # 获取该策略的所有交易类型日志
-        trade_logs = self.get_logs(
-            strategy_name=strategy_name,
-            log_type="TRADE",
-            start_time=start_time,
-            end_time=end_time,
-            limit=10000,
-        )
-
-        order_logs = self.get_logs(
-            strategy_name=strategy_name,
-            log_type="ORDER",
-            start_time=start_time,
-            end_time=end_time,
-            limit=10000,
-        )
-
-        error_logs = self.get_logs(
-            strategy_name=strategy_name,
-            log_type="ERROR",
-            start_time=start_time,
-            end_time=end_time,
-            limit=10000,
-        )
-
-        total_orders = len(order_logs)
-        successful_orders = len([o for o in order_logs if o.get("is_success")])
-        failed_orders = total_orders - successful_orders
+        summary = self.get_summary(strategy_name=strategy_name, start_time=start_time, end_time=end_time)
+
+        total_orders = summary["orders"]["total"]
+        successful_orders = summary["orders"]["success"]
+        failed_orders = summary["orders"]["failed"]
 
         return {
             "strategy_name": strategy_name,
-            "total_trades": len(trade_logs),
+            "total_trades": summary["by_type"]["trade"],
             "total_orders": total_orders,
             "successful_orders": successful_orders,
             "failed_orders": failed_orders,
-            "total_errors": len(error_logs),
+            "total_errors": summary["by_type"]["error"],
             "win_rate": round(successful_orders / total_orders * 100, 2) if total_orders > 0 else 0,
             "days": days,
         }